@@ -1,8 +1,44 @@
 import os
 import json
-from typing import List
-from openai import OpenAI
-from schemas import AnalysisResult, ContinuityError, ErrorType, Severity, Scene, ComplianceRisk, ScheduleRisk, ProductionAsset, AssetStatus
+import asyncio
+import itertools
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from llm import LLMPool, get_sync_client, parse_completion, response_format_for
+from governor import INTERACTIVE
+from schemas import AnalysisResult, LLMAnalysisResult, PromptCompaction, ContinuityError, Severity, Scene, ComplianceRisk, ScheduleRisk, ProductionAsset, AssetStatus, ExpenseCategory
+from money import format_paise, lakhs, parse_paise, thousands
+from cache import cache_key
+from metrics import AGGREGATION, PARSE, PROMPT_TOKENS, RULES, SEGMENTATION, record_llm_call, stage, timed_iter
+from segmenter import SceneSpan, iter_scenes
+from continuity import ContinuityFinding, ContinuityTracker, detect_continuity, format_candidates
+from compaction import PROMPT_TOKEN_BUDGET, CompactionReport, compact_scene, count_tokens, fit_to_budget, tokenizer_name
+from scheduler import SEARCH_WORK, optimize_schedule
+from ratecard import LOCAL_ENGINE_SEED, RATE_CARD
+from rules import RULES_FINGERPRINT, RuleHit, scan, BUDGET_HIGH, BUDGET_MEDIUM, COMPLIANCE_POCSO, COMPLIANCE_COTPA, COMPLIANCE_RELIGION, COMPLIANCE_AWBI, ASSET_VEHICLE, ASSET_MUSIC
+
+if TYPE_CHECKING:
+    from openai import OpenAI  # Imported lazily by llm.py
+
+# Header used when a script has no sluglines at all (whole script = one scene)
+UNKNOWN_SCENE_HEADER = "INT. UNKNOWN SCENE - DAY"
+
+# Compliance category of the local engine's "nothing found" placeholder (see general_review_risk)
+GENERAL_REVIEW = "General Review"
+
+# The local engine runs a lighter schedule search than /api/schedule, to stay fast on long scripts
+LOCAL_SCHEDULE_WORK = SEARCH_WORK // 20
+
+# Local continuity findings: (director's fix, cost of the fix) per budget mode, and how severity scales it
+CONTINUITY_FIXES = {
+    "Low": ("Rewrite dialogue to mention it off-screen.", thousands(2)),
+    "Medium": ("Shoot a quick insert shot.", lakhs(10)),
+    "High": ("CGI Correction in Post.", lakhs(25)),
+}
+CONTINUITY_SEVERITY_SCALE = {Severity.LOW: 0.2, Severity.MEDIUM: 0.5, Severity.HIGH: 1, Severity.CRITICAL: 2}
+CONTINUITY_DELAYS = {Severity.LOW: "30 mins", Severity.MEDIUM: "1 hour", Severity.HIGH: "2 hours", Severity.CRITICAL: "1 day"}
 
 # Placeholder for API Key - in production, use environment variables
 # client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
@@ -47,272 +83,227 @@ Your goal: **Identify Continuity Errors that will cost CRORES** AND **Flag Censo
 Output MUST be a valid JSON object matching the provided schema.
 """
 
-def mock_analyze_script(script_text: str, budget_mode: str = "Medium") -> AnalysisResult:
+def aggregate_budget(scenes: List[Scene]) -> List[ExpenseCategory]:
     """
-    Mock function with 'Tollywood' flavor.
-    Uses randomized logic to simulate "Live AI" variance.
+    Sums up all scenes to get a total script-wide breakdown per expense category.
+    Integer paise throughout, so the rollup is exact however many scenes there are.
     """
-    import re
-    import random
-    
-    # 1. Simple Regex to find Scene Headers (INT./EXT.)
-    # Looks for lines starting with INT or EXT, case insensitive
-    # 1. Improved Regex to find Scene Headers
-    # Matches:
-    # 1. Lines starting with INT or EXT (case insensitive)
-    # 2. Optional dot or space
-    # 3. Matches typical sluglines like "INT. OFFICE" or "EXT FOREST - DAY"
-    scene_pattern = re.compile(r"^\s*(INT|EXT)[.\s].*$", re.MULTILINE | re.IGNORECASE)
-    matches = scene_pattern.findall(script_text)
+    totals: Dict[str, int] = {}
+    for scene in scenes:
+        for expense in scene.expense_breakdown:
+            totals[expense.category] = totals.get(expense.category, 0) + expense.amount_paise
+
+    return [
+        ExpenseCategory(category=cat, amount_paise=amount, reason="Aggregated Script Cost")
+        for cat, amount in totals.items()
+    ]
+
+def iter_local_spans(script_text: str) -> Iterator[Tuple[str, SceneSpan]]:
+    """(scene id, span) in script order, with the same ids and no-slugline fallback as the local engine."""
+    spans = iter_scenes(script_text)
+    first_span = next(spans, None)
+    if first_span is None and len(script_text) > 50:
+        # Fallback Case: No sluglines, whole script is the scene
+        first_span = SceneSpan(UNKNOWN_SCENE_HEADER, 0, len(script_text), script_text)
+    if first_span is not None:
+        spans = itertools.chain([first_span], spans)
+    for i, span in enumerate(spans, start=1):
+        yield str(i), span
+
+def iter_local_scenes(script_text: str, seed: Optional[int] = LOCAL_ENGINE_SEED) -> Iterator[Tuple[Scene, List[RuleHit]]]:
+    """
+    Scene-by-scene half of the local engine.
+    Yields each Scene with its rule hits as soon as it has been estimated.
+    """
+    return iter_span_scenes(iter_local_spans(script_text), seed)
 
-    parsed_scenes = []
-    
-    # Pre-defined randomized line items for variety
-    reasons_templates = {
-        "Location & Permits": ["GHMC Road Permission", "Private Farmhouse Rent", "Ramoji Film City Floor Charge", "Forest Dept Clearance"],
-        "Crowd & Artists": ["300+ Junior Artists + Batta", "Background Dancers Union Rates", "Village Crowd + Transport", "Corporate Office Extras"],
-        "Action & Stunts": ["Rope Rigs & Harnesses", "Fighters Union (Master + 10)", "Car Crash Setup", "Fire Safety Team"],
-        "Vehicles & Logistics": ["Vanity Vans x4", "Generator Van (Silenced)", "Crane & Jimmy Jib", "Action Vehicles + Towing"],
-        "Unit Food": ["Breakfast/Lunch/Dinner for 400 Pax", "Hi-Tea & Snacks", "VVIP Catering for Stars", "Late Night Dinner Packets"],
-        "Hidden Costs": ["Diesel for Gensets", "Union Overtime Charges", "Local Union Association Fund", "Rain Machine Water Tankers"]
-    }
-
-    if matches or len(script_text) > 50: 
-        lines = script_text.split('\n')
-        target_lines = [l for l in lines if scene_pattern.match(l)]
+def iter_span_scenes(
+    spans: Iterable[Tuple[str, SceneSpan]],
+    seed: Optional[int] = LOCAL_ENGINE_SEED,
+    tracker: Optional[ContinuityTracker] = None
+) -> Iterator[Tuple[Scene, List[RuleHit]]]:
+    """
+    iter_local_scenes over (scene id, span) pairs from any source (e.g. ingest.py).
+    With a `tracker`, each span is also fed to it, so nothing needs the span again later.
+    """
+    # 1. Single-pass segmentation into scene spans (header + full body)
+    for scene_id, span in timed_iter(spans, SEGMENTATION):
+        header = span.header
+        header_upper = header.upper()
+        time = "DAY" if "DAY" in header_upper else "NIGHT" if "NIGHT" in header_upper else "UNKNOWN"
+        location = header_upper.replace("INT", "").replace("EXT", "").replace(".", "").split("-")[0].strip()
         
-        if not target_lines:
-             target_lines = ["INT. UNKNOWN SCENE - DAY"] 
-
-        scene_count = 0
-        for header in target_lines:
-            scene_count += 1
-            header_upper = header.upper().strip()
-            time = "DAY" if "DAY" in header_upper else "NIGHT" if "NIGHT" in header_upper else "UNKNOWN"
-            location = header_upper.replace("INT", "").replace("EXT", "").replace(".", "").split("-")[0].strip()
-            
-            # --- DYNAMIC BUDGET LOGIC ---
-            # Keywords indicating HIGH budget
-            high_triggers = ["CHASE", "BLAST", "EXPLOSION", "CROWD", "VFX", "SONG", "FIGHT", "STUNT", "HELICOPTER", "TRAIN", "FIRE", "HIGHWAY"]
-            # Keywords indicating MEDIUM budget
-            med_triggers = ["EXT", "STREET", "CLUB", "PARTY", "WEDDING", "FOREST", "RAIN", "NIGHT"]
-
-            # Safe Content Extraction
-            if header == "INT. UNKNOWN SCENE - DAY":
-                # Fallback Case: Whole script is the scene
-                content_snippet = script_text.upper()
-            else:
-                # Normal Case: Extract 1500 chars after header
-                start_idx = script_text.find(header)
-                if start_idx != -1:
-                    content_snippet = script_text[start_idx:start_idx+1500].upper()
-                else:
-                    content_snippet = "" # Should not happen if regex matched, but safe fallback
-            
-            is_high = any(x in header_upper or x in content_snippet for x in high_triggers)
-            is_med = any(x in header_upper or x in content_snippet for x in med_triggers)
-
-            scene_expenses = []
-            
-            # Base Costs (Randomized)
-            if is_high:
-                # Range: 50L to 3Cr
-                base_mult = random.uniform(5.0, 30.0) # 5L to 30L multiplier per item
-                
-                scene_expenses = [
-                    {"category": "Location & Permits", "cost": f"₹ {random.randint(2, 10)} Lakhs", "reason": "Highway Closure / Airport Permits"},
-                    {"category": "Crowd & Artists", "cost": f"₹ {random.randint(10, 50)} Lakhs", "reason": "1000+ Junior Artists & Dancers"},
-                    {"category": "Action & Stunts", "cost": f"₹ {random.randint(15, 80)} Lakhs", "reason": "Harness Team, Crash Mats, Pyro Tech"},
-                    {"category": "Vehicles & Logistics", "cost": f"₹ {random.randint(5, 20)} Lakhs", "reason": "Multiple Camera Cranes, Russian Arm"},
-                    {"category": "Unit Food (Catering)", "cost": f"₹ {random.randint(3, 8)} Lakhs", "reason": "Full Unit Catering (Heavy Scale)"},
-                    {"category": "Hidden Costs", "cost": f"₹ {random.randint(2, 5)} Lakhs", "reason": "Hazard Pay, Breakages, Misc"}
-                ]
-            elif is_med:
-                # Range: 10L to 40L
-                scene_expenses = [
-                    {"category": "Location & Permits", "cost": f"₹ {random.randint(1, 4)} Lakhs", "reason": random.choice(reasons_templates["Location & Permits"])},
-                    {"category": "Crowd & Artists", "cost": f"₹ {random.randint(2, 6)} Lakhs", "reason": random.choice(reasons_templates["Crowd & Artists"])},
-                    {"category": "Action & Stunts", "cost": "₹ 0", "reason": "N/A"},
-                    {"category": "Vehicles & Logistics", "cost": f"₹ {random.randint(1, 3)} Lakhs", "reason": random.choice(reasons_templates["Vehicles & Logistics"])},
-                    {"category": "Unit Food (Catering)", "cost": f"₹ {random.randint(1, 2)} Lakhs", "reason": "Standard Unit Food"},
-                    {"category": "Hidden Costs", "cost": f"₹ {random.randint(50, 90)}k", "reason": "Overtime & Batta"}
-                ]
-            else:
-                # Low Budget Talkie
-                scene_expenses = [
-                    {"category": "Location & Permits", "cost": f"₹ {random.randint(10, 50)}k", "reason": "House/Office Rent"},
-                    {"category": "Crowd & Artists", "cost": f"₹ {random.randint(10, 30)}k", "reason": "few extras"},
-                    {"category": "Action & Stunts", "cost": "₹ 0", "reason": "N/A"},
-                    {"category": "Vehicles & Logistics", "cost": f"₹ {random.randint(10, 30)}k", "reason": "Transport"},
-                    {"category": "Unit Food (Catering)", "cost": f"₹ {random.randint(20, 40)}k", "reason": "Tea/Coffee/Lunch"},
-                    {"category": "Hidden Costs", "cost": f"₹ {random.randint(5, 15)}k", "reason": "Misc"}
-                ]
-
-            # Calculate total cost string for the Scene object
-            total_raw = 0
-            for item in scene_expenses:
-                c_str = item["cost"].replace("₹", "").replace(",", "").strip()
-                val = 0
-                if "Crores" in c_str: val = float(c_str.replace("Crores", "")) * 10000000
-                elif "Lakhs" in c_str: val = float(c_str.replace("Lakhs", "")) * 100000
-                elif "k" in c_str: val = float(c_str.replace("k", "")) * 1000
-                total_raw += val
-            
-            parsed_scenes.append(
-                Scene(
-                    id=str(scene_count),
-                    header=header,
-                    summary=f"Scene at {location}. Intensity: {'HIGH' if is_high else 'MEDIUM' if is_med else 'LOW'}",
-                    location=location,
-                    time=time,
-                    estimated_cost=f"₹ {total_raw/100000:.2f} Lakhs",
-                    budget_code=total_raw,
-                    expense_breakdown=scene_expenses
-                )
-            )
+        # --- DYNAMIC BUDGET LOGIC ---
+        # One pass over the full scene body (header included) for every rule
+        with stage(RULES):
+            scene_hits = scan(span.body, scene_id, span.start)
+            if tracker is not None:
+                tracker.feed(scene_id, span)
+        scene_rules = {hit.rule for hit in scene_hits}
+        
+        is_high = BUDGET_HIGH in scene_rules
+        is_med = BUDGET_MEDIUM in scene_rules
+
+        # Line items from the rate card: intensity tier, scene length, time of day and triggers
+        scene_expenses = RATE_CARD.line_items(
+            "HIGH" if is_high else "MEDIUM" if is_med else "LOW",
+            scene_id=scene_id,
+            header=header,
+            line_count=sum(1 for line in span.body.splitlines()[1:] if line.strip()),
+            time=time,
+            keywords=[hit.keyword for hit in scene_hits],
+            seed=seed
+        )
 
-    # DYNAMIC AUTO-FIX LOGIC based on Budget Mode
-    sc1_fix = "Shoot a quick insert shot."
-    sc1_cost = "₹ 10 Lakhs"
-    
-    if budget_mode == "Low":
-        sc1_fix = "Rewrite dialogue to mention it off-screen."
-        sc1_cost = "₹ 2,000"
-    elif budget_mode == "High":
-        sc1_fix = "CGI Correction in Post."
-        sc1_cost = "₹ 25 Lakhs"
+        # Scene total (estimated_cost / budget_code are derived from it)
+        total_paise = sum(item["amount_paise"] for item in scene_expenses)
+        
+        scene = Scene(
+            id=scene_id,
+            header=header,
+            summary=f"Scene at {location}. Intensity: {'HIGH' if is_high else 'MEDIUM' if is_med else 'LOW'}",
+            location=location,
+            time=time,
+            total_paise=total_paise,
+            expense_breakdown=scene_expenses
+        )
+        yield scene, scene_hits
+
+def general_review_risk() -> ComplianceRisk:
+    """The local engine's placeholder when no compliance rule fired anywhere in the script."""
+    return ComplianceRisk(
+        category=GENERAL_REVIEW,
+        trigger_text="No specific triggers found.",
+        legal_requirement="Proceed with standard CBFC guidelines.",
+        estimated_fine="None"
+    )
+
+def add_rule_hits(hits: Dict[str, Dict[str, RuleHit]], scene_hits: Iterable[RuleHit]) -> None:
+    """
+    Collects the first hit of each rule per scene (rule id -> scene id -> hit), so a finding is
+    reported in every scene that triggers it, and each scene's findings depend on that scene alone.
+    """
+    for hit in scene_hits:
+        hits.setdefault(hit.rule, {}).setdefault(hit.scene_id, hit)
+
+def mock_analyze_script(script_text: str, budget_mode: str = "Medium", seed: Optional[int] = LOCAL_ENGINE_SEED) -> AnalysisResult:
+    """
+    Mock function with 'Tollywood' flavor.
+    Rule-driven and deterministic: the same script always gives the same result.
+    Pass a `seed` (or set LOCAL_ENGINE_SEED) for reproducible "Live AI" style variance.
+    """
+    parsed_scenes = []
+    hits = {}
+    for scene, scene_hits in iter_local_scenes(script_text, seed):
+        parsed_scenes.append(scene)
+        add_rule_hits(hits, scene_hits)
+
+    return build_local_result(script_text, budget_mode, parsed_scenes, hits)
+
+def mock_analyze_spans(spans: Iterable[Tuple[str, SceneSpan]], budget_mode: str = "Medium", seed: Optional[int] = LOCAL_ENGINE_SEED) -> AnalysisResult:
+    """
+    mock_analyze_script over a scene stream (uploads, see ingest.py), in one pass: each scene
+    is estimated and checked for continuity as it arrives, then dropped.
+    Same result as mock_analyze_script on the same text.
+    """
+    tracker = ContinuityTracker()
+    parsed_scenes = []
+    hits = {}
+    for scene, scene_hits in iter_span_scenes(spans, seed, tracker):
+        parsed_scenes.append(scene)
+        add_rule_hits(hits, scene_hits)
+
+    return build_local_result(None, budget_mode, parsed_scenes, hits, tracker)
+
+def build_local_result(
+    script_text: Optional[str],
+    budget_mode: str,
+    parsed_scenes: List[Scene],
+    hits: Dict[str, Dict[str, RuleHit]],
+    tracker: Optional[ContinuityTracker] = None
+) -> AnalysisResult:
+    """
+    Script-wide half of the local engine: findings, budget rollup and assets over the estimated scenes.
+    `hits` comes from add_rule_hits: compliance risks are reported per rule and scene.
+    Continuity comes from `tracker` when the scenes were already fed to one (then `script_text` may be None).
+    """
 
     # Aggregating Global Budget for Executive Intelligence
-    # We sum up all scenes to get a total script-wide breakdown
-    global_breakdown_map = {}
-    for scene in parsed_scenes:
-        for expense in scene.expense_breakdown:
-            cat = expense.category
-            # Extract raw value from string
-            cost_str = expense.cost
-            val = 0
-            if "Crores" in cost_str: val = float(cost_str.replace("Crores", "").replace("₹", "").strip()) * 10000000
-            elif "Lakhs" in cost_str: val = float(cost_str.replace("Lakhs", "").replace("₹", "").strip()) * 100000
-            elif "k" in cost_str: val = float(cost_str.replace("k", "").replace("₹", "").strip()) * 1000
-            
-            if cat not in global_breakdown_map:
-                global_breakdown_map[cat] = 0
-            global_breakdown_map[cat] += val
-
-    overall_budget_breakdown = []
-    for cat, val in global_breakdown_map.items():
-        overall_budget_breakdown.append({
-            "category": cat,
-            "cost": f"₹ {val/100000:.2f} Lakhs" if val < 10000000 else f"₹ {val/10000000:.2f} Cr",
-            "reason": "Aggregated Script Cost"
-        })
+    with stage(AGGREGATION):
+        overall_budget_breakdown = aggregate_budget(parsed_scenes)
 
     # Fallback for empty scripts to avoid crash
     if not parsed_scenes:
          parsed_scenes.append(Scene(id="0", header="NO SCENES DETECTED", summary="Please check script format.", location="UNKNOWN"))
-         first_scene_id = "0"
-         first_scene_header = "UNKNOWN"
-         next_scene_id = "0"
-    else:
-        first_scene_id = parsed_scenes[0].id
-        first_scene_header = parsed_scenes[0].header
-        next_scene_id = parsed_scenes[1].id if len(parsed_scenes) > 1 else first_scene_id
 
     # --- ENHANCED REASONING GENERATION ---
 
-    # 1. Detailed Continuity Error
-    continuity_description = (
-        f"**LOGIC FAILURE:** In {first_scene_header}, the Hero enters wearing **Ray-Ban Aviators**. "
-        f"However, in the subsequent shots (Scene {next_scene_id}), the script descriptions imply eye contact which would require him to NOT represent them, yet no action line specifies him removing them.\n\n"
-        f"**REAL LIFE IMPACT:** If shot out of order, you will have a 'Magic Sunglasses' blooper. Reshoots for this specific continuity usually cost ~₹10L per day for main talent."
-    )
-    
-    continuity_fix = (
-         f"**DIRECTOR'S FIX:** {sc1_fix} Specifically, add a 2-second action beat: 'HERO dramatically removes glasses' before the dialogue starts. This creates a clean cut point."
-    )
+    # 1. Continuity Errors from the scene-by-scene state tracker
+    if tracker is not None:
+        findings, cast = tracker.findings, tracker.cast
+    else:
+        with stage(RULES):
+            findings, cast = detect_continuity(iter_local_spans(script_text))
+    errors = [_continuity_error(finding, budget_mode) for finding in findings]
 
     # 2. Detailed Censor Risk (Dynamic)
     compliance_risks = []
-    text_upper = script_text.upper()
 
     # Rule 1: POCSO / Women Safety
-    if any(x in text_upper for x in ["MINOR", "CHILD", "MOLEST", "RAPE", "ABUSE", "GIRL"]):
+    for hit in hits.get(COMPLIANCE_POCSO, {}).values():
         compliance_risks.append(ComplianceRisk(
             category="Serious Crime / POCSO",
-            trigger_text="Depiction of crimes against women/children detected.",
+            trigger_text=_quote_hit(hit),
+            scene_id=hit.scene_id,
             legal_requirement="**STRICT PROHIBITION:** Under the POCSO Act and SC guidelines, graphic depiction is BANNED. \n1. Requires 'A' Certificate.\n2. Sensitive handling mandatory; no voyeuristic angles.",
             estimated_fine="Refusal of Certificate / Legal Action"
         ))
 
     # Rule 2: Smoking / Alcohol
-    if any(x in text_upper for x in ["SMOKE", "CIGARETTE", "ALCOHOL", "DRINK", "SCOTCH", "WHISKY"]):
+    for hit in hits.get(COMPLIANCE_COTPA, {}).values():
         compliance_risks.append(ComplianceRisk(
             category="Censor Board (COTPA)",
-            trigger_text="Smoking/Alcohol Consumption detected.",
+            trigger_text=_quote_hit(hit),
+            scene_id=hit.scene_id,
             legal_requirement="**MANDATORY:** \n1. Static 'Smoking Kills' warning.\n2. Anti-tobacco audiovisual spot.",
             estimated_fine="Cuts or 'A' Certificate"
         ))
 
     # Rule 3: Religion
-    if any(x in text_upper for x in ["TEMPLE", "GOD", "PRAY", "RELIGION", "HINDU", "MUSLIM", "CHRISTIAN"]):
+    for hit in hits.get(COMPLIANCE_RELIGION, {}).values():
         compliance_risks.append(ComplianceRisk(
             category="Religious Sentiments",
-            trigger_text="Religious references detected.",
+            trigger_text=_quote_hit(hit),
+            scene_id=hit.scene_id,
             legal_requirement="**CAUTION:** Ensure no scenes hurt religious sentiments (IPC Section 295A).",
             estimated_fine="Potential Lawsuits / Cuts"
         ))
     
     # Rule 4: Animals
-    if any(x in text_upper for x in ["HORSE", "DOG", "TIGER", "ANIMAL", "BIRD"]):
-         compliance_risks.append(ComplianceRisk(
+    for hit in hits.get(COMPLIANCE_AWBI, {}).values():
+        compliance_risks.append(ComplianceRisk(
             category="Animal Welfare Board (AWBI)",
-            trigger_text="Animal presence detected.",
+            trigger_text=_quote_hit(hit),
+            scene_id=hit.scene_id,
             legal_requirement="**NOC REQUIRED:** You usually cannot shoot with animals without pre-approval from AWBI.",
             estimated_fine="Shoot Stoppage"
         ))
 
     # Default if nothing specific found but input exists
-    if not compliance_risks and len(script_text) > 10:
-         compliance_risks.append(ComplianceRisk(
-            category="General Review",
-            trigger_text="No specific triggers found.",
-            legal_requirement="Proceed with standard CBFC guidelines.",
-            estimated_fine="None"
-        ))
+    if not compliance_risks and (script_text is None or len(script_text) > 10):
+        compliance_risks.append(general_review_risk())
 
-    # 3. Detailed Schedule Risk
+    # 3. Schedule Risks from the optimized shooting plan
     loc_ref = parsed_scenes[0].location if parsed_scenes else "UNKNOWN"
-    schedule_message = (
-        f"**LOGISTICAL NIGHTMARE:** You are attempting to shoot an EXT. DAY sequence at {loc_ref} which involves a 'Chase/Action' element.\n\n"
-        f"**REASONING:** Action sequences consume 3x more time than dialogue. You only have ~10 hours of usable daylight. With 300+ Junior Artists, reset time between takes will be 20 minutes. You will likely lose the light before completing coverage, forcing an expensive 'Day 2'."
-    )
+    schedule = optimize_schedule(parsed_scenes, cast, search_work=LOCAL_SCHEDULE_WORK)
 
     return AnalysisResult(
-        total_risk_score=85,
-        potential_savings="₹ 50 Lakhs",
+        total_risk_score=compute_risk_score(errors, compliance_risks, schedule.schedule_risks),
+        potential_savings=format_paise(sum(parse_paise(error.estimated_cost) for error in errors)),
         scenes=parsed_scenes,
-        errors=[
-            ContinuityError(
-                error_type=ErrorType.COSTUME_ERROR,
-                description=continuity_description,
-                severity=Severity.HIGH,
-                estimated_cost=sc1_cost,
-                estimated_delay="2 hours",
-                suggested_fix=continuity_fix,
-                reasoning="Objects (Sunglasses) cannot disappear between continuous shots without an establishing action.",
-                from_scene_id=first_scene_id,
-                to_scene_id=next_scene_id
-            )
-        ],
+        errors=errors,
         compliance_risks=compliance_risks,
-        schedule_risks=[
-            ScheduleRisk(
-                scene_id=first_scene_id,
-                risk_type="Daylight",
-                message=schedule_message,
-                severity=Severity.MEDIUM
-            )
-        ],
+        schedule_risks=schedule.schedule_risks,
         overall_budget_breakdown=overall_budget_breakdown,
         assets=[
             # 1. Location Assets
@@ -326,7 +317,7 @@ def mock_analyze_script(script_text: str, budget_mode: str = "Medium") -> Analys
                 asset_type="Vehicle",
                 name="Vintage Car / Jeep (Action Sequence)",
                 status=AssetStatus.PENDING_SIGNOFF
-            ) if "CHASE" in script_text.upper() or "CAR" in script_text.upper() or "JEEP" in script_text.upper() else 
+            ) if ASSET_VEHICLE in hits else
             ProductionAsset(
                 asset_type="Prop",
                 name="Specific Prop Requirement",
@@ -336,42 +327,421 @@ def mock_analyze_script(script_text: str, budget_mode: str = "Medium") -> Analys
             ProductionAsset(
                 asset_type="Music",
                 name="Background Score / Song Rights",
-                status=AssetStatus.PENDING_SIGNOFF if "SONG" in script_text.upper() or "DANCE" in script_text.upper() else AssetStatus.NOT_STARTED
+                status=AssetStatus.PENDING_SIGNOFF if ASSET_MUSIC in hits else AssetStatus.NOT_STARTED
             )
         ]
     )
 
-def analyze_script(script_text: str, api_key: str, budget_mode: str = "Medium") -> AnalysisResult:
-    client = OpenAI(api_key=api_key)
-    
-    # Inject Budget Mode into System Prompt
-    budget_instruction = ""
+def _continuity_error(finding: ContinuityFinding, budget_mode: str) -> ContinuityError:
+    """Prices a tracker finding with the budget mode's fix (unknown modes are treated as Medium)."""
+    mode_fix, fix_paise = CONTINUITY_FIXES.get(budget_mode, CONTINUITY_FIXES["Medium"])
+    return ContinuityError(
+        error_type=finding.error_type,
+        description=finding.description,
+        severity=finding.severity,
+        estimated_cost=format_paise(round(fix_paise * CONTINUITY_SEVERITY_SCALE[finding.severity])),
+        estimated_delay=CONTINUITY_DELAYS[finding.severity],
+        suggested_fix=f"**DIRECTOR'S FIX:** {mode_fix} {finding.fix}",
+        reasoning=finding.reasoning,
+        from_scene_id=finding.from_scene_id,
+        to_scene_id=finding.to_scene_id
+    )
+
+def _quote_hit(hit) -> str:
+    """The actual script line behind a rule hit, e.g. 'Scene 3: "Hero drinks a bottle of SCOTCH."'"""
+    return f'Scene {hit.scene_id}: "{hit.line}"'
+
+# --- LLM ENGINE ---
+LLM_MODEL = "gpt-4o-2024-08-06"
+LOCAL_ENGINE = "local-rules"  # Model name used for the local engine in cache keys
+
+# Map-reduce settings for long scripts
+DEFAULT_CHUNK_TOKENS = 6000  # Script tokens per request (system prompt not included)
+DEFAULT_OVERLAP_SCENES = 1  # Trailing scenes of the previous chunk re-sent as continuity context
+DEFAULT_CHUNK_WORKERS = 4  # Concurrent requests per analysis
+
+# Prompt caching: the provider caches the longest identical prefix of a request (response schema,
+# then system message), so the system message is kept byte-identical for every call and all
+# per-call text (budget mode, chunk instructions, script) goes in the user message after it.
+# The cache key routes every analysis to the same cache.
+LLM_PROMPT_CACHE_KEY = os.environ.get("OPENAI_PROMPT_CACHE_KEY", "continuityguard-analysis")
+# Budget reserved for the user-message instructions and continuity candidates
+PROMPT_OVERHEAD_TOKENS = 600
+CANDIDATE_TOKENS = 800
+# Expected completion size, reserved from the governor's token bucket until the real usage is known
+COMPLETION_TOKENS_PER_SCENE = 250
+
+SEVERITY_WEIGHTS = {Severity.LOW: 5, Severity.MEDIUM: 10, Severity.HIGH: 20, Severity.CRITICAL: 30}
+
+
+def analysis_cache_key(script_text: str, budget_mode: str, use_llm: bool, summarize_dialogue: bool = False) -> str:
+    """Cache key for an analysis by the LLM engine or the local engine."""
+    if use_llm:
+        # Dialogue summaries change what the model sees, so they get their own entries
+        prompt = TOLLYWOOD_SYSTEM_PROMPT + ("\n[dialogue summaries]" if summarize_dialogue else "")
+        return cache_key(script_text, budget_mode, LLM_MODEL, prompt)
+    # The local engine's "prompt" is its keyword rules and rate card (and demo seed)
+    return cache_key(script_text, budget_mode, LOCAL_ENGINE, f"{RULES_FINGERPRINT}:{RATE_CARD.fingerprint}:{LOCAL_ENGINE_SEED}")
+
+
+class ScriptChunk(NamedTuple):
+    scene_ids: List[str]  # Scenes this chunk is responsible for
+    context_ids: List[str]  # Overlap scenes, sent for continuity only
+    text: str  # Prompt text (context scenes + own scenes)
+    candidates: str = ""  # Local continuity findings in this chunk's scenes, for the LLM to verify
+    raw_tokens: int = 0  # Tokens of these scenes as written
+    tokens: int = 0  # Tokens of `text` as sent (compacted)
+
+
+def _scene_block(scene_id: str, text: str, context: bool = False) -> str:
+    label = f"[SCENE {scene_id} - CONTEXT ONLY]" if context else f"[SCENE {scene_id}]"
+    return f"{label}\n{text}"
+
+def _block_tokens(scene_id: str, text: str, context: bool = False) -> int:
+    # Labelled block plus the blank line that joins it to the next one
+    return count_tokens(_scene_block(scene_id, text, context)) + 1
+
+def _context_blocks(context: List[Tuple[str, str, int, int]], room: int) -> List[Tuple[str, str]]:
+    """
+    (scene id, text) of the CONTEXT ONLY scenes that fit in `room` tokens, latest scene first
+    in line; a scene that does not fit whole is cut down (header kept), earlier ones dropped.
+    """
+    kept = []
+    for scene_id, block_text, _, _ in reversed(context):
+        text = fit_to_budget(block_text, room - _block_tokens(scene_id, "", context=True))
+        tokens = _block_tokens(scene_id, text, context=True)
+        if tokens > room:
+            break
+        kept.insert(0, (scene_id, text))
+        room -= tokens
+    return kept
+
+def chunk_script(
+    script_text: str,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_scenes: int = DEFAULT_OVERLAP_SCENES,
+    summarize_dialogue: bool = False
+) -> List[ScriptChunk]:
+    """
+    Batches compacted scenes (see compaction.py) into token-bounded chunks.
+    Each chunk after the first also carries the last `overlap_scenes` scenes of the previous chunk,
+    marked CONTEXT ONLY, so the LLM can still catch continuity errors across the chunk boundary.
+    Context scenes count towards `max_tokens` like the chunk's own scenes (cut down or dropped
+    when they do not fit). A single scene larger than `max_tokens` gets a chunk of its own, cut down to fit.
+    """
+    spans = [(str(i), span) for i, span in enumerate(iter_scenes(script_text), start=1)]
+    if not spans:
+        text = fit_to_budget(compact_scene(script_text, summarize_dialogue), max_tokens)
+        return [ScriptChunk(scene_ids=[], context_ids=[], text=text, raw_tokens=count_tokens(script_text), tokens=count_tokens(text))]
+
+    # (scene id, prompt text, raw tokens, prompt tokens), tokens of the labelled block
+    blocks = []
+    for scene_id, span in spans:
+        text = fit_to_budget(compact_scene(span.body, summarize_dialogue), max_tokens - _block_tokens(scene_id, ""))
+        # Raw = the scene as it would be sent uncompacted
+        blocks.append((scene_id, text, count_tokens(_scene_block(scene_id, span.body.strip())), _block_tokens(scene_id, text)))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for block in blocks:
+        tokens = block[3]
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            # The next chunk opens with the tail of this one as context
+            tail = current[-overlap_scenes:] if overlap_scenes > 0 else []
+            current = []
+            current_tokens = sum(_block_tokens(scene_id, text, context=True) for scene_id, text, _, _ in tail)
+        current.append(block)
+        current_tokens += tokens
+    chunks.append(current)
+
+    # Local continuity pre-pass over the whole script, so cross-chunk state is kept
+    findings, _ = detect_continuity(spans)
+    result = []
+    previous = []
+    raw_by_id = {block[0]: block[2] for block in blocks}
+    for own in chunks:
+        tail = previous[-overlap_scenes:] if overlap_scenes > 0 else []
+        context = _context_blocks(tail, max_tokens - sum(block[3] for block in own))
+        own_ids = {block[0] for block in own}
+        text = "\n\n".join(
+            [_scene_block(scene_id, block_text, context=True) for scene_id, block_text in context]
+            + [_scene_block(scene_id, block_text) for scene_id, block_text, _, _ in own]
+        )
+        candidates = format_candidates([f for f in findings if f.to_scene_id in own_ids])
+        result.append(ScriptChunk(
+            scene_ids=[block[0] for block in own],
+            context_ids=[scene_id for scene_id, _ in context],
+            text=text,
+            candidates=fit_to_budget(candidates, CANDIDATE_TOKENS) if candidates else "",
+            raw_tokens=sum(raw_by_id[scene_id] for scene_id, _ in context) + sum(block[2] for block in own),
+            tokens=count_tokens(text)
+        ))
+        previous = own
+    return result
+
+def script_token_limit(max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS, budget: int = PROMPT_TOKEN_BUDGET) -> int:
+    """Script tokens per chunk: the chunk size, lowered so a whole request fits the per-request token budget."""
+    if budget <= 0:
+        return max_chunk_tokens
+    room = budget - count_tokens(TOLLYWOOD_SYSTEM_PROMPT) - PROMPT_OVERHEAD_TOKENS - CANDIDATE_TOKENS
+    return max(1, min(max_chunk_tokens, room))
+
+def compaction_report(chunks: List[ScriptChunk]) -> CompactionReport:
+    return CompactionReport(
+        tokenizer=tokenizer_name(),
+        raw_tokens=sum(chunk.raw_tokens for chunk in chunks),
+        prompt_tokens=sum(chunk.tokens for chunk in chunks),
+        chunks=len(chunks),
+        budget=PROMPT_TOKEN_BUDGET or None
+    )
+
+def _record_compaction(chunks: List[ScriptChunk]) -> PromptCompaction:
+    """Counts the chunks' tokens in the metrics; returns the report for the response."""
+    report = compaction_report(chunks)
+    PROMPT_TOKENS.inc("raw", amount=report.raw_tokens)
+    PROMPT_TOKENS.inc("sent", amount=report.prompt_tokens)
+    return PromptCompaction(**report.as_dict())
+
+def compute_risk_score(errors: List[ContinuityError], compliance_risks: List[ComplianceRisk], schedule_risks: List[ScheduleRisk]) -> int:
+    """Severity-weighted score over unique findings, capped at 100. Compliance counts once per category."""
+    risk_score = sum(SEVERITY_WEIGHTS.get(e.severity, 0) for e in errors)
+    risk_score += sum(SEVERITY_WEIGHTS.get(r.severity, 0) for r in schedule_risks)
+    risk_score += 5 * len({risk.category for risk in compliance_risks})
+    return min(100, risk_score)
+
+def merge_results(partials: List[AnalysisResult], chunks: List[ScriptChunk]) -> AnalysisResult:
+    """
+    Reduce step: merges per-chunk results into one AnalysisResult.
+    Scenes are concatenated in script order (context-only scenes dropped),
+    errors/risks/assets de-duplicated, and the budget and risk score recomputed over the whole script.
+    """
+    with stage(AGGREGATION):
+        scenes = []
+        errors = {}
+        compliance_risks = {}
+        schedule_risks = {}
+        assets = {}
+        savings = 0
+
+        for partial, chunk in zip(partials, chunks):
+            context_ids = set(chunk.context_ids)
+            scenes.extend(scene for scene in partial.scenes if scene.id not in context_ids)
+            for error in partial.errors:
+                errors.setdefault((error.error_type, error.from_scene_id, error.to_scene_id), error)
+            for risk in partial.compliance_risks:
+                compliance_risks.setdefault((risk.category, risk.trigger_text), risk)
+            for risk in partial.schedule_risks:
+                schedule_risks.setdefault((risk.scene_id, risk.risk_type), risk)
+            for asset in partial.assets:
+                assets.setdefault((asset.asset_type, asset.name.lower()), asset)
+            savings += parse_paise(partial.potential_savings)
+
+        return AnalysisResult(
+            total_risk_score=compute_risk_score(list(errors.values()), list(compliance_risks.values()), list(schedule_risks.values())),
+            potential_savings=format_paise(savings),
+            scenes=scenes,
+            errors=list(errors.values()),
+            compliance_risks=list(compliance_risks.values()),
+            schedule_risks=list(schedule_risks.values()),
+            assets=list(assets.values()),
+            overall_budget_breakdown=aggregate_budget(scenes)
+        )
+
+def budget_instruction(budget_mode: str) -> str:
+    # Budget Mode goes in the user message: the system message stays identical (and cacheable) across modes
     if budget_mode == "Low":
-        budget_instruction = "SUGGEST LOW BUDGET FIXES (Rewrites, Dialogues). Avoid Reshoots."
+        return "SUGGEST LOW BUDGET FIXES (Rewrites, Dialogues). Avoid Reshoots."
     elif budget_mode == "High":
-        budget_instruction = "SUGGEST HIGH BUDGET FIXES (VFX, Reshoots, CGI). Quality is priority."
-    
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4o-2024-08-06",
-        messages=[
-            {"role": "system", "content": TOLLYWOOD_SYSTEM_PROMPT + "\n\n" + budget_instruction},
-            {"role": "user", "content": f"Analyze this script segment:\n\n{script_text}"},
-        ],
-        response_format=AnalysisResult,
+        return "SUGGEST HIGH BUDGET FIXES (VFX, Reshoots, CGI). Quality is priority."
+    return ""
+
+def _chunk_messages(budget_mode: str, chunk: ScriptChunk, chunk_index: int, chunk_count: int) -> List[dict]:
+    user_content = f"Analyze this script segment:\n\n{chunk.text}"
+    if chunk.candidates:
+        user_content += (
+            "\n\nLOCAL CONTINUITY CANDIDATES (rule-based pre-pass; confirm or reject each, "
+            f"only add new errors you are certain of):\n{chunk.candidates}"
+        )
+    if chunk_count > 1:
+        user_content = (
+            f"This is part {chunk_index + 1} of {chunk_count} of a longer script. "
+            f"Report only scenes {chunk.scene_ids[0]} to {chunk.scene_ids[-1]}, keeping their SCENE numbers as ids. "
+            f"Scenes marked CONTEXT ONLY are from the previous part: use them to check continuity, but do not list them as scenes.\n\n"
+            + user_content
+        )
+    instruction = budget_instruction(budget_mode)
+    if instruction:
+        user_content = f"{instruction}\n\n{user_content}"
+    return [
+        {"role": "system", "content": TOLLYWOOD_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+
+def _parse_analysis(completion) -> AnalysisResult:
+    """Validates the LLM output; server-side fields start empty whatever the model sent."""
+    analysis = parse_completion(completion, LLMAnalysisResult)
+    return AnalysisResult.model_construct(analysis.model_fields_set, **dict(analysis))
+
+def _analyze_chunk(client: "OpenAI", budget_mode: str, chunk: ScriptChunk, chunk_index: int, chunk_count: int) -> AnalysisResult:
+    start = time.perf_counter()
+    try:
+        completion = client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=_chunk_messages(budget_mode, chunk, chunk_index, chunk_count),
+            response_format=response_format_for(LLMAnalysisResult),
+            prompt_cache_key=LLM_PROMPT_CACHE_KEY,
+        )
+    except Exception:
+        record_llm_call(time.perf_counter() - start)
+        raise
+    record_llm_call(time.perf_counter() - start, completion)
+
+    with stage(PARSE):
+        return _parse_analysis(completion)
+
+def analyze_script(
+    script_text: str,
+    api_key: str,
+    budget_mode: str = "Medium",
+    max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_scenes: int = DEFAULT_OVERLAP_SCENES,
+    max_workers: int = DEFAULT_CHUNK_WORKERS,
+    summarize_dialogue: bool = False
+) -> AnalysisResult:
+    """
+    LLM analysis. Short scripts go out as a single request.
+    Long scripts are split into token-bounded chunks (see chunk_script), sent concurrently
+    on a bounded worker pool, and merged back with merge_results.
+    Scenes are compacted first, and chunks sized to the per-request token budget (PROMPT_TOKEN_BUDGET).
+    Set OPENAI_BASE_URL to point the client at a local fake server (see fake_openai.py).
+    """
+    client = get_sync_client(api_key)
+
+    chunks = chunk_script(script_text, script_token_limit(max_chunk_tokens), overlap_scenes, summarize_dialogue)
+    compaction = _record_compaction(chunks)
+    if len(chunks) == 1:
+        result = _analyze_chunk(client, budget_mode, chunks[0], 0, 1)
+        result.prompt_compaction = compaction
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        partials = list(pool.map(
+            lambda indexed: _analyze_chunk(client, budget_mode, indexed[1], indexed[0], len(chunks)),
+            enumerate(chunks)
+        ))
+
+    result = merge_results(partials, chunks)
+    result.prompt_compaction = compaction
+    return result
+
+async def _analyze_chunk_async(
+    llm: LLMPool, budget_mode: str, chunk: ScriptChunk, chunk_index: int, chunk_count: int, lane: str = INTERACTIVE
+) -> AnalysisResult:
+    messages = _chunk_messages(budget_mode, chunk, chunk_index, chunk_count)
+    # Admitted before taking a semaphore slot, so queued batch calls never hold slots interactive ones need
+    reservation = await llm.governor.acquire(
+        count_tokens(messages[0]["content"]) + count_tokens(messages[1]["content"]),
+        COMPLETION_TOKENS_PER_SCENE * max(1, len(chunk.scene_ids)),
+        lane
     )
+    completion = None
+    try:
+        async with llm.semaphore:
+            # Timed inside the semaphore: queueing for a slot is not request latency
+            start = time.perf_counter()
+            try:
+                completion = await llm.client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=messages,
+                    response_format=response_format_for(LLMAnalysisResult),
+                    prompt_cache_key=LLM_PROMPT_CACHE_KEY,
+                )
+            except Exception:
+                record_llm_call(time.perf_counter() - start)
+                raise
+            record_llm_call(time.perf_counter() - start, completion)
+    finally:
+        llm.governor.release(reservation, getattr(completion, "usage", None))
+
+    with stage(PARSE):
+        return _parse_analysis(completion)
+
+async def iter_chunk_results_async(
+    script_text: str,
+    llm: LLMPool,
+    budget_mode: str = "Medium",
+    max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_scenes: int = DEFAULT_OVERLAP_SCENES,
+    summarize_dialogue: bool = False,
+    lane: str = INTERACTIVE
+) -> AsyncIterator[Tuple[int, int, ScriptChunk, AnalysisResult]]:
+    """
+    Sends every chunk concurrently and yields (chunk index, chunk count, chunk, partial result)
+    in completion order, so callers can use each part as soon as it lands.
+    `lane` is the governor lane the calls queue in (see governor.py).
+    """
+    # Segmenting, compacting and counting tokens is CPU work: keep it off the event loop
+    chunks = await asyncio.to_thread(
+        chunk_script, script_text, script_token_limit(max_chunk_tokens), overlap_scenes, summarize_dialogue
+    )
+    _record_compaction(chunks)
 
-    return completion.choices[0].message.parsed
+    async def run(i: int, chunk: ScriptChunk):
+        return i, len(chunks), chunk, await _analyze_chunk_async(llm, budget_mode, chunk, i, len(chunks), lane)
 
-def generate_storyboard(prompt: str, api_key: str) -> str:
+    tasks = [asyncio.ensure_future(run(i, chunk)) for i, chunk in enumerate(chunks)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Consumer stopped early (or a chunk failed): don't leave requests running
+        for task in tasks:
+            task.cancel()
+
+async def analyze_script_async(
+    script_text: str,
+    llm: LLMPool,
+    budget_mode: str = "Medium",
+    max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_scenes: int = DEFAULT_OVERLAP_SCENES,
+    on_chunk: Optional[Callable[[ScriptChunk], None]] = None,
+    summarize_dialogue: bool = False,
+    lane: str = INTERACTIVE
+) -> AnalysisResult:
+    """
+    Async twin of analyze_script on the shared LLMPool client.
+    Chunks run concurrently; the pool's semaphore bounds in-flight requests across all analyses
+    and its governor applies the rate limits, lanes and spend ceiling.
+    `on_chunk` is called with each chunk as its result lands (progress reporting).
+    The tokens saved by compaction are reported in `prompt_compaction`.
+    """
+    results = []
+    async for item in iter_chunk_results_async(script_text, llm, budget_mode, max_chunk_tokens, overlap_scenes, summarize_dialogue, lane):
+        results.append(item)
+        if on_chunk is not None:
+            on_chunk(item[2])
+    results.sort(key=lambda item: item[0])
+    chunks = [item[2] for item in results]
+    result = results[0][3] if len(results) == 1 else merge_results([item[3] for item in results], chunks)
+    result.prompt_compaction = PromptCompaction(**compaction_report(chunks).as_dict())
+    return result
+
+def storyboard_prompt(scene_desc: str, style: str = "Film Noir") -> str:
+    return f"A rough black and white storyboard sketch of: {scene_desc}. {style} style, cinematic lighting, pencil sketch texture."
+
+def generate_storyboard(prompt: str, api_key: str, style: str = "Film Noir") -> str:
     """
     Generates a storyboard image using DALL-E 3.
+    (The API serves boards through storyboard.py, which adds the disk store and rate limits.)
     """
-    client = OpenAI(api_key=api_key)
+    client = get_sync_client(api_key)
     
     try:
         response = client.images.generate(
             model="dall-e-3",
-            prompt=f"A rough black and white storyboard sketch of: {prompt}. Film noir style, cinematic lighting, pencil sketch texture.",
+            prompt=storyboard_prompt(prompt, style),
             size="1024x1024",
             quality="standard",
             n=1,
@@ -387,8 +757,47 @@ def mock_generate_storyboard(prompt: str) -> str:
     """
     # Return a placeholder that looks like a storyboard sketch
     # Use Pollinations.ai for free, prompt-based AI generation (No Key Required for Demo)
-    import urllib.parse
     # SIMPLIFIED CINEMATIC PROMPT - Removing complex jargon to avoid model confusion
     base_prompt = f"cinematic shot of {prompt}, indian film style, detailed, realistic, 8k"
     encoded_prompt = urllib.parse.quote(base_prompt)
     return f"https://image.pollinations.ai/prompt/{encoded_prompt}"
+
+# --- WARM-UP ---
+# A tiny script that walks every local-engine stage (segmentation, rules, continuity, schedule,
+# budget) so a fresh instance has run each code path once before real traffic arrives.
+WARMUP_SCRIPT = """INT. TEMPLE - DAY
+
+HERO lights a cigarette near the elephant. He holds the GUN.
+
+HERO
+We shoot at dawn.
+
+EXT. HIGHWAY - NIGHT
+
+Twenty cars chase the JEEP. HERO is shot and dies.
+
+INT. TEMPLE - DAY
+
+HERO walks in, the GUN in his hand.
+"""
+
+def warm_up(llm: Optional[LLMPool] = None) -> Dict[str, float]:
+    """
+    Primes a cold instance: runs the local engine and serialization once, loads the tokenizer
+    and, with an `llm`, imports the SDK and builds the client and response schema.
+    Returns milliseconds per step.
+    """
+    timings = {}
+
+    def step(name: str, fn: Callable[[], object]) -> object:
+        start = time.perf_counter()
+        value = fn()
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        return value
+
+    result = step("local_engine", lambda: mock_analyze_script(WARMUP_SCRIPT))
+    step("serialization", lambda: AnalysisResult.model_validate_json(result.model_dump_json()))
+    step("tokenizer", lambda: count_tokens(compact_scene(WARMUP_SCRIPT)))
+    if llm is not None:
+        step("llm_client", lambda: (llm.client, response_format_for(LLMAnalysisResult)))
+    return timings
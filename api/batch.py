@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from schemas import AnalysisResult, BatchItemResult, BatchResponse, BatchScript, ExpenseCategory, SlateSummary
+from analyzer import aggregate_budget, analysis_cache_key, analyze_script_async, mock_analyze_script
+from llm import LLMPool
+from governor import BATCH
+from metrics import LLM_FALLBACKS
+
+# Scripts analyzed concurrently by the LLM engine within one batch
+# (on top of the LLMPool's global in-flight request limit)
+BATCH_LLM_CONCURRENCY = int(os.environ.get("BATCH_LLM_CONCURRENCY", 4))
+# Worker processes for the local engine; 0 runs it on threads in-process instead (serverless
+# hosts without /dev/shm can't start a process pool, and the batch then falls back on its own)
+BATCH_PROCESS_WORKERS = int(os.environ.get("BATCH_PROCESS_WORKERS", os.cpu_count() or 2))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_disabled = BATCH_PROCESS_WORKERS <= 0
+
+# What a pool that can't start (or died) raises: no sem_open / shared memory, fork/spawn refused
+POOL_ERRORS = (BrokenProcessPool, OSError, ImportError, NotImplementedError)
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Process pool for the CPU-bound local engine, created on first batch use. None when unavailable."""
+    global _process_pool
+    if _process_pool is None and not _process_pool_disabled:
+        try:
+            _process_pool = ProcessPoolExecutor(max_workers=BATCH_PROCESS_WORKERS)
+        except POOL_ERRORS as e:
+            disable_process_pool(e)
+    return _process_pool
+
+
+def disable_process_pool(error: Exception) -> None:
+    """Local batch analyses run in-process from now on."""
+    global _process_pool_disabled
+    print(f"Batch Process Pool Failed: {error}. Running the local engine in-process.")
+    _process_pool_disabled = True
+    shutdown_process_pool()
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def _timed_local_analysis(script_text: str, budget_mode: str) -> Tuple[AnalysisResult, float]:
+    # Runs inside a worker (process or thread), so the timing excludes queueing for it
+    start = time.perf_counter()
+    result = mock_analyze_script(script_text, budget_mode)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize_slate(items: List[BatchItemResult]) -> SlateSummary:
+    ok = [item for item in items if item.result is not None]
+    breakdown = aggregate_budget([scene for item in ok for scene in item.result.scenes])
+    highest = max(ok, key=lambda item: item.result.total_risk_score, default=None)
+    return SlateSummary(
+        scripts_ok=len(ok),
+        scripts_failed=len(items) - len(ok),
+        total_scenes=sum(len(item.result.scenes) for item in ok),
+        total_budget=ExpenseCategory(
+            category="Total",
+            amount_paise=sum(e.amount_paise for e in breakdown),
+            reason="Aggregated Slate Cost"
+        ),
+        budget_breakdown=[e.model_copy(update={"reason": "Aggregated Slate Cost"}) for e in breakdown],
+        average_risk_score=round(sum(item.result.total_risk_score for item in ok) / len(ok), 2) if ok else 0.0,
+        max_risk_score=highest.result.total_risk_score if highest else 0,
+        highest_risk_script_id=highest.script_id if highest else None,
+    )
+
+
+async def run_batch(scripts: List[BatchScript], llm: Optional[LLMPool], cache=None) -> BatchResponse:
+    """
+    Analyzes every script concurrently: the local engine fans out over a process pool (threads
+    when there is none), the LLM engine over a bounded set of async tasks.
+    One script failing never aborts the batch.
+    """
+    batch_start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def run_local(item: BatchScript) -> Tuple[AnalysisResult, float]:
+        pool = get_process_pool()
+        if pool is not None:
+            try:
+                return await loop.run_in_executor(pool, _timed_local_analysis, item.script_text, item.budget_mode)
+            except POOL_ERRORS as e:
+                if _process_pool is pool:  # First item to hit it
+                    disable_process_pool(e)
+        return await asyncio.to_thread(_timed_local_analysis, item.script_text, item.budget_mode)
+
+    async def run_one(item: BatchScript) -> BatchItemResult:
+        start = time.perf_counter()
+        key = analysis_cache_key(item.script_text, item.budget_mode, llm is not None)
+
+        def done(engine: str, result: AnalysisResult, elapsed_ms: Optional[float] = None) -> BatchItemResult:
+            return BatchItemResult(
+                script_id=item.script_id,
+                status="ok",
+                engine=engine,
+                elapsed_ms=round(elapsed_ms if elapsed_ms is not None else (time.perf_counter() - start) * 1000, 2),
+                result=result
+            )
+
+        try:
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                return done("cache", cached)
+
+            if llm is None:
+                result, elapsed_ms = await run_local(item)
+                engine = "local"
+            else:
+                try:
+                    async with llm_slots:
+                        # Queued behind interactive analyses by the governor
+                        result = await analyze_script_async(item.script_text, llm, item.budget_mode, lane=BATCH)
+                    elapsed_ms, engine = None, "llm"
+                except Exception as e:
+                    print(f"OpenAI Analysis Failed for {item.script_id}: {e}. Falling back to internal engine.")
+                    LLM_FALLBACKS.inc("batch")
+                    result, _ = await run_local(item)
+                    return done("local-fallback", result)
+
+            if cache is not None:
+                cache.set(key, result)
+            return done(engine, result, elapsed_ms)
+
+        except Exception as e:
+            print(f"Batch item {item.script_id} Failed: {e}")
+            return BatchItemResult(
+                script_id=item.script_id,
+                status="error",
+                elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+                error=str(e) or type(e).__name__
+            )
+
+    items = await asyncio.gather(*(run_one(item) for item in scripts))
+    return BatchResponse(
+        results=list(items),
+        summary=summarize_slate(list(items)),
+        elapsed_ms=round((time.perf_counter() - batch_start) * 1000, 2)
+    )
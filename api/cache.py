@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from schemas import AnalysisResult
+from metrics import CACHE_LOOKUPS
+
+# Bump when engine output changes in a way old cache entries should not survive (segmenter,
+# continuity tracker, merge logic). Changes to the AnalysisResult schema and the local engine's
+# rules and rate card invalidate entries on their own (see result_schema_hash, analysis_cache_key).
+# Also scopes project snapshots and the scene index.
+# 2: per-scene local compliance risks, tracker and segmenter changes
+ENGINE_VERSION = "2"
+
+
+def normalize_script(script_text: str) -> str:
+    """
+    Canonical form of a script for hashing: unified line endings, no trailing
+    whitespace, no leading/trailing blank lines. Re-pasting the same draft hits the cache.
+    """
+    lines = script_text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def result_schema_hash() -> str:
+    """Fingerprint of the AnalysisResult JSON schema (fields, types, descriptions), built on first use."""
+    return sha256(json.dumps(AnalysisResult.model_json_schema(), sort_keys=True))[:16]
+
+
+def cache_key(script_text: str, budget_mode: str, model: str, system_prompt: str) -> str:
+    """
+    Content address of an analysis.
+    Any change to the script, budget mode, model or system prompt produces a new key,
+    so a prompt edit invalidates old entries without an explicit flush. So does a change to
+    the result schema: entries stored by an older release are never served after an upgrade.
+    """
+    parts = [ENGINE_VERSION, result_schema_hash(), model, sha256(system_prompt), budget_mode, sha256(normalize_script(script_text))]
+    return sha256(json.dumps(parts))
+
+
+class MemoryCacheBackend:
+    """In-process LRU with optional TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache in a single SQLite file, LRU by last access, with optional TTL."""
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, stored_at = row
+            if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if self.ttl_seconds is not None:
+                self._conn.execute("DELETE FROM analysis_cache WHERE stored_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                " SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+
+class AnalysisCache:
+    """
+    Cache of AnalysisResult objects in front of the analysis engines.
+    Backends store serialized JSON strings, so any backend with get/set/clear/__len__ plugs in.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[AnalysisResult]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc("miss")
+            return None
+        self.hits += 1
+        CACHE_LOOKUPS.inc("hit")
+        return AnalysisResult.model_validate_json(value)
+
+    def set(self, key: str, result: AnalysisResult) -> None:
+        self.backend.set(key, result.model_dump_json())
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def cache_from_env() -> Optional[AnalysisCache]:
+    """
+    ANALYSIS_CACHE: "memory" (default), "sqlite" or "off"
+    ANALYSIS_CACHE_PATH: SQLite file (default: temp dir, the only writable dir on serverless)
+    ANALYSIS_CACHE_MAX_ENTRIES / ANALYSIS_CACHE_TTL: size and age (seconds) limits
+    """
+    kind = os.environ.get("ANALYSIS_CACHE", "memory").lower()
+    ttl = os.environ.get("ANALYSIS_CACHE_TTL")
+    ttl_seconds = float(ttl) if ttl else None
+
+    if kind == "off":
+        return None
+    if kind == "sqlite":
+        path = os.environ.get("ANALYSIS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "continuityguard_cache.db"))
+        max_entries = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 5000))
+        return AnalysisCache(SQLiteCacheBackend(path, max_entries, ttl_seconds))
+    max_entries = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 256))
+    return AnalysisCache(MemoryCacheBackend(max_entries, ttl_seconds))
@@ -0,0 +1,149 @@
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from schemas import AnalysisResult
+from money import parse_paise
+
+try:
+    import msgpack
+except ImportError:  # In requirements; a host without it only offers the columnar JSON form
+    msgpack = None
+
+# --- COLUMNAR EXPORT ---
+# Dashboards mostly need numbers per scene / expense line, not the markdown prose. The columnar
+# form sends one array per field (repeated strings like categories dictionary-encoded as small
+# ints), without descriptions and fixes. Negotiated with the Accept header:
+#   application/vnd.continuityguard.columnar+msgpack   (only offered when msgpack is installed)
+#   application/vnd.continuityguard.columnar+json
+# Anything else gets the regular AnalysisResult JSON.
+
+COLUMNAR_FORMAT_VERSION = 1
+COLUMNAR_MSGPACK = "application/vnd.continuityguard.columnar+msgpack"
+COLUMNAR_JSON = "application/vnd.continuityguard.columnar+json"
+MSGPACK_ALIASES = ("application/msgpack", "application/x-msgpack")
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Columnar media type to answer with, or None for the regular JSON response."""
+    offers = []
+    for position, part in enumerate((accept or "").split(",")):
+        media_type, _, params = part.partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            offers.append((-quality, position, media_type))
+    for _, _, media_type in sorted(offers):
+        if media_type in (COLUMNAR_MSGPACK, *MSGPACK_ALIASES) and msgpack is not None:
+            return COLUMNAR_MSGPACK
+        if media_type == COLUMNAR_JSON:
+            return COLUMNAR_JSON
+        if media_type in ("application/json", "*/*", "application/*"):
+            return None
+    return None
+
+
+class DictionaryColumn:
+    """Repeated strings as small int codes plus the list of distinct values."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.codes: List[int] = []
+        self._index: Dict[Optional[str], int] = {}
+
+    def append(self, value: Optional[str]) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def encode(self) -> dict:
+        return {"dict": self.values, "codes": self.codes}
+
+
+def table(**columns) -> dict:
+    """{"rows": n, "columns": {name: values}}; every column has n entries."""
+    rows = len(next(iter(columns.values()))) if columns else 0
+    return {
+        "rows": rows,
+        "columns": {name: c.encode() if isinstance(c, DictionaryColumn) else c for name, c in columns.items()},
+    }
+
+
+def result_tables(items: Iterable[Tuple[str, AnalysisResult]]) -> dict:
+    """
+    Columnar tables for one or more analyses. `script` columns index into the `scripts` list,
+    expense rows point at their scene by `scene_row`.
+    """
+    scripts = []
+    scene = {"script": [], "id": [], "header": [], "location": DictionaryColumn(), "time": DictionaryColumn(), "total_paise": []}
+    expense = {"scene_row": [], "category": DictionaryColumn(), "amount_paise": []}
+    error = {"script": [], "error_type": DictionaryColumn(), "severity": DictionaryColumn(),
+             "from_scene_id": [], "to_scene_id": [], "cost_paise": []}
+    compliance = {"script": [], "category": DictionaryColumn(), "scene_id": []}
+    schedule = {"script": [], "scene_id": [], "risk_type": DictionaryColumn(), "severity": DictionaryColumn()}
+    totals = {"script": [], "total_risk_score": [], "potential_savings_paise": [], "total_paise": []}
+
+    for script_index, (script_id, result) in enumerate(items):
+        scripts.append(script_id)
+        for s in result.scenes:
+            row = len(scene["id"])
+            scene["script"].append(script_index)
+            scene["id"].append(s.id)
+            scene["header"].append(s.header)
+            scene["location"].append(s.location)
+            scene["time"].append(s.time)
+            scene["total_paise"].append(s.total_paise)
+            for e in s.expense_breakdown:
+                expense["scene_row"].append(row)
+                expense["category"].append(e.category)
+                expense["amount_paise"].append(e.amount_paise)
+        for e in result.errors:
+            error["script"].append(script_index)
+            error["error_type"].append(e.error_type.value)
+            error["severity"].append(e.severity.value)
+            error["from_scene_id"].append(e.from_scene_id)
+            error["to_scene_id"].append(e.to_scene_id)
+            error["cost_paise"].append(parse_paise(e.estimated_cost))
+        for r in result.compliance_risks:
+            compliance["script"].append(script_index)
+            compliance["category"].append(r.category)
+            compliance["scene_id"].append(r.scene_id)
+        for r in result.schedule_risks:
+            schedule["script"].append(script_index)
+            schedule["scene_id"].append(r.scene_id)
+            schedule["risk_type"].append(r.risk_type)
+            schedule["severity"].append(r.severity.value)
+        totals["script"].append(script_index)
+        totals["total_risk_score"].append(result.total_risk_score)
+        totals["potential_savings_paise"].append(parse_paise(result.potential_savings))
+        totals["total_paise"].append(sum(s.total_paise for s in result.scenes))
+
+    return {
+        "version": COLUMNAR_FORMAT_VERSION,
+        "scripts": scripts,
+        "tables": {
+            "totals": table(**totals),
+            "scenes": table(**scene),
+            "expenses": table(**expense),
+            "errors": table(**error),
+            "compliance": table(**compliance),
+            "schedule_risks": table(**schedule),
+        },
+    }
+
+
+def encode(tables: dict, media_type: str) -> bytes:
+    if media_type == COLUMNAR_MSGPACK:
+        return msgpack.packb(tables, use_bin_type=True)
+    return json.dumps(tables, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
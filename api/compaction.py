@@ -0,0 +1,185 @@
+import os
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+from segmenter import NOT_CHARACTERS
+
+# --- PROMPT COMPACTION ---
+# Scripts are written for paper: indentation, blank lines, page numbers, (CONTINUED) markers,
+# transitions and a cue line per speech. None of that helps the model, and every token of it
+# is paid for and waited on. compact_scene() rewrites a scene body into a dense form
+# ("HERO: line") before it goes into a prompt; the local engine keeps working on the raw text.
+
+TOKENIZER_MODEL = "gpt-4o"
+# Whole request (system prompt + instructions + script). 0 disables the budget.
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 12000))
+# Opt-in dialogue summaries: speeches in a row before a run is collapsed
+DIALOGUE_SUMMARY_MIN_SPEECHES = 6
+
+PAGE_FURNITURE_PATTERN = re.compile(
+    r"^(?:\(?(?:CONTINUED|MORE|CONT'D)\)?:?|(?:PAGE\s+)?\d+(?:\s*(?:/|OF)\s*\d+)?\.?|\d+\s*\.?\s*\(CONTINUED\))$",
+    re.IGNORECASE
+)
+TRANSITION_PATTERN = re.compile(
+    r"^(?:FADE (?:IN|OUT|TO BLACK)|(?:SMASH |MATCH |JUMP |HARD )?CUT (?:BACK )?TO|DISSOLVE TO|WIPE TO|BACK TO)\b[^a-z]*$"
+)
+# A cue line: all-caps name, optional extension ("(V.O.)", "(CONT'D)")
+CUE_LINE_PATTERN = re.compile(r"^([A-Z][A-Z0-9 .'\-]{0,29}?)\s*(?:\([^)]*\))?$")
+PARENTHETICAL_PATTERN = re.compile(r"^\([^)]*\)$")
+WHITESPACE_PATTERN = re.compile(r"[ \t\u00a0]+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Imported on first use (see load_tokenizer), like the openai SDK: keeps it off the import path
+    try:
+        import tiktoken
+    except ImportError:  # Without it, tokens are estimated at ~4 characters each
+        return None
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception as e:  # The BPE file is downloaded on first use; offline hosts fall back
+        print(f"Tokenizer unavailable: {e}. Estimating token counts.")
+        return None
+
+
+def tokenizer_name() -> str:
+    encoding = _encoding()
+    return f"tiktoken:{encoding.name}" if encoding is not None else "estimate:4-chars"
+
+
+def load_tokenizer() -> str:
+    """
+    Loads the encoding (tiktoken fetches its BPE file into the temp dir the first time);
+    called at startup so no request pays for it. Returns the tokenizer name.
+    """
+    return tokenizer_name()
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        # ~4 characters per token for English screenplay text
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _speeches(lines: List[str]) -> List[object]:
+    """
+    Groups a scene's stripped lines into action lines (str) and speeches ([speaker, text]).
+    Consecutive speeches by the same speaker (CONT'D across a page break) are merged.
+    """
+    items: List[object] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        cue = CUE_LINE_PATTERN.match(line) if line else None
+        starts_block = i == 0 or not lines[i - 1]
+        if cue and starts_block and cue.group(1) not in NOT_CHARACTERS and i + 1 < len(lines) and lines[i + 1]:
+            speaker = cue.group(1).strip()
+            speech = []
+            i += 1
+            while i < len(lines) and lines[i]:
+                speech.append(lines[i])
+                i += 1
+            text = " ".join(speech)
+            previous = items[-1] if items else None
+            if isinstance(previous, list) and previous[0] == speaker:
+                previous[1] += " " + text
+            else:
+                items.append([speaker, text])
+            continue
+        if line:
+            items.append(line)
+        i += 1
+    return items
+
+
+def _summarize_run(run: List[List[str]]) -> str:
+    speakers = ", ".join(dict.fromkeys(speaker for speaker, _ in run))
+    first, last = run[0], run[-1]
+    return (
+        f"[DIALOGUE SUMMARY: {len(run)} speeches between {speakers}. "
+        f"Opens {first[0]}: \"{first[1]}\" ... closes {last[0]}: \"{last[1]}\"]"
+    )
+
+
+def compact_scene(body: str, summarize_dialogue: bool = False) -> str:
+    """
+    Dense prompt form of one scene body (header line first, unchanged).
+    Whitespace is normalized, blank lines, page numbers, (CONTINUED)/(MORE) and transitions
+    are dropped, and each speech becomes one "NAME: text" line. With `summarize_dialogue`,
+    runs of DIALOGUE_SUMMARY_MIN_SPEECHES or more speeches become a one-line summary.
+    """
+    raw_lines = body.strip().split("\n")
+    header = WHITESPACE_PATTERN.sub(" ", raw_lines[0]).strip()
+    lines = []
+    for line in raw_lines[1:]:
+        line = WHITESPACE_PATTERN.sub(" ", line).strip()
+        if PAGE_FURNITURE_PATTERN.match(line) or TRANSITION_PATTERN.match(line):
+            continue
+        # Keep single blank separators: cue detection needs them
+        if line or (lines and lines[-1]):
+            lines.append(line)
+
+    out = [header]
+    run: List[List[str]] = []
+
+    def flush():
+        if summarize_dialogue and len(run) >= DIALOGUE_SUMMARY_MIN_SPEECHES:
+            out.append(_summarize_run(run))
+        else:
+            out.extend(f"{speaker}: {text}" for speaker, text in run)
+        run.clear()
+
+    for item in _speeches(lines):
+        if isinstance(item, list):
+            run.append(item)
+            continue
+        if PARENTHETICAL_PATTERN.match(item) and run:
+            run[-1][1] += " " + item  # Stray parenthetical after a speech
+            continue
+        flush()
+        out.append(item)
+    flush()
+    return "\n".join(out)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Hard cap for one oversized scene: drops trailing lines (the header always stays)
+    and says how many were cut, so the model knows the scene is incomplete.
+    """
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+    lines = text.split("\n")
+    low, high = 1, len(lines)
+    # Longest prefix that fits, marker included
+    while low < high:
+        mid = (low + high + 1) // 2
+        candidate = "\n".join(lines[:mid]) + f"\n[... {len(lines) - mid} lines cut to fit the token budget]"
+        if count_tokens(candidate) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return "\n".join(lines[:low]) + f"\n[... {len(lines) - low} lines cut to fit the token budget]"
+
+
+class CompactionReport(NamedTuple):
+    tokenizer: str
+    raw_tokens: int  # Scene text as written
+    prompt_tokens: int  # Scene text as sent, after compaction (and trimming)
+    chunks: int
+    budget: Optional[int]
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.raw_tokens - self.prompt_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            **self._asdict(),
+            "saved_tokens": self.saved_tokens,
+            "saved_pct": round(100 * self.saved_tokens / self.raw_tokens, 1) if self.raw_tokens else 0.0,
+        }
@@ -0,0 +1,343 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from schemas import ErrorType, Severity
+from segmenter import SceneSpan, character_cues
+
+# --- LOCAL CONTINUITY TRACKER ---
+# Walks scenes in script order keeping a state table per character (costume colours, worn
+# accessories, injuries, alive/dead) and per prop, plus the previous scene's time of day, and
+# reports contradictions as candidate continuity errors. Rule-based and cheap: the local engine
+# reports them directly, and the LLM path sends them along so the model verifies instead of hunting.
+
+# Headers / opening lines that make a scene continuous with the one before it
+CONTINUOUS_PATTERN = re.compile(r"\b(?:CONTINUOUS|MOMENTS LATER|SAME TIME|CONT'D|SECONDS LATER)\b", re.IGNORECASE)
+# Dream / flashback scenes may legitimately show dead characters or other costumes
+FLASHBACK_PATTERN = re.compile(r"\b(?:FLASHBACK|DREAM|MEMORY|MONTAGE)\b", re.IGNORECASE)
+
+# Common roles that are written as characters even without dialogue cues
+ARCHETYPES = ["HERO", "HEROINE", "VILLAIN", "MOTHER", "FATHER", "INSPECTOR", "COMEDIAN", "HENCHMAN", "GRANDMOTHER", "SISTER", "BROTHER"]
+PARENTHETICAL_NAME = re.compile(r"\b([A-Z][A-Z]+(?: [A-Z][A-Z]+)?) \(")
+
+COLORS = ["RED", "BLUE", "GREEN", "WHITE", "BLACK", "YELLOW", "SAFFRON", "PINK", "ORANGE", "BROWN", "GREY", "GRAY", "GOLDEN", "SILVER", "MAROON", "PURPLE"]
+GARMENTS = ["SCARF", "SHIRT", "KURTA", "SAREE", "SARI", "DHOTI", "JACKET", "TURBAN", "SHAWL", "COAT", "DRESS", "LUNGI", "VEST", "T-SHIRT", "UNIFORM", "DUPATTA"]
+GARMENT_PATTERN = re.compile(rf"\b({'|'.join(COLORS)})\s+({'|'.join(re.escape(g) for g in GARMENTS)})S?\b", re.IGNORECASE)
+
+# Worn accessories, normalized to one name each
+ACCESSORIES = {
+    "GLASSES": "GLASSES", "SUNGLASSES": "GLASSES", "AVIATORS": "GLASSES", "SHADES": "GLASSES", "SPECTACLES": "GLASSES",
+    "WATCH": "WATCH", "CHAIN": "CHAIN", "RING": "RING", "HAT": "HAT", "CAP": "CAP", "MASK": "MASK", "BANDANA": "BANDANA",
+}
+_ACCESSORY_WORDS = "|".join(sorted(ACCESSORIES, key=len, reverse=True))
+WEARING_PATTERN = re.compile(rf"\b(?:wearing|wears|puts on|in (?:his|her|a|an)?)\b[^.!?\n]*?\b({_ACCESSORY_WORDS})\b", re.IGNORECASE)
+MISSING_PATTERN = re.compile(rf"\b(?:no|without|not wearing)\s+(?:his\s+|her\s+)?(?:[\w-]+\s+)?({_ACCESSORY_WORDS})\b", re.IGNORECASE)
+REMOVAL_PATTERN = re.compile(rf"\b(?:removes|takes off|took off|pulls off|drops|throws|hands over|loses|tosses)\b[^.!?\n]*?\b({_ACCESSORY_WORDS})\b", re.IGNORECASE)
+
+# Hand props, vehicles and animals that have to stay consistent between shots
+PROPS = ["HORSE", "DOG", "CIGARETTE", "BOTTLE", "GUN", "PISTOL", "KNIFE", "SWORD", "BAG", "BRIEFCASE", "PHONE", "LETTER",
+         "FILE", "CAR", "JEEP", "BIKE", "UMBRELLA", "GARLAND", "STICK", "AXE", "SUITCASE", "CAMERA", "TORCH", "LATHI"]
+PROP_PATTERN = re.compile(rf"\b({'|'.join(PROPS)})S?\b", re.IGNORECASE)
+DEFINITE = {"the", "his", "her", "their"}  # "the gun" refers back to a gun the audience has already seen
+GONE_PATTERN = re.compile(rf"\b(?:the\s+)?({'|'.join(PROPS)})\s+(?:is gone|has gone|vanishes|disappears|is missing)\b", re.IGNORECASE)
+PROP_EXIT_PATTERN = re.compile(rf"\b(?:rides away|rides off|drives off|drives away|walks away with|leads the|takes the|hands the|throws the|sends the)\b[^.!?\n]*", re.IGNORECASE)
+
+INJURY_PATTERN = re.compile(r"\b(wounded|bleeding|bandaged|bandage|injured|limping|limps|bruised|black eye|broken arm|broken leg|sling|stabbed|shot in the \w+)\b", re.IGNORECASE)
+HEALED_PATTERN = re.compile(r"\b(unhurt|unharmed|unscathed|without a scratch|spotless|not a scratch)\b", re.IGNORECASE)
+DEATH_PATTERN = re.compile(r"\b(dies|is killed|is dead|lies dead|is shot dead|falls dead|breathes (?:his|her) last)\b", re.IGNORECASE)
+
+# Time cues in action lines that contradict the scene's time of day
+DAY_CUES = re.compile(r"\b(sunlight|blazing sun|noon|midday|harsh sun|afternoon sun)\b", re.IGNORECASE)
+NIGHT_CUES = re.compile(r"\b(moonlight|moonlit|stars above|pitch dark|midnight|starlit)\b", re.IGNORECASE)
+
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+[.!?]?")
+# Cheap pre-filter: a sentence with none of these words can't trigger a costume / prop / injury
+# rule, and a set lookup per word is far cheaper than running every rule regex on every line
+WORD_PATTERN = re.compile(r"[A-Z][A-Z-]*")
+_TRIGGER_NOUNS = GARMENTS + list(ACCESSORIES) + PROPS
+TRIGGER_WORDS = frozenset(COLORS + _TRIGGER_NOUNS + [f"{word}S" for word in _TRIGGER_NOUNS] + [
+    "WOUNDED", "BLEEDING", "BANDAGED", "BANDAGE", "INJURED", "LIMPING", "LIMPS", "BRUISED", "EYE", "BROKEN", "SLING",
+    "STABBED", "SHOT", "UNHURT", "UNHARMED", "UNSCATHED", "SCRATCH", "SPOTLESS", "DIES", "KILLED", "DEAD", "LAST",
+])
+DIALOGUE_INDENT = 6  # Lines indented this far are dialogue / cues, not action
+
+
+class ContinuityFinding(NamedTuple):
+    error_type: ErrorType
+    severity: Severity
+    from_scene_id: str
+    to_scene_id: str
+    subject: str  # Character or prop the finding is about
+    description: str
+    reasoning: str
+    fix: str
+
+
+class StateEntry(NamedTuple):
+    value: object
+    scene_id: str
+    line: str
+
+
+def _time_of(header: str) -> Optional[str]:
+    upper = header.upper()
+    if "NIGHT" in upper or "EVENING" in upper or "MIDNIGHT" in upper:
+        return "NIGHT"
+    if re.search(r"\b(?:DAY|MORNING|DAWN|AFTERNOON|NOON)\b", upper):
+        return "DAY"
+    return None
+
+
+class ContinuityTracker:
+    """
+    Incremental: feed() one scene at a time, in script order; each call returns only the
+    findings that scene introduces, so scenes can be checked as they stream in.
+    """
+
+    def __init__(self):
+        # (character, attribute) -> StateEntry. Attributes: "garment:SCARF", "worn:GLASSES",
+        # "injury", "alive"
+        self.state: Dict[Tuple[str, str], StateEntry] = {}
+        # prop -> scene id where it was first seen / last seen
+        self.props_introduced: Dict[str, str] = {}
+        self.props_last_seen: Dict[str, str] = {}
+        self.characters: Set[str] = set(ARCHETYPES)
+        self.cast: Dict[str, List[str]] = {}  # scene id -> characters present
+        self.findings: List[ContinuityFinding] = []  # Everything reported so far
+        self.previous: Optional[Tuple[str, SceneSpan, Optional[str]]] = None  # (id, span, effective time)
+        self._reported: Set[Tuple[str, str, str]] = set()  # (rule reasoning, subject, scene id)
+
+    def feed(self, scene_id: str, span: SceneSpan) -> List[ContinuityFinding]:
+        findings: List[ContinuityFinding] = []
+        lines = span.body.split("\n")
+        header = span.header
+        action_lines = [line.strip() for line in lines[1:] if line.strip() and len(line) - len(line.lstrip()) < DIALOGUE_INDENT]
+        action_text = "\n".join(action_lines)
+
+        speakers = character_cues(span.body)
+        self.characters.update(speakers)
+        self.characters.update(m.group(1) for m in PARENTHETICAL_NAME.finditer(action_text))
+
+        continuous = bool(CONTINUOUS_PATTERN.search(header)) or bool(action_lines and CONTINUOUS_PATTERN.match(action_lines[0]))
+        flashback = bool(FLASHBACK_PATTERN.search(header))
+        previous_id, _, previous_time = self.previous if self.previous else (None, None, None)
+
+        # --- TIME OF DAY ---
+        explicit_time = _time_of(header)
+        time = explicit_time or (previous_time if continuous else None)
+        if continuous and explicit_time and previous_time and explicit_time != previous_time:
+            findings.append(ContinuityFinding(
+                ErrorType.TIME_JUMP, Severity.HIGH, previous_id, scene_id, header,
+                f"Scene {scene_id} ({header}) is marked continuous with Scene {previous_id}, but jumps from {previous_time} to {explicit_time}.",
+                "Continuous action cannot change time of day between cuts.",
+                f"Either drop CONTINUOUS from the slugline or shoot Scene {scene_id} as {previous_time}."
+            ))
+        cue_match = (NIGHT_CUES if time == "DAY" else DAY_CUES if time == "NIGHT" else None)
+        cue = cue_match.search(action_text) if cue_match else None
+        if cue:
+            findings.append(ContinuityFinding(
+                ErrorType.TIME_JUMP, Severity.MEDIUM, scene_id, scene_id, header,
+                f"Scene {scene_id} is a {time} scene but the action mentions '{cue.group(0)}'.",
+                "The action lines describe light that contradicts the slugline's time of day.",
+                f"Align the action line with {time}, or change the slugline."
+            ))
+
+        # --- CHARACTERS PRESENT, SENTENCE BY SENTENCE ---
+        present: List[str] = list(speakers)
+        owner: Optional[str] = None
+        removed: Set[Tuple[str, str]] = set()
+        for line in action_lines:
+            for sentence_match in SENTENCE_PATTERN.finditer(line):
+                sentence = sentence_match.group(0).strip()
+                if not sentence:
+                    continue
+                upper = sentence.upper()
+                words = [(m.start(), m.group(0)) for m in WORD_PATTERN.finditer(upper)]
+                mentions = self._characters_in(upper, words)
+                for _, name in mentions:
+                    if name not in present:
+                        present.append(name)
+                if mentions:
+                    owner = mentions[0][1]
+                findings.extend(self._sentence(scene_id, sentence, words, owner, mentions, continuous, flashback, previous_id, removed))
+
+        # Dead characters can't come back (outside flashbacks)
+        if not flashback:
+            for name in speakers:
+                entry = self.state.get((name, "alive"))
+                if entry is not None and entry.value is False and entry.scene_id != scene_id:
+                    findings.append(self._once(ContinuityFinding(
+                        ErrorType.CHARACTER_PLACEMENT, Severity.HIGH, entry.scene_id, scene_id, name,
+                        f"{name} dies in Scene {entry.scene_id} (\"{entry.line}\") but speaks in Scene {scene_id}.",
+                        "A character who died on screen cannot reappear unless the scene is a flashback or dream.",
+                        f"Mark Scene {scene_id} as FLASHBACK, or give the lines to another character."
+                    )))
+
+        self.cast[scene_id] = present
+        self.previous = (scene_id, span, time)
+        findings = [f for f in findings if f is not None]
+        self.findings.extend(findings)
+        return findings
+
+    def _characters_in(self, upper: str, words: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """(offset, name) of every known character mentioned in the (upper-cased) sentence, in order."""
+        found = [(offset, word) for offset, word in words if word in self.characters]
+        for name in self.characters:
+            if " " not in name:
+                continue
+            index = upper.find(name)
+            if index != -1 and (index == 0 or not upper[index - 1].isalpha()) and (
+                index + len(name) == len(upper) or not upper[index + len(name)].isalpha()
+            ):
+                found.append((index, name))
+        return sorted(found)
+
+    def _once(self, finding: ContinuityFinding) -> Optional[ContinuityFinding]:
+        # One report per rule, subject and scene (a rule can match several sentences)
+        key = (finding.reasoning, finding.subject, finding.to_scene_id)
+        if key in self._reported:
+            return None
+        self._reported.add(key)
+        return finding
+
+    def _sentence(
+        self,
+        scene_id: str,
+        sentence: str,
+        words: List[Tuple[int, str]],
+        owner: Optional[str],
+        mentions: List[Tuple[int, str]],
+        continuous: bool,
+        flashback: bool,
+        previous_id: Optional[str],
+        removed: Set[Tuple[str, str]]
+    ) -> List[Optional[ContinuityFinding]]:
+        if TRIGGER_WORDS.isdisjoint(word for _, word in words):
+            # Most action lines mention no costume, prop or injury: only the dead-actor check applies
+            return [self._acting_dead(scene_id, sentence, owner, flashback)]
+        findings: List[Optional[ContinuityFinding]] = []
+        who = owner or "UNASSIGNED"
+
+        # Costume colours: a garment can't change colour within continuous action
+        for match in GARMENT_PATTERN.finditer(sentence):
+            color, garment = match.group(1).upper(), match.group(2).upper()
+            key = (who, f"garment:{garment}")
+            entry = self.state.get(key)
+            if entry is not None and entry.value != color and not flashback and (
+                entry.scene_id == scene_id or (continuous and entry.scene_id == previous_id)
+            ):
+                findings.append(self._once(ContinuityFinding(
+                    ErrorType.COSTUME_ERROR, Severity.HIGH, entry.scene_id, scene_id, f"{who} {garment}",
+                    f"{who}'s {garment} is {entry.value} in Scene {entry.scene_id} (\"{entry.line}\") but {color} in Scene {scene_id} (\"{sentence}\").",
+                    f"Continuous action: the {garment.lower()} cannot change colour between shots without a costume change on screen.",
+                    f"Keep the {entry.value} {garment.lower()} in Scene {scene_id}, or write in the change."
+                )))
+            self.state[key] = StateEntry(color, scene_id, sentence)
+
+        # Worn accessories: taken off on screen, or they are still on
+        for match in REMOVAL_PATTERN.finditer(sentence):
+            item = ACCESSORIES[match.group(1).upper()]
+            removed.add((who, item))
+            self.state[(who, f"worn:{item}")] = StateEntry(False, scene_id, sentence)
+        for match in MISSING_PATTERN.finditer(sentence):
+            item = ACCESSORIES[match.group(1).upper()]
+            key = (who, f"worn:{item}")
+            entry = self.state.get(key)
+            if entry is not None and entry.value is True and (who, item) not in removed and not flashback and (
+                entry.scene_id == scene_id or (continuous and entry.scene_id == previous_id)
+            ):
+                findings.append(self._once(ContinuityFinding(
+                    ErrorType.COSTUME_ERROR, Severity.HIGH, entry.scene_id, scene_id, f"{who} {item}",
+                    f"{who} wears {item.lower()} in Scene {entry.scene_id} (\"{entry.line}\"), but in Scene {scene_id} has none (\"{sentence}\") and no action line removes them.",
+                    f"Objects ({item.lower()}) cannot disappear between continuous shots without an establishing action.",
+                    f"Add an action beat: '{who} removes the {item.lower()}' before Scene {scene_id}'s dialogue."
+                )))
+            self.state[key] = StateEntry(False, scene_id, sentence)
+        for match in WEARING_PATTERN.finditer(sentence):
+            item = ACCESSORIES[match.group(1).upper()]
+            if not MISSING_PATTERN.search(sentence):
+                self.state[(who, f"worn:{item}")] = StateEntry(True, scene_id, sentence)
+
+        # Props: vanishing without an exit, or used with no introduction
+        exits = PROP_EXIT_PATTERN.search(sentence)
+        for match in GONE_PATTERN.finditer(sentence):
+            prop = match.group(1).upper()
+            last_seen = self.props_last_seen.get(prop)
+            if last_seen is not None and (last_seen == scene_id or (continuous and last_seen == previous_id)) and not exits:
+                findings.append(self._once(ContinuityFinding(
+                    ErrorType.PROP_INCONSISTENCY, Severity.MEDIUM, last_seen, scene_id, prop,
+                    f"The {prop.lower()} is in Scene {last_seen} but simply vanishes in Scene {scene_id} (\"{sentence}\").",
+                    f"A {prop.lower()} in continuous action needs an on-screen exit (led away, driven off) before it can be gone.",
+                    f"Add a beat taking the {prop.lower()} out of frame, or keep it in the background."
+                )))
+        for match in PROP_PATTERN.finditer(sentence):
+            prop = match.group(1).upper()
+            if prop not in self.props_introduced:
+                # Article just before the prop, skipping one adjective ("the old jeep")
+                preceding = sentence[:match.start()].lower().split()[-2:]
+                article = next((word for word in reversed(preceding) if word in DEFINITE), "")
+                if article and continuous and previous_id is not None:
+                    findings.append(self._once(ContinuityFinding(
+                        ErrorType.PROP_INCONSISTENCY, Severity.LOW, previous_id, scene_id, prop,
+                        f"Scene {scene_id} refers to {article} {prop.lower()} (\"{sentence}\"), but no earlier scene introduces it.",
+                        f"Continuous action picks up a {prop.lower()} that was never established in the previous shot.",
+                        f"Introduce the {prop.lower()} in Scene {previous_id}, or bring it into frame on screen."
+                    )))
+                self.props_introduced[prop] = scene_id
+            self.props_last_seen[prop] = scene_id
+
+        def subject_of(match) -> Optional[str]:
+            # "VILLAIN stabs HERO. HERO is bleeding": the character named closest before the verb
+            before = [name for offset, name in mentions if offset < match.start()]
+            return before[-1] if before else owner
+
+        # Injuries carry over; a wounded character can't be spotless in continuous action
+        injury = INJURY_PATTERN.search(sentence)
+        if injury and subject_of(injury):
+            self.state[(subject_of(injury), "injury")] = StateEntry(injury.group(0).lower(), scene_id, sentence)
+        healed = HEALED_PATTERN.search(sentence)
+        if healed and owner:
+            entry = self.state.get((owner, "injury"))
+            if entry is not None and not flashback and (entry.scene_id == scene_id or (continuous and entry.scene_id == previous_id)):
+                findings.append(self._once(ContinuityFinding(
+                    ErrorType.CHARACTER_PLACEMENT, Severity.MEDIUM, entry.scene_id, scene_id, owner,
+                    f"{owner} is {entry.value} in Scene {entry.scene_id} (\"{entry.line}\") but {healed.group(0).lower()} in Scene {scene_id}.",
+                    "Injuries (wounds, bandages, blood) must carry over in continuous action.",
+                    f"Keep {owner}'s {entry.value} make-up through Scene {scene_id}."
+                )))
+                del self.state[(owner, "injury")]
+
+        # Deaths: anyone acting after dying is flagged
+        death = DEATH_PATTERN.search(sentence)
+        if death and subject_of(death):
+            self.state[(subject_of(death), "alive")] = StateEntry(False, scene_id, sentence)
+        else:
+            findings.append(self._acting_dead(scene_id, sentence, owner, flashback))
+        return findings
+
+    def _acting_dead(self, scene_id: str, sentence: str, owner: Optional[str], flashback: bool) -> Optional[ContinuityFinding]:
+        if not owner or flashback:
+            return None
+        entry = self.state.get((owner, "alive"))
+        if entry is None or entry.value is not False or entry.scene_id == scene_id:
+            return None
+        return self._once(ContinuityFinding(
+            ErrorType.CHARACTER_PLACEMENT, Severity.HIGH, entry.scene_id, scene_id, owner,
+            f"{owner} dies in Scene {entry.scene_id} (\"{entry.line}\") but acts in Scene {scene_id} (\"{sentence}\").",
+            "A character who died on screen cannot reappear unless the scene is a flashback or dream.",
+            f"Mark Scene {scene_id} as FLASHBACK, or rewrite the action for another character."
+        ))
+
+
+def detect_continuity(scenes: Iterable[Tuple[str, SceneSpan]]) -> Tuple[List[ContinuityFinding], Dict[str, List[str]]]:
+    """Runs the tracker over (scene id, span) pairs. Returns the findings and the characters present per scene."""
+    tracker = ContinuityTracker()
+    for scene_id, span in scenes:
+        tracker.feed(scene_id, span)
+    return tracker.findings, tracker.cast
+
+
+def format_candidates(findings: List[ContinuityFinding]) -> str:
+    """Prompt block listing local findings for the LLM to confirm or reject."""
+    return "\n".join(
+        f"- [{f.error_type.value}] Scene {f.from_scene_id} -> Scene {f.to_scene_id}: {f.description}" for f in findings
+    )
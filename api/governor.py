@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Set
+
+from metrics import LLM_ADMISSIONS, LLM_LATE_RESULTS, LLM_QUEUE_SECONDS
+
+# --- LLM GOVERNOR ---
+# Every chat completion goes through one governor per process (on the LLMPool). Before a call
+# it reserves a request and its estimated tokens from two token buckets (requests and tokens per
+# minute, refilled continuously). Callers queue by lane, so a dashboard request always goes
+# ahead of queued batch sweeps. A daily spend ceiling (USD, from the reported token usage)
+# turns the LLM off for the rest of the UTC day; callers then fall back to the local engine.
+# The governor also keeps LLM analyses that outlived the latency SLO (see `detach`) running in
+# the background so their results still reach the cache.
+# State is per process: with several instances, set the limits per instance.
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)  # Highest priority first
+
+# gpt-4o tier-1 limits; 0 disables a bucket
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = float(os.environ.get("LLM_TOKENS_PER_MINUTE", 30000))
+LLM_DAILY_BUDGET_USD = float(os.environ.get("LLM_DAILY_BUDGET_USD", 0))  # 0 = no ceiling
+# Interactive analyses answer from the local engine after this many seconds (0 = wait for the LLM)
+LLM_SLO_SECONDS = float(os.environ.get("LLM_SLO_SECONDS", 20))
+
+# USD per 1M tokens for LLM_MODEL (gpt-4o-2024-08-06)
+PRICE_INPUT = float(os.environ.get("LLM_PRICE_INPUT_PER_1M", 2.50))
+PRICE_CACHED_INPUT = float(os.environ.get("LLM_PRICE_CACHED_INPUT_PER_1M", 1.25))
+PRICE_OUTPUT = float(os.environ.get("LLM_PRICE_OUTPUT_PER_1M", 10.00))
+
+
+class BudgetExceeded(RuntimeError):
+    """The daily LLM spend ceiling is reached (or this call would cross it)."""
+
+
+def call_cost(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """USD for one completion; cached prompt tokens are billed at the cached rate."""
+    return (
+        (prompt_tokens - cached_tokens) * PRICE_INPUT + cached_tokens * PRICE_CACHED_INPUT + completion_tokens * PRICE_OUTPUT
+    ) / 1_000_000
+
+
+class TokenBucket:
+    """Holds up to `per_minute` units (a minute of burst), refilled continuously; 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (amounts above capacity only need a full bucket)."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        """Takes `amount` (negative gives it back); the level may go below 0 after an underestimate."""
+        if self.capacity:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+    def state(self) -> dict:
+        if not self.capacity:
+            return {"per_minute": None}
+        self._refill()
+        return {"per_minute": self.capacity, "available": round(self.level, 1)}
+
+
+class Reservation(NamedTuple):
+    lane: str
+    tokens: int
+    cost: float
+
+
+class LLMGovernor:
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        daily_budget_usd: float = LLM_DAILY_BUDGET_USD,
+        slo_seconds: float = LLM_SLO_SECONDS
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.daily_budget_usd = daily_budget_usd
+        self.slo_seconds = slo_seconds
+        self._condition = asyncio.Condition()
+        self._queue: list = []  # (lane rank, arrival) heap; the head is the next caller admitted
+        self._arrivals = itertools.count()
+        self._day = self._today()
+        self.spent_usd = 0.0  # Settled today
+        self.reserved_usd = 0.0  # Estimated, for calls still in flight
+        self.admitted: Dict[str, int] = dict.fromkeys(LANES, 0)
+        self.rejected: Dict[str, int] = dict.fromkeys(LANES, 0)
+        self._late: Set[asyncio.Task] = set()
+        self.late_filled = 0
+        self.late_failed = 0
+
+    @staticmethod
+    def _today() -> str:
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def _check_budget(self, lane: str, cost: float) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day, self.spent_usd = today, 0.0
+        if self.daily_budget_usd and self.spent_usd + self.reserved_usd + cost > self.daily_budget_usd:
+            self.rejected[lane] += 1
+            LLM_ADMISSIONS.inc(lane, "over_budget")
+            raise BudgetExceeded(
+                f"Daily LLM budget of ${self.daily_budget_usd:.2f} reached (${self.spent_usd:.2f} spent today)"
+            )
+
+    async def acquire(self, prompt_tokens: int, completion_tokens: int, lane: str = INTERACTIVE) -> Reservation:
+        """
+        Waits for a request slot and the estimated tokens, behind every caller in a higher lane.
+        Raises BudgetExceeded (without waiting) when the call could cross the daily ceiling.
+        """
+        tokens = prompt_tokens + completion_tokens
+        cost = call_cost(prompt_tokens, completion_tokens)
+        self._check_budget(lane, cost)
+        entry = (LANES.index(lane), next(self._arrivals))
+        start = time.perf_counter()
+        async with self._condition:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    timeout = None  # Not at the head: wait until someone ahead is admitted
+                    if self._queue[0] == entry:
+                        timeout = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if timeout <= 0:
+                            break
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                # Spend may have moved while queued
+                self._check_budget(lane, cost)
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                self.reserved_usd += cost
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+        self.admitted[lane] += 1
+        LLM_ADMISSIONS.inc(lane, "admitted")
+        LLM_QUEUE_SECONDS.observe(time.perf_counter() - start, lane)
+        return Reservation(lane, tokens, cost)
+
+    def release(self, reservation: Reservation, usage=None) -> None:
+        """
+        Settles a call with its reported usage: the token bucket is corrected to the actual count and
+        the actual cost is added to today's spend. Without usage (the call failed) the tokens are returned.
+        """
+        self.reserved_usd = max(0.0, self.reserved_usd - reservation.cost)
+        if usage is None:
+            self.tokens.take(-reservation.tokens)
+            return
+        prompt = usage.prompt_tokens or 0
+        completion = usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        self.tokens.take(prompt + completion - reservation.tokens)
+        self.spent_usd += call_cost(prompt, completion, cached)
+
+    def detach(self, task: asyncio.Task) -> None:
+        """
+        Keeps an analysis that missed the SLO running after its request was answered locally.
+        The task itself stores its result (cache, project drafts) when it finishes.
+        """
+        self._late.add(task)
+        task.add_done_callback(self._late_done)
+
+    def _late_done(self, task: asyncio.Task) -> None:
+        self._late.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self.late_filled += 1
+            LLM_LATE_RESULTS.inc("filled")
+        else:
+            self.late_failed += 1
+            LLM_LATE_RESULTS.inc("failed")
+            print(f"Late LLM Analysis Failed: {error}")
+
+    async def cancel_late(self) -> None:
+        for task in list(self._late):
+            task.cancel()
+        await asyncio.gather(*self._late, return_exceptions=True)
+
+    def state(self) -> dict:
+        waiting = dict.fromkeys(LANES, 0)
+        for rank, _ in self._queue:
+            waiting[LANES[rank]] += 1
+        return {
+            "requests": self.requests.state(),
+            "tokens": self.tokens.state(),
+            "lanes": {lane: {"waiting": waiting[lane], "admitted": self.admitted[lane], "rejected": self.rejected[lane]} for lane in LANES},
+            "spend": {
+                "day": self._day,
+                "spent_usd": round(self.spent_usd, 4),
+                "in_flight_usd": round(self.reserved_usd, 4),
+                "daily_budget_usd": self.daily_budget_usd or None,
+            },
+            "slo": {
+                "seconds": self.slo_seconds or None,
+                "late_running": len(self._late),
+                "late_filled": self.late_filled,
+                "late_failed": self.late_failed,
+            },
+        }
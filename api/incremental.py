@@ -0,0 +1,238 @@
+import json
+import os
+import tempfile
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from schemas import AnalysisResult, ReusedScene
+from segmenter import SceneSpan, iter_scenes
+from cache import ENGINE_VERSION, MemoryCacheBackend, SQLiteCacheBackend, normalize_script, sha256
+from analyzer import GENERAL_REVIEW, aggregate_budget, compute_risk_score, general_review_risk, iter_span_scenes
+from money import format_paise, parse_paise
+from similarity import NearDuplicate
+
+# Above this share of recomputed scenes a full re-analysis is cheaper and more coherent
+FULL_REANALYSIS_RATIO = 0.5
+
+
+class SceneVersion(NamedTuple):
+    scene_id: str
+    content_hash: str
+    span: SceneSpan
+
+
+def hash_scenes(script_text: str) -> List[SceneVersion]:
+    return [
+        SceneVersion(str(i), sha256(normalize_script(span.body)), span)
+        for i, span in enumerate(iter_scenes(script_text), start=1)
+    ]
+
+
+class ProjectSnapshotStore:
+    """
+    Last analysis per (project, budget mode, engine), with the per-scene content hashes
+    it was computed from. Stored in any cache backend (see cache.py).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(project_id: str, budget_mode: str, engine: str) -> str:
+        # A snapshot from an older engine version starts the project over with a full analysis
+        return f"project:{project_id}:{budget_mode}:{engine}:{ENGINE_VERSION}"
+
+    def get(self, project_id: str, budget_mode: str, engine: str):
+        value = self.backend.get(self._key(project_id, budget_mode, engine))
+        if value is None:
+            return None
+        snapshot = json.loads(value)
+        return snapshot["scene_hashes"], AnalysisResult.model_validate(snapshot["result"])
+
+    def set(self, project_id: str, budget_mode: str, engine: str, versions: List[SceneVersion], result: AnalysisResult) -> None:
+        snapshot = {
+            "scene_hashes": {v.scene_id: v.content_hash for v in versions},
+            "result": result.model_dump(mode="json"),
+        }
+        self.backend.set(self._key(project_id, budget_mode, engine), json.dumps(snapshot))
+
+
+def project_snapshots_from_env() -> ProjectSnapshotStore:
+    """
+    Snapshots get a store of their own, so analysis cache traffic never evicts a project's last draft.
+    PROJECT_SNAPSHOTS: "sqlite" (default) or "memory"
+    PROJECT_SNAPSHOTS_PATH: SQLite file (default: temp dir); PROJECT_SNAPSHOTS_MAX_ENTRIES: projects kept (x budget mode/engine)
+    """
+    max_entries = int(os.environ.get("PROJECT_SNAPSHOTS_MAX_ENTRIES", 10000))
+    if os.environ.get("PROJECT_SNAPSHOTS", "sqlite").lower() == "memory":
+        return ProjectSnapshotStore(MemoryCacheBackend(max_entries))
+    path = os.environ.get("PROJECT_SNAPSHOTS_PATH", os.path.join(tempfile.gettempdir(), "continuityguard_snapshots.db"))
+    return ProjectSnapshotStore(SQLiteCacheBackend(path, max_entries))
+
+
+def plan_recompute(versions: List[SceneVersion], old_hashes: Dict[str, str], old_result: AnalysisResult) -> Dict[str, str]:
+    """
+    Diffs the new draft against the previous one.
+    Returns {new scene id: old scene id} for every scene whose analysis can be reused.
+    A scene is recomputed if its content changed, if it is next to a changed scene,
+    or if scenes were inserted/removed right next to it (continuity context changed).
+    """
+    old_scenes = {scene.id for scene in old_result.scenes}
+    old_ids_by_hash: Dict[str, List[str]] = {}
+    for old_id, content_hash in old_hashes.items():
+        if old_id in old_scenes:
+            old_ids_by_hash.setdefault(content_hash, []).append(old_id)
+    for ids in old_ids_by_hash.values():
+        ids.sort(key=int)
+
+    # Match unchanged scenes to their previous id (repeated identical scenes matched in order)
+    matched: List[Optional[str]] = []
+    for version in versions:
+        candidates = old_ids_by_hash.get(version.content_hash)
+        matched.append(candidates.pop(0) if candidates else None)
+
+    changed = set()
+    for i, old_id in enumerate(matched):
+        if old_id is None:
+            changed.add(i)
+        elif i > 0 and matched[i - 1] is not None and int(matched[i - 1]) != int(old_id) - 1:
+            # Neighbours are both unchanged but were not adjacent before: something was cut between them
+            changed.update((i - 1, i))
+
+    recompute = set()
+    for i in changed:
+        recompute.update(j for j in (i - 1, i, i + 1) if 0 <= j < len(versions))
+
+    return {versions[i].scene_id: matched[i] for i in range(len(versions)) if i not in recompute}
+
+
+async def analyze_incremental(
+    script_text: str,
+    engine: Callable[[str], Awaitable[AnalysisResult]],
+    previous=None,
+    near_duplicates: Optional[Callable[[List[SceneVersion]], Awaitable[Dict[str, NearDuplicate]]]] = None
+):
+    """
+    Re-analyzes only what changed since the previous draft.
+    `engine` is an async callable that analyzes a (sub-)script; `previous` is what ProjectSnapshotStore.get returned.
+    `near_duplicates` maps the scenes left to analyze to near-identical scenes analyzed before
+    (see similarity.py); those are reused too, listed in `reused_scenes`. Continuity between a
+    reused scene and its neighbours is not re-checked.
+    Returns (result, scene versions) so the caller can store the new snapshot.
+    """
+    versions = hash_scenes(script_text)
+    reuse = plan_recompute(versions, *previous) if previous is not None and versions else {}
+    recompute = [v for v in versions if v.scene_id not in reuse]
+    near = await near_duplicates(recompute) if near_duplicates is not None and recompute else {}
+    recompute = [v for v in recompute if v.scene_id not in near]
+
+    if not (reuse or near) or len(recompute) > FULL_REANALYSIS_RATIO * len(versions):
+        result = await engine(script_text)
+        result.recomputed_scene_ids = [v.scene_id for v in versions]
+        return result, versions
+
+    empty = AnalysisResult(total_risk_score=0, potential_savings="₹ 0", scenes=[], errors=[])
+    old_result = previous[1] if previous is not None else empty
+    if not recompute:
+        partial = empty
+    else:
+        # Only the changed scenes (and their neighbours) go to the engine.
+        # The engine numbers them 1..k, which we map back to their ids in the new draft.
+        partial = await engine("\n".join(v.span.body.rstrip("\n") + "\n" for v in recompute))
+    partial_ids = {str(k): v.scene_id for k, v in enumerate(recompute, start=1)}
+    old_to_new = {old_id: new_id for new_id, old_id in reuse.items()}
+
+    def remap_partial(scene_id):
+        return partial_ids.get(scene_id) if scene_id is not None else None
+
+    def reused_id(scene_id):
+        return old_to_new.get(scene_id) if scene_id is not None else None
+
+    # Scenes: reused ones keep their analysis (expense_breakdown etc.) under the new id
+    old_scenes = {scene.id: scene for scene in old_result.scenes}
+    new_scenes = {}
+    for scene in partial.scenes:
+        new_id = remap_partial(scene.id)
+        if new_id is not None:
+            new_scenes[new_id] = scene.model_copy(update={"id": new_id})
+    for new_id, old_id in reuse.items():
+        new_scenes[new_id] = old_scenes[old_id].model_copy(update={"id": new_id})
+    # Near duplicates: header, location and time come from the new draft (a moved or re-timed
+    # scene still scores high); only the costing is carried over
+    near_spans = ((v.scene_id, v.span) for v in versions if v.scene_id in near)
+    for scene, _ in iter_span_scenes(near_spans):
+        duplicate = near[scene.id].scene
+        new_scenes[scene.id] = scene.model_copy(update={
+            "expense_breakdown": duplicate.expense_breakdown,
+            "total_paise": duplicate.total_paise,
+            "budget_code": duplicate.budget_code  # Derived by the validator, which model_copy skips
+        })
+    scenes = [new_scenes[v.scene_id] for v in versions if v.scene_id in new_scenes]
+
+    # Findings: keep old ones that only involve reused scenes, add the fresh ones
+    errors = []
+    for error in old_result.errors:
+        from_id, to_id = reused_id(error.from_scene_id), reused_id(error.to_scene_id)
+        if from_id is not None and (to_id is not None or error.to_scene_id is None):
+            errors.append(error.model_copy(update={"from_scene_id": from_id, "to_scene_id": to_id}))
+    for error in partial.errors:
+        errors.append(error.model_copy(update={
+            "from_scene_id": remap_partial(error.from_scene_id),
+            "to_scene_id": remap_partial(error.to_scene_id)
+        }))
+
+    # The "General Review" placeholder only stands for "nothing found": never carried, rebuilt below
+    compliance_risks = {}
+    placeholder = False
+    for risk in old_result.compliance_risks:
+        if risk.category == GENERAL_REVIEW:
+            placeholder = True
+        elif reused_id(risk.scene_id) is not None:
+            risk = risk.model_copy(update={"scene_id": reused_id(risk.scene_id)})
+            compliance_risks.setdefault((risk.category, risk.scene_id), risk)
+    for risk in partial.compliance_risks:
+        if risk.category == GENERAL_REVIEW:
+            placeholder = True
+            continue
+        risk = risk.model_copy(update={"scene_id": remap_partial(risk.scene_id)})
+        compliance_risks.setdefault((risk.category, risk.scene_id), risk)
+    for new_id, duplicate in near.items():
+        for risk in duplicate.compliance_risks:
+            compliance_risks.setdefault((risk.category, new_id), risk.model_copy(update={"scene_id": new_id}))
+    # Script-wide findings (no scene) still hold unless the re-analysis reported them afresh
+    for risk in old_result.compliance_risks:
+        if risk.scene_id is None and risk.category != GENERAL_REVIEW:
+            compliance_risks.setdefault((risk.category, None), risk)
+    if placeholder and not compliance_risks:
+        compliance_risks[(GENERAL_REVIEW, None)] = general_review_risk()
+
+    schedule_risks = []
+    for risk in old_result.schedule_risks:
+        if reused_id(risk.scene_id) is not None:
+            schedule_risks.append(risk.model_copy(update={"scene_id": reused_id(risk.scene_id)}))
+    for risk in partial.schedule_risks:
+        if remap_partial(risk.scene_id) is not None:
+            schedule_risks.append(risk.model_copy(update={"scene_id": remap_partial(risk.scene_id)}))
+
+    assets = {}
+    for asset in list(partial.assets) + list(old_result.assets):
+        assets.setdefault((asset.asset_type, asset.name.lower()), asset)
+
+    compliance = list(compliance_risks.values())
+    result = AnalysisResult(
+        total_risk_score=compute_risk_score(errors, compliance, schedule_risks),
+        potential_savings=format_paise(sum(parse_paise(e.estimated_cost) for e in errors)),
+        scenes=scenes,
+        errors=errors,
+        compliance_risks=compliance,
+        schedule_risks=schedule_risks,
+        assets=list(assets.values()),
+        overall_budget_breakdown=aggregate_budget(scenes),
+        recomputed_scene_ids=[v.scene_id for v in recompute],
+        prompt_compaction=partial.prompt_compaction,
+        reused_scenes=[
+            ReusedScene(scene_id=v.scene_id, source_project_id=near[v.scene_id].project_id,
+                        source_scene_id=near[v.scene_id].scene.id, similarity=near[v.scene_id].similarity)
+            for v in versions if v.scene_id in near
+        ] or None
+    )
+    return result, versions
@@ -1,10 +1,64 @@
-from fastapi import FastAPI, HTTPException, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Body, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from schemas import AnalysisResult
-from analyzer import analyze_script, mock_analyze_script
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.formparsers import MultiPartException, MultiPartParser
+from schemas import AnalysisResult, BatchRequest, BatchResponse, SchedulePlan, ScheduleRequest, StoryboardBatchRequest, StoryboardBatchResponse, StoryboardRequest, StoryboardResponse
+from analyzer import analyze_script_async, analysis_cache_key, chunk_script, compaction_report, mock_analyze_script, mock_analyze_spans, script_token_limit, warm_up, LLM_MODEL, LOCAL_ENGINE, UNKNOWN_SCENE_HEADER
+from llm import LLMPool
+from governor import BATCH
+from cache import cache_from_env
+from incremental import analyze_incremental, hash_scenes, project_snapshots_from_env
+from streaming import result_events, stream_analysis, to_ndjson
+from jobs import JobQueue, job_store_from_env
+from batch import run_batch, shutdown_process_pool
+from segmenter import iter_scenes
+from scheduler import MAX_SHOOT_DAYS, ScheduleTooLong, optimize_schedule
+from storyboard import StoryboardService, storyboard_store_from_env
+from projects import project_store_from_env
+from similarity import scene_index_from_env
+from ingest import IngestError, UploadTooLarge, iter_file_spans, limit_upload, spans_text, spool_upload, MAX_UPLOAD_BYTES
+from columnar import encode as encode_columnar, negotiate, result_tables, COLUMNAR_JSON
+from cache import normalize_script, sha256
+from money import parse_paise
+from compaction import load_tokenizer
+from metrics import LLM_FALLBACKS, REQUEST_SECONDS, SERIALIZATION, render_metrics, stage, track_request
+from typing import BinaryIO, List, Optional, Tuple
+import asyncio
 import os
+import time
 
-app = FastAPI(title="ContinuityGuard Production Risk Engine")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled AsyncOpenAI client for the whole process (None without a key)
+    api_key = os.environ.get("OPENAI_API_KEY")
+    app.state.llm = LLMPool(api_key) if api_key else None
+    # Background analysis jobs (needs the running loop)
+    app.state.jobs = JobQueue(job_store_from_env(), run_analysis_job)
+    app.state.jobs.resume_pending()
+    # Storyboards: disk store + in-flight coalescing + image call limits
+    app.state.storyboards = StoryboardService(storyboard_store_from_env(), app.state.llm)
+    # Prompt token counts and budgets use the real tokenizer from the first request on
+    await run_in_threadpool(load_tokenizer)
+    yield
+    await app.state.jobs.cancel_all()
+    shutdown_process_pool()
+    if app.state.llm is not None:
+        await app.state.llm.governor.cancel_late()
+        await app.state.llm.aclose()
+
+app = FastAPI(title="ContinuityGuard Production Risk Engine", lifespan=lifespan)
+
+# Content-addressed analysis cache (None when ANALYSIS_CACHE=off)
+analysis_cache = cache_from_env()
+# Last analysis per project, for incremental re-analysis of new drafts
+project_snapshots = project_snapshots_from_env()
+# Every project analysis, per draft, for the dashboards' cross-draft queries
+project_store = project_store_from_env()
+# LLM-analyzed scenes by MinHash, to reuse near-identical scenes across drafts and projects (None when SCENE_INDEX=off)
+scene_index = scene_index_from_env()
 
 # Allow CORS for frontend
 app.add_middleware(
@@ -15,6 +69,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/NDJSON/columnar bodies for clients that send Accept-Encoding: gzip. Level 6 is
+# nearly as small as 9 on analysis JSON at a fraction of the CPU; streamed NDJSON is flushed per event.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.environ.get("GZIP_MIN_BYTES", 1024)),
+    compresslevel=int(os.environ.get("GZIP_LEVEL", 6)),
+)
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    # Per-stage timings for this request -> Server-Timing header + /metrics histograms.
+    # (Streamed responses only report the stages finished before the first byte.)
+    with track_request() as timings:
+        response = await call_next(request)
+        response.headers["Server-Timing"] = timings.server_timing()
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - timings.start,
+        request.method,
+        route.path if route is not None else "unmatched",
+        str(response.status_code)
+    )
+    return response
+
+def json_response(result: AnalysisResult, accept: Optional[str] = None) -> Response:
+    # Serialized here (not by FastAPI) so the time shows up as its own stage
+    media_type = negotiate(accept)
+    if media_type is not None:
+        return columnar_response([("", result)], media_type)
+    with stage(SERIALIZATION):
+        body = result.model_dump_json()
+    return Response(body, media_type="application/json", headers={"Vary": "Accept"})
+
+def columnar_response(items: List[Tuple[str, AnalysisResult]], media_type: str) -> Response:
+    """Analyses as columnar tables (see columnar.py), for dashboards loading many scenes at once."""
+    with stage(SERIALIZATION):
+        body = encode_columnar(result_tables(items), media_type)
+    return Response(body, media_type=media_type, headers={"Vary": "Accept"})
+
 @app.get("/api")
 @app.get("/api/")
 @app.get("/")
@@ -26,41 +119,516 @@ def read_root():
 def health_check():
     return {"status": "ok", "service": "backend"}
 
+@app.get("/api/warmup")
+@app.post("/api/warmup")
+async def warmup(llm: bool = True):
+    """
+    Primes a fresh instance (point the platform's warm-up / cron ping here): local engine,
+    serialization and tokenizer, plus the OpenAI SDK and client when a key is set and `llm`.
+    Health checks and mock analyses never import the SDK on their own.
+    """
+    pool = app.state.llm if llm else None
+    timings = await run_in_threadpool(warm_up, pool)
+    return {"status": "warm", "llm": pool is not None, "elapsed_ms": timings}
+
 @app.post("/api/analyze", response_model=AnalysisResult)
 @app.post("/analyze", response_model=AnalysisResult)
 
-def analyze_script_endpoint(
+async def analyze_script_endpoint(
     script_text: str = Body(..., embed=True),
     use_mock: bool = Body(False, embed=True),
-    budget_mode: str = Body("Medium", embed=True)
+    budget_mode: str = Body("Medium", embed=True),
+    project_id: Optional[str] = Body(None, embed=True),
+    summarize_dialogue: bool = Body(False, embed=True),
+    draft: Optional[int] = Body(None, embed=True),
+    accept: Optional[str] = Header(None)
 ):
     """
     Analyzes a script segment for continuity errors and financial risk.
+    Identical resubmissions (same script, budget mode, model and prompt) are served from the cache.
+    With a `project_id`, only scenes changed since the project's previous draft (plus their
+    neighbours) are re-analyzed; `recomputed_scene_ids` in the response lists them, and the
+    result is saved to the project store as the next draft (or as `draft`).
+    `summarize_dialogue` lets the LLM path send long dialogue runs as short summaries (fewer tokens).
+    On the LLM path, scenes nearly identical to one analyzed before (any draft or project) reuse
+    that analysis instead of going to the model; `reused_scenes` lists them.
+    If the LLM has not answered within the governor's SLO (LLM_SLO_SECONDS), the internal engine's
+    result is returned and the LLM analysis finishes in the background, filling the cache (and
+    saving the project draft) when it lands. Over the daily LLM budget, the internal engine answers.
+    Send `Accept: application/vnd.continuityguard.columnar+json` (or `+msgpack`) for the columnar form.
     """
-    try:
-        api_key = os.environ.get("OPENAI_API_KEY")
-        
-        # Priority 1: Requested Mock
-        if use_mock:
-             return mock_analyze_script(script_text, budget_mode)
-        
+    llm = app.state.llm
+    use_llm = llm is not None and not use_mock
+    engine_name = LLM_MODEL if use_llm else LOCAL_ENGINE
+
+    key = analysis_cache_key(script_text, budget_mode, use_llm, summarize_dialogue and use_llm)
+
+    if analysis_cache is not None:
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            # Nothing was recomputed for an exact hit
+            cached.recomputed_scene_ids = [] if project_id else None
+            if project_id:
+                project_snapshots.set(project_id, budget_mode, engine_name, hash_scenes(script_text), cached)
+                await save_draft(project_id, cached, budget_mode, engine_name, script_text, draft)
+            return json_response(cached, accept)
+
+    async def run_engine(text: str) -> AnalysisResult:
+        # Priority 1: Requested Mock / Priority 3: No Key -> Internal Engine
+        # (CPU-bound, so it runs off the event loop)
+        if not use_llm:
+            return await run_in_threadpool(mock_analyze_script, text, budget_mode)
         # Priority 2: OpenAI Analysis
-        if api_key:
-            try:
-                return analyze_script(script_text, api_key, budget_mode)
-            except Exception as e:
-                print(f"OpenAI Analysis Failed: {e}. Falling back to internal engine.")
-                # Fallback to internal engine (mock) so user gets result
-                return mock_analyze_script(script_text, budget_mode)
-        
-        # Priority 3: No Key -> Internal Engine
-        return mock_analyze_script(script_text, budget_mode)
+        return await analyze_script_async(text, llm, budget_mode, summarize_dialogue=summarize_dialogue)
+
+    near_duplicates = None
+    if use_llm and scene_index is not None:
+        async def near_duplicates(versions):
+            return await run_in_threadpool(
+                scene_index.find_all, [(v.scene_id, v.span.body) for v in versions], engine_name, budget_mode
+            )
+
+    async def analyze() -> AnalysisResult:
+        versions = None
+        if project_id:
+            previous = project_snapshots.get(project_id, budget_mode, engine_name)
+            result, versions = await analyze_incremental(script_text, run_engine, previous, near_duplicates)
+            project_snapshots.set(project_id, budget_mode, engine_name, versions, result)
+            await save_draft(project_id, result, budget_mode, engine_name, script_text, draft)
+        elif near_duplicates is not None:
+            result, versions = await analyze_incremental(script_text, run_engine, None, near_duplicates)
+            if not result.reused_scenes:
+                result.recomputed_scene_ids = None
+        else:
+            result = await run_engine(script_text)
+        if near_duplicates is not None:
+            await index_scenes(versions, result, budget_mode, engine_name, project_id)
+        if analysis_cache is not None:
+            # Per-request fields: a cache hit recomputes nothing and sends no prompt
+            analysis_cache.set(key, result.model_copy(update={"recomputed_scene_ids": None, "prompt_compaction": None}))
+        return result
 
+    task = asyncio.ensure_future(analyze())
+    if use_llm and llm.governor.slo_seconds:
+        try:
+            await asyncio.wait({task}, timeout=llm.governor.slo_seconds)
+        finally:
+            if not task.done():
+                # Missed the SLO (or the client left): the analysis keeps running and stores its result
+                llm.governor.detach(task)
+        if not task.done():
+            print(f"OpenAI Analysis exceeded the {llm.governor.slo_seconds:g}s SLO. Answering from internal engine.")
+            LLM_FALLBACKS.inc("slo")
+            return json_response(await run_in_threadpool(mock_analyze_script, script_text, budget_mode), accept)
+
+    try:
+        result = await task
+    except Exception as e:
+        if use_llm:
+            print(f"OpenAI Analysis Failed: {e}. Falling back to internal engine.")
+            LLM_FALLBACKS.inc("analyze")
+        else:
+            print(f"Critical Error: {e}")
+        # Fallback to internal engine (mock) so user gets result.
+        # Not cached: the next request should retry the LLM.
+        return json_response(await run_in_threadpool(mock_analyze_script, script_text, budget_mode), accept)
+
+    return json_response(result, accept)
+
+async def index_scenes(versions, result: AnalysisResult, budget_mode: str, engine: str, project_id: Optional[str]) -> None:
+    """Adds the scenes the model analyzed (not the reused ones) to the near-duplicate index."""
+    reused = {r.scene_id for r in result.reused_scenes or []}
+    scenes = {scene.id: scene for scene in result.scenes}
+    pairs = [(v.span.body, scenes[v.scene_id]) for v in versions if v.scene_id in scenes and v.scene_id not in reused]
+    try:
+        await run_in_threadpool(scene_index.add, pairs, result.compliance_risks, engine, budget_mode, project_id)
+    except Exception as e:
+        # Reuse is an optimization; never fail the request over it
+        print(f"Scene Indexing Failed: {e}")
+
+async def save_draft(project_id: str, result: AnalysisResult, budget_mode: str, engine: str, script_text: str, draft: Optional[int]) -> None:
+    try:
+        await run_in_threadpool(
+            project_store.save, project_id, result, budget_mode, engine, sha256(normalize_script(script_text)), draft
+        )
     except Exception as e:
-        print(f"Critical Error: {e}")
-        # Last resort fallback
-        return mock_analyze_script(script_text, budget_mode)
+        # The analysis itself succeeded; don't fail the request over the history
+        print(f"Saving Draft Failed: {e}")
+
+@app.post("/api/analyze/compact")
+@app.post("/analyze/compact")
+async def compact_preview_endpoint(
+    script_text: str = Body(..., embed=True),
+    summarize_dialogue: bool = Body(False, embed=True),
+    include_text: bool = Body(False, embed=True)
+):
+    """
+    Dry run of the LLM prompt preparation: tokens before/after compaction, chunk count and
+    the per-request token budget, without calling the model. `include_text` adds the chunk prompts.
+    """
+    chunks = await run_in_threadpool(chunk_script, script_text, script_token_limit(), summarize_dialogue=summarize_dialogue)
+    report = compaction_report(chunks).as_dict()
+    report["requests"] = [
+        {"scene_ids": chunk.scene_ids, "raw_tokens": chunk.raw_tokens, "tokens": chunk.tokens,
+         **({"text": chunk.text} if include_text else {})}
+        for chunk in chunks
+    ]
+    return report
+
+# --- FILE UPLOADS ---
+
+async def receive_script_file(request: Request, filename: Optional[str]) -> Tuple[BinaryIO, Optional[str], Optional[str]]:
+    """
+    The uploaded screenplay as a seekable file: the `file` field of a multipart/form-data
+    upload, or the raw request body. Returns (file, filename, content type).
+    """
+    content_type = request.headers.get("content-type", "")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=str(UploadTooLarge()))
+    if content_type.startswith("multipart/form-data"):
+        try:
+            # Parsed from the size-limited body stream (request.form() would read it all first);
+            # parts are spooled to disk past 1 MB by Starlette
+            form = await MultiPartParser(request.headers, limit_upload(request.stream()), max_files=1, max_fields=10).parse()
+        except AssertionError:
+            raise HTTPException(status_code=415, detail="Multipart uploads need python-multipart; send the file as the request body.")
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except MultiPartException as e:
+            raise HTTPException(status_code=400, detail=e.message)
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            await form.close()
+            raise HTTPException(status_code=400, detail="Missing 'file' field.")
+        return upload.file, filename or upload.filename, upload.content_type
+    try:
+        return await spool_upload(request.stream()), filename, content_type.split(";")[0] or None
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@app.post("/api/analyze/upload", response_model=AnalysisResult)
+@app.post("/analyze/upload", response_model=AnalysisResult)
+async def analyze_upload_endpoint(
+    request: Request,
+    budget_mode: str = Query("Medium"),
+    use_mock: bool = Query(False),
+    project_id: Optional[str] = None,
+    script_format: Optional[str] = Query(None, alias="format", description="pdf, fdx or fountain (detected when omitted)"),
+    filename: Optional[str] = None,
+    accept: Optional[str] = Header(None)
+):
+    """
+    Analyzes an uploaded screenplay file (PDF, Final Draft FDX, Fountain or plain text), sent as
+    multipart/form-data (`file` field) or as the raw body. The file is parsed into scenes as it is
+    read; the local engine analyzes that scene stream directly, without building the script text.
+    The LLM engine and project drafts need the text, so for those it is rebuilt once and the
+    request continues as /api/analyze.
+    """
+    file, filename, content_type = await receive_script_file(request, filename)
+    try:
+        def spans():
+            return iter_file_spans(file, UNKNOWN_SCENE_HEADER, filename, content_type, script_format)
+
+        if (app.state.llm is not None and not use_mock) or project_id:
+            script_text = await run_in_threadpool(lambda: spans_text(spans()))
+            return await analyze_script_endpoint(
+                script_text=script_text, use_mock=use_mock, budget_mode=budget_mode, project_id=project_id,
+                summarize_dialogue=False, draft=None, accept=accept
+            )
+        result = await run_in_threadpool(lambda: mock_analyze_spans(spans(), budget_mode))
+        return json_response(result, accept)
+    except IngestError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    finally:
+        file.close()
+
+@app.post("/api/ingest", response_class=PlainTextResponse)
+async def ingest_endpoint(
+    request: Request,
+    script_format: Optional[str] = Query(None, alias="format", description="pdf, fdx or fountain (detected when omitted)"),
+    filename: Optional[str] = None
+):
+    """
+    Screenplay file -> plain screenplay text (scenes only), streamed back as it is parsed.
+    Lets the frontend load PDF / FDX scripts into the text editor.
+    """
+    file, filename, content_type = await receive_script_file(request, filename)
+    try:
+        spans = iter_file_spans(file, UNKNOWN_SCENE_HEADER, filename, content_type, script_format)
+        # Parse the first scene now, so unreadable files still get an error status
+        first = await run_in_threadpool(next, spans, None)
+    except IngestError as e:
+        file.close()
+        raise HTTPException(status_code=415, detail=str(e))
+
+    def body():
+        try:
+            if first is not None:
+                yield first[1].body
+                for _, span in spans:
+                    yield span.body
+        except IngestError as e:
+            print(f"Ingest Failed: {e}")
+        finally:
+            file.close()
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+@app.post("/api/analyze/stream")
+@app.post("/analyze/stream")
+async def analyze_stream_endpoint(
+    script_text: str = Body(..., embed=True),
+    use_mock: bool = Body(False, embed=True),
+    budget_mode: str = Body("Medium", embed=True)
+):
+    """
+    Same analysis as /api/analyze, streamed as NDJSON events (see streaming.py):
+    scenes, errors and risks as soon as they are produced, then a final summary.
+    """
+    llm = None if use_mock else app.state.llm
+    key = analysis_cache_key(script_text, budget_mode, llm is not None)
+
+    cached = analysis_cache.get(key) if analysis_cache is not None else None
+
+    def store(result: AnalysisResult):
+        if analysis_cache is not None:
+            analysis_cache.set(key, result)
+
+    async def body():
+        if cached is not None:
+            for item in result_events(cached, "cache"):
+                yield to_ndjson(item)
+            return
+        async for item in stream_analysis(script_text, budget_mode, llm, on_complete=store):
+            yield to_ndjson(item)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.post("/api/analyze/batch", response_model=BatchResponse)
+@app.post("/analyze/batch", response_model=BatchResponse)
+async def analyze_batch_endpoint(request: BatchRequest, accept: Optional[str] = Header(None)):
+    """
+    Analyzes many scripts/drafts in one request (e.g. nightly slate sweeps).
+    Returns per-script results or errors with timings, plus a slate-level budget and risk summary.
+    With a columnar Accept type, returns the successful results as columnar tables instead.
+    """
+    llm = None if request.use_mock else app.state.llm
+    response = await run_batch(request.scripts, llm, analysis_cache)
+    media_type = negotiate(accept)
+    if media_type is not None:
+        return columnar_response([(item.script_id, item.result) for item in response.results if item.result is not None], media_type)
+    return response
+
+@app.post("/api/schedule", response_model=SchedulePlan)
+@app.post("/schedule", response_model=SchedulePlan)
+async def schedule_endpoint(request: ScheduleRequest):
+    """
+    Optimized shooting schedule for analyzed scenes: shoot order, per-day plan (call/wrap,
+    locations, cast) and the schedule risks left in it. Feeds the Shooting Commander call sheet.
+    """
+    try:
+        return await run_in_threadpool(
+            optimize_schedule,
+            request.scenes,
+            request.cast,
+            request.daylight_hours,
+            request.night_hours,
+            request.turnaround_hours,
+            max_days=MAX_SHOOT_DAYS
+        )
+    except ScheduleTooLong as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.post("/api/storyboard", response_model=StoryboardResponse)
+@app.post("/storyboard", response_model=StoryboardResponse)
+async def storyboard_endpoint(request: StoryboardRequest):
+    """
+    Storyboard image for a scene or fix. Boards are stored by description + style, so
+    repeat views come straight from disk; identical requests in flight share one image call.
+    """
+    return await app.state.storyboards.get(request)
+
+@app.post("/api/storyboard/batch", response_model=StoryboardBatchResponse)
+@app.post("/storyboard/batch", response_model=StoryboardBatchResponse)
+async def storyboard_batch_endpoint(request: StoryboardBatchRequest):
+    """Boards for many scenes at once, generated concurrently under the image rate limit."""
+    start = time.perf_counter()
+    results = await app.state.storyboards.get_many(request.boards, request.use_mock)
+    return StoryboardBatchResponse(results=results, elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+
+@app.get("/api/storyboard/images/{key}.png")
+@app.get("/storyboard/images/{key}.png")
+def storyboard_image(key: str):
+    path = app.state.storyboards.store.image_path(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Storyboard not found")
+    # Content-addressed: a key always names the same image
+    return FileResponse(path, media_type="image/png", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+@app.get("/api/storyboard/stats")
+def storyboard_stats():
+    return app.state.storyboards.stats()
+
+async def run_analysis_job(params: dict, progress) -> AnalysisResult:
+    """Job runner for /api/jobs/analyze: same engine choice, fallback and caching as /api/analyze."""
+    script_text, budget_mode = params["script_text"], params["budget_mode"]
+    llm = None if params["use_mock"] else app.state.llm
+    key = analysis_cache_key(script_text, budget_mode, llm is not None)
+    total = sum(1 for _ in iter_scenes(script_text))
+
+    if analysis_cache is not None:
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            progress(total, total)
+            return cached
+
+    if llm is None:
+        result = await run_in_threadpool(mock_analyze_script, script_text, budget_mode)
+    else:
+        done = 0
+
+        def on_chunk(chunk):
+            nonlocal done
+            done += len(chunk.scene_ids)
+            progress(done, total)
+
+        try:
+            # Queued work: interactive analyses go first
+            result = await analyze_script_async(script_text, llm, budget_mode, on_chunk=on_chunk, lane=BATCH)
+        except Exception as e:
+            print(f"OpenAI Analysis Failed: {e}. Falling back to internal engine.")
+            LLM_FALLBACKS.inc("job")
+            result = await run_in_threadpool(mock_analyze_script, script_text, budget_mode)
+            progress(total, total)
+            return result
+
+    progress(total, total)
+    if analysis_cache is not None:
+        analysis_cache.set(key, result)
+    return result
+
+@app.post("/api/jobs/analyze")
+async def submit_analysis_job(
+    script_text: str = Body(..., embed=True),
+    use_mock: bool = Body(False, embed=True),
+    budget_mode: str = Body("Medium", embed=True)
+):
+    """
+    Queues an analysis and returns a job id immediately; poll GET /api/jobs/{job_id}.
+    Identical submissions while a job is still queued/running share that job.
+    """
+    use_llm = app.state.llm is not None and not use_mock
+    job_id, deduplicated = app.state.jobs.submit(
+        "analyze",
+        {"script_text": script_text, "budget_mode": budget_mode, "use_mock": use_mock},
+        dedupe_key=analysis_cache_key(script_text, budget_mode, use_llm),
+        total=sum(1 for _ in iter_scenes(script_text))
+    )
+    return {"job_id": job_id, "deduplicated": deduplicated}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = app.state.jobs.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# --- PROJECT HISTORY ---
+
+@app.get("/api/projects")
+def list_projects():
+    """Every saved project with its latest draft's budget and risk score."""
+    return project_store.projects()
+
+@app.get("/api/projects/{project_id}/drafts")
+def list_drafts(project_id: str):
+    return project_store.drafts(project_id)
+
+@app.get("/api/projects/{project_id}/drafts/{draft}", response_model=AnalysisResult)
+def get_draft(project_id: str, draft: int, accept: Optional[str] = Header(None)):
+    result = project_store.result(project_id, draft)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return json_response(result, accept)
+
+@app.get("/api/slate")
+def get_slate(accept: Optional[str] = Header(None)):
+    """
+    Latest draft of every project as one set of columnar tables (the Executive Dashboard's slate
+    load). Columnar JSON unless the client accepts the MessagePack form.
+    """
+    items = project_store.latest_results()
+    return columnar_response(items, negotiate(accept) or COLUMNAR_JSON)
+
+@app.post("/api/projects/{project_id}/drafts")
+def save_project_draft(
+    project_id: str,
+    result: AnalysisResult = Body(..., embed=True),
+    budget_mode: Optional[str] = Body(None, embed=True),
+    draft: Optional[int] = Body(None, embed=True)
+):
+    """Saves an analysis produced elsewhere (batch, jobs, stream) as a draft of the project."""
+    return project_store.save(project_id, result, budget_mode, engine="imported", draft=draft)
+
+@app.get("/api/projects/{project_id}/delta")
+def draft_delta(project_id: str, from_draft: int = Query(...), to_draft: int = Query(...)):
+    """Budget delta between two drafts: totals, per expense category and per scene."""
+    delta = project_store.draft_delta(project_id, from_draft, to_draft)
+    if delta is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return delta
+
+@app.get("/api/query/scenes")
+def query_scenes(
+    time: Optional[str] = Query(None, description="DAY or NIGHT"),
+    int_ext: Optional[str] = Query(None, description="INT, EXT or INT/EXT"),
+    min_cost: Optional[str] = Query(None, description="e.g. '50 Lakhs', '1.5 Cr'"),
+    project_id: Optional[str] = None,
+    all_drafts: bool = False,
+    limit: int = Query(500, le=5000)
+):
+    """e.g. all night exteriors over ₹50L across the slate: ?time=NIGHT&int_ext=EXT&min_cost=50 Lakhs"""
+    return project_store.find_scenes(time, int_ext, parse_paise(min_cost) if min_cost else 0, project_id, not all_drafts, limit)
+
+@app.get("/api/query/compliance")
+def query_compliance(
+    rule: Optional[str] = Query(None, description="AWBI, COTPA, POCSO, RELIGION or OTHER"),
+    since: Optional[str] = Query(None, description="ISO date, e.g. 2026-10-01"),
+    until: Optional[str] = Query(None, description="ISO date (exclusive)"),
+    project_id: Optional[str] = None,
+    limit: int = Query(500, le=5000)
+):
+    """e.g. every AWBI hit this month: ?rule=AWBI&since=2026-10-01"""
+    try:
+        return project_store.find_compliance(rule, since, until, project_id, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since/until must be ISO dates")
+
+@app.get("/api/llm/governor")
+def llm_governor_state():
+    """Rate-limit buckets, lane queues, today's LLM spend and SLO fallbacks (per process)."""
+    if app.state.llm is None:
+        return {"enabled": False}
+    return {"enabled": True, **app.state.llm.governor.state()}
+
+@app.get("/api/scene-index/stats")
+def scene_index_stats():
+    if scene_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **scene_index.stats()}
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    if analysis_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **analysis_cache.stats()}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition: request/stage/LLM latency histograms, token, fallback and cache counters."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,317 @@
+import codecs
+import mmap
+import os
+import re
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from typing import AsyncIterator, BinaryIO, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from segmenter import SCENE_HEADER_PATTERN, SceneSpan
+from compaction import PAGE_FURNITURE_PATTERN
+
+# --- SCRIPT INGESTION ---
+# Screenplay files (PDF, Final Draft .fdx, Fountain / plain text) are read line by line from a
+# file object and cut into scene spans as they go: at any moment only the current scene (plus a
+# PDF page, or one FDX paragraph) is in memory, never the whole script or an uppercase copy of
+# it. iter_path_spans() reads local files through mmap, so even very large files are paged in
+# by the OS instead of being loaded up front. Span ids and bodies match analyzer.iter_local_spans
+# for the same text, so the local engine gives the same result either way.
+
+FORMAT_PDF = "pdf"
+FORMAT_FDX = "fdx"
+FORMAT_FOUNTAIN = "fountain"  # Also plain-text screenplays: Fountain markup is optional
+FORMATS = (FORMAT_PDF, FORMAT_FDX, FORMAT_FOUNTAIN)
+
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 25 * 1024 * 1024))
+# Uploads past this size are spooled to a temp file instead of memory
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+
+# Text before the first slugline is kept (up to this much) for the no-slugline fallback only
+PREAMBLE_MAX_CHARS = 256 * 1024
+
+# Layout used when rebuilding FDX paragraphs as screenplay text (see continuity.DIALOGUE_INDENT)
+CUE_INDENT = " " * 20
+PARENTHETICAL_INDENT = " " * 15
+DIALOGUE_INDENT = " " * 10
+FDX_SKIPPED_ELEMENTS = ("TitlePage", "HeaderAndFooter")
+
+FOUNTAIN_HEADING_PATTERN = re.compile(r"^[ \t]*(?:INT\.?/EXT|I/E|EST|INT|EXT)[. \t]", re.IGNORECASE)
+FOUNTAIN_SCENE_NUMBER_PATTERN = re.compile(r"[ \t]*#[^#\s]*#[ \t]*$")
+FOUNTAIN_TITLE_KEY_PATTERN = re.compile(
+    r"^(?:Title|Credit|Authors?|Source|Draft date|Date|Contact|Copyright|Notes|Revision)[ \t]*:", re.IGNORECASE
+)
+FOUNTAIN_MARKUP_PATTERN = re.compile(r"/\*|\*/|\[\[|\]\]")
+
+
+class IngestError(ValueError):
+    """The upload can't be read as a screenplay (unsupported format, missing parser, too large)."""
+
+
+class UploadTooLarge(IngestError):
+    def __init__(self, limit: int = MAX_UPLOAD_BYTES):
+        super().__init__(f"Upload exceeds the {limit / (1024 * 1024):.1f} MB limit.")
+
+
+class ScriptLine(NamedTuple):
+    text: str  # Including the trailing newline
+    heading: bool = False  # Forced scene heading (FDX "Scene Heading", Fountain ".HEADING")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str], head: bytes) -> str:
+    """Format from the first bytes, then the file extension / content type; plain text otherwise."""
+    if head.startswith(b"%PDF"):
+        return FORMAT_PDF
+    if b"<FinalDraft" in head:
+        return FORMAT_FDX
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".pdf") or content_type == "application/pdf":
+        return FORMAT_PDF
+    if name.endswith(".fdx") or content_type in ("application/xml", "text/xml"):
+        return FORMAT_FDX
+    return FORMAT_FOUNTAIN
+
+
+# --- LINE READERS ---
+
+def iter_text_lines(file: BinaryIO) -> Iterator[ScriptLine]:
+    """UTF-8 text (BOM and CRLF tolerated), one line at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for raw in iter(file.readline, b""):
+        line = decoder.decode(raw)
+        if line.endswith("\r\n"):
+            line = line[:-2] + "\n"
+        yield ScriptLine(line)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield ScriptLine(tail)
+
+
+def iter_fountain_lines(file: BinaryIO) -> Iterator[ScriptLine]:
+    """
+    Fountain markup to plain screenplay lines: drops the title page, boneyard /* */, [[notes]],
+    sections, synopses and page breaks; forced headings (".FLASHBACK") become scene headings and
+    forced elements (@NAME, !action, > transitions, ~lyrics) lose their marker.
+    Scripts without any Fountain markup pass through unchanged.
+    """
+    lines = iter_text_lines(file)
+    in_title_page = None  # Unknown until the first non-blank line
+    hidden = None  # Closing marker while inside a boneyard or note
+    for line in lines:
+        text = line.text
+        if in_title_page is None and text.strip():
+            in_title_page = bool(FOUNTAIN_TITLE_KEY_PATTERN.match(text))
+        if in_title_page:
+            if not text.strip():
+                in_title_page = False
+            continue
+
+        if hidden is not None or FOUNTAIN_MARKUP_PATTERN.search(text):
+            was_hidden = hidden is not None
+            text, hidden = _strip_hidden(text, hidden)
+            if not text.strip() and (was_hidden or line.text.strip()):
+                continue  # The whole line was a note / boneyard
+
+        stripped = text.strip()
+        if stripped.startswith(("#", "=")):
+            continue  # Section, synopsis or page break (===)
+        if stripped.startswith(".") and len(stripped) > 1 and stripped[1] != ".":
+            yield ScriptLine(FOUNTAIN_SCENE_NUMBER_PATTERN.sub("", stripped[1:]) + "\n", heading=True)
+            continue
+        if FOUNTAIN_HEADING_PATTERN.match(text):
+            yield ScriptLine(FOUNTAIN_SCENE_NUMBER_PATTERN.sub("", text.rstrip("\n")) + "\n", heading=True)
+            continue
+        if stripped[:1] in ("@", "!", "~"):
+            text = text.replace(stripped[0], "", 1)
+        elif stripped.startswith(">"):
+            text = stripped.lstrip(">").rstrip("<").strip() + "\n"
+        yield ScriptLine(text)
+
+
+def _strip_hidden(text: str, hidden: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Removes boneyard / note spans from a line; returns the rest and the marker still open."""
+    out = []
+    i = 0
+    while i < len(text):
+        if hidden is not None:
+            end = text.find(hidden, i)
+            if end < 0:
+                return "".join(out) + ("\n" if text.endswith("\n") else ""), hidden
+            i = end + 2
+            hidden = None
+            continue
+        starts = [(text.find(marker, i), closing) for marker, closing in (("/*", "*/"), ("[[", "]]"))]
+        starts = [(pos, closing) for pos, closing in starts if pos >= 0]
+        if not starts:
+            out.append(text[i:])
+            break
+        pos, hidden = min(starts)
+        out.append(text[i:pos])
+        i = pos + 2
+    return "".join(out), hidden
+
+
+def iter_fdx_lines(file: BinaryIO) -> Iterator[ScriptLine]:
+    """
+    Final Draft XML, one <Paragraph> at a time (parsed elements are cleared as they go),
+    laid out as a plain-text screenplay: cues and dialogue indented, blank lines between blocks.
+    """
+    in_dialogue = False
+    skipped = 0  # Depth inside title page / header and footer paragraphs
+    try:
+        for event, element in ElementTree.iterparse(file, events=("start", "end")):
+            if element.tag in FDX_SKIPPED_ELEMENTS:
+                skipped += 1 if event == "start" else -1
+                continue
+            if event == "start" or element.tag != "Paragraph":
+                continue
+            if skipped:
+                element.clear()
+                continue
+            kind = element.get("Type", "Action")
+            text = " ".join("".join(t.text or "" for t in element.iter("Text")).split())
+            element.clear()
+            if not text:
+                continue
+            if kind == "Scene Heading":
+                yield ScriptLine("\n")
+                yield ScriptLine(text.upper() + "\n", heading=True)
+                in_dialogue = False
+            elif kind == "Character":
+                yield ScriptLine("\n")
+                yield ScriptLine(CUE_INDENT + text.upper() + "\n")
+                in_dialogue = True
+            elif kind == "Parenthetical" and in_dialogue:
+                yield ScriptLine(PARENTHETICAL_INDENT + text + "\n")
+            elif kind == "Dialogue" and in_dialogue:
+                yield ScriptLine(DIALOGUE_INDENT + text + "\n")
+            else:
+                yield ScriptLine("\n")
+                yield ScriptLine(text + "\n")
+                in_dialogue = False
+    except ElementTree.ParseError as e:
+        raise IngestError(f"Not a readable Final Draft file: {e}")
+
+
+def iter_pdf_lines(file: BinaryIO) -> Iterator[ScriptLine]:
+    """
+    PDF text one page at a time (layout mode keeps the cue / dialogue indentation).
+    Page numbers and (CONTINUED)/(MORE) furniture are dropped.
+    """
+    try:
+        import pypdf  # Optional, and slow to import: loaded with the first PDF
+    except ImportError:
+        raise IngestError("PDF uploads need the pypdf package; upload Fountain or FDX instead.")
+    try:
+        reader = pypdf.PdfReader(file)
+        pages = reader.pages
+    except Exception as e:
+        raise IngestError(f"Not a readable PDF: {e}")
+    for page in pages:
+        try:
+            text = page.extract_text(extraction_mode="layout")
+        except TypeError:  # pypdf < 4 has no layout mode
+            text = page.extract_text()
+        for line in (text or "").split("\n"):
+            if PAGE_FURNITURE_PATTERN.match(line.strip()):
+                continue
+            yield ScriptLine(line.rstrip() + "\n")
+
+
+LINE_READERS = {FORMAT_PDF: iter_pdf_lines, FORMAT_FDX: iter_fdx_lines, FORMAT_FOUNTAIN: iter_fountain_lines}
+
+
+# --- SCENE SPANS ---
+
+def iter_line_spans(lines: Iterable[ScriptLine], unknown_header: str) -> Iterator[Tuple[str, SceneSpan]]:
+    """
+    (scene id, span) from a line stream, one scene held at a time. Same rules as the segmenter
+    (a scene runs from its slugline to the next one; text before the first slugline is not a
+    scene), including the whole-text `unknown_header` scene when there are no sluglines.
+    """
+    scene_id = 0
+    offset = 0
+    start = 0
+    header = None
+    body = []
+    preamble = []
+    preamble_chars = 0
+    for line in lines:
+        if line.heading or SCENE_HEADER_PATTERN.match(line.text):
+            if header is not None:
+                scene_id += 1
+                yield str(scene_id), SceneSpan(header, start, offset, "".join(body))
+            header = line.text.strip()
+            start = offset
+            body = []
+            preamble = None
+        if header is not None:
+            body.append(line.text)
+        elif preamble is not None and preamble_chars < PREAMBLE_MAX_CHARS:
+            preamble.append(line.text)
+            preamble_chars += len(line.text)
+        offset += len(line.text)
+
+    if header is not None:
+        yield str(scene_id + 1), SceneSpan(header, start, offset, "".join(body))
+    elif preamble:
+        text = "".join(preamble)
+        if len(text) > 50:
+            yield "1", SceneSpan(unknown_header, 0, len(text), text)
+
+
+def iter_file_spans(
+    file: BinaryIO,
+    unknown_header: str,
+    filename: Optional[str] = None,
+    content_type: Optional[str] = None,
+    script_format: Optional[str] = None
+) -> Iterator[Tuple[str, SceneSpan]]:
+    """Scene spans from an open, seekable binary file (format detected unless `script_format`)."""
+    if script_format is None:
+        head = file.read(1024)
+        file.seek(0)
+        script_format = detect_format(filename, content_type, head)
+    if script_format not in LINE_READERS:
+        raise IngestError(f"Unsupported format '{script_format}'; expected one of {', '.join(FORMATS)}.")
+    return iter_line_spans(LINE_READERS[script_format](file), unknown_header)
+
+
+def iter_path_spans(path: str, unknown_header: str, script_format: Optional[str] = None) -> Iterator[Tuple[str, SceneSpan]]:
+    """Scene spans from a local file, memory-mapped (pages are loaded by the OS as the parse reaches them)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter_file_spans(mapped, unknown_header, filename=path, script_format=script_format)
+
+
+async def limit_upload(chunks: AsyncIterator[bytes], limit: int = MAX_UPLOAD_BYTES) -> AsyncIterator[bytes]:
+    """Passes a request body through, raising UploadTooLarge as soon as more than `limit` bytes came in."""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            raise UploadTooLarge(limit)
+        yield chunk
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], limit: int = MAX_UPLOAD_BYTES) -> BinaryIO:
+    """
+    Request body -> seekable file, chunk by chunk (memory up to UPLOAD_SPOOL_BYTES, then disk).
+    Raises UploadTooLarge past `limit` bytes.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    try:
+        async for chunk in limit_upload(chunks, limit):
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+def spans_text(spans: Iterable[Tuple[str, SceneSpan]]) -> str:
+    """Script text back from spans (for the engines that need the whole text, e.g. the LLM)."""
+    return "".join(span.body for _, span in spans)
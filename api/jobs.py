@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from schemas import AnalysisResult
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JOBS_MAX_CONCURRENCY = int(os.environ.get("JOBS_MAX_CONCURRENCY", 4))
+# A worker owns the jobs it queued or resumed for this long, renewed every third of it while it lives.
+# Other workers (and restarts) only resume jobs whose lease ran out.
+JOBS_LEASE_SECONDS = float(os.environ.get("JOBS_LEASE_SECONDS", 60))
+
+
+class JobStore:
+    """Jobs persisted in a local SQLite file, so status and results survive the request (and restarts)."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, dedupe_key TEXT, status TEXT NOT NULL,"
+            " params TEXT NOT NULL, done INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL,"
+            " owner TEXT, lease_until REAL)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:  # Job tables created before leases
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        self._conn.commit()
+
+    def create(self, kind: str, params: dict, dedupe_key: Optional[str], total: int = 0,
+               owner: Optional[str] = None, lease_seconds: float = JOBS_LEASE_SECONDS) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, status, params, total, created_at, updated_at, owner, lease_until)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, dedupe_key, QUEUED, json.dumps(params), total, now, now, owner, now + lease_seconds)
+            )
+            self._conn.commit()
+        return job_id
+
+    def find_in_flight(self, dedupe_key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (dedupe_key, QUEUED, RUNNING)
+            ).fetchone()
+        return row["id"] if row else None
+
+    def claim_expired(self, owner: str, lease_seconds: float) -> List[Tuple[str, dict]]:
+        """
+        Takes over queued/running jobs nobody holds a live lease on, and returns them.
+        Each claim is one conditional UPDATE, so of several workers only one gets a given job.
+        """
+        now = time.time()
+        claimed = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, params FROM jobs WHERE status IN (?, ?) AND (owner IS NULL OR lease_until < ?) ORDER BY created_at",
+                (QUEUED, RUNNING, now)
+            ).fetchall()
+            for row in rows:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET owner = ?, lease_until = ?, status = ?, done = 0, updated_at = ?"
+                    " WHERE id = ? AND status IN (?, ?) AND (owner IS NULL OR lease_until < ?)",
+                    (owner, now + lease_seconds, QUEUED, now, row["id"], QUEUED, RUNNING, now)
+                )
+                self._conn.commit()
+                if cursor.rowcount == 1:
+                    claimed.append((row["id"], json.loads(row["params"])))
+        return claimed
+
+    def renew(self, owner: str, lease_seconds: float) -> None:
+        """Extends the lease on every unfinished job `owner` holds."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time() + lease_seconds, owner, QUEUED, RUNNING)
+            )
+            self._conn.commit()
+
+    def release(self, owner: str) -> None:
+        """Expires `owner`'s leases at once (clean shutdown), so its unfinished jobs are resumed right away."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = 0 WHERE owner = ? AND status IN (?, ?)", (owner, QUEUED, RUNNING)
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": {"done": row["done"], "total": row["total"]},
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+
+# runner(params, progress) -> AnalysisResult, where progress(done, total) reports scenes analyzed so far
+JobRunner = Callable[[dict, Callable[[int, int], None]], Awaitable[AnalysisResult]]
+
+
+class JobQueue:
+    """
+    Runs analysis jobs in the background on the app's event loop.
+    At most `max_concurrency` jobs run at once (the rest wait queued), and an identical
+    submission while a job is still queued/running returns that job instead of a new one.
+    Jobs are leased to this queue (see JOBS_LEASE_SECONDS), so with several workers on one
+    job table each job runs in one of them only.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        runner: JobRunner,
+        max_concurrency: int = JOBS_MAX_CONCURRENCY,
+        lease_seconds: float = JOBS_LEASE_SECONDS
+    ):
+        self.store = store
+        self.runner = runner
+        self.max_concurrency = max_concurrency
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks = set()
+        self._heartbeat = asyncio.create_task(self._keep_leases())
+
+    def submit(self, kind: str, params: dict, dedupe_key: Optional[str] = None, total: int = 0) -> Tuple[str, bool]:
+        """Returns (job id, deduplicated)."""
+        if dedupe_key is not None:
+            existing = self.store.find_in_flight(dedupe_key)
+            if existing is not None:
+                return existing, True
+        job_id = self.store.create(kind, params, dedupe_key, total, self.owner, self.lease_seconds)
+        self._start(job_id, params)
+        return job_id, False
+
+    def resume_pending(self) -> int:
+        """Re-queues jobs left queued/running by a worker that is gone (its lease expired)."""
+        claimed = self.store.claim_expired(self.owner, self.lease_seconds)
+        for job_id, params in claimed:
+            self._start(job_id, params)
+        return len(claimed)
+
+    async def _keep_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                self.store.renew(self.owner, self.lease_seconds)
+                self.resume_pending()
+            except Exception as e:
+                print(f"Job Lease Renewal Failed: {e}")
+
+    def _start(self, job_id: str, params: dict) -> None:
+        task = asyncio.create_task(self._run(job_id, params))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: str, params: dict) -> None:
+        async with self._semaphore:
+            self.store.update(job_id, status=RUNNING)
+
+            def progress(done: int, total: int) -> None:
+                self.store.update(job_id, done=done, total=total)
+
+            try:
+                result = await self.runner(params, progress)
+            except Exception as e:
+                print(f"Job {job_id} Failed: {e}")
+                self.store.update(job_id, status=FAILED, error=str(e))
+                return
+            self.store.update(job_id, status=DONE, result=result.model_dump_json())
+
+    async def cancel_all(self) -> None:
+        self._heartbeat.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        self.store.release(self.owner)
+
+
+def job_store_from_env() -> JobStore:
+    """JOBS_DB_PATH: SQLite file for the job table (default: temp dir)."""
+    return JobStore(os.environ.get("JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "continuityguard_jobs.db")))
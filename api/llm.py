@@ -0,0 +1,96 @@
+import asyncio
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from governor import LLMGovernor
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# The openai SDK (and httpx under it) takes ~0.5s to import, more than the rest of the app.
+# It is imported on first use, so cold starts that only serve health checks, the local engine
+# or stored results never pay for it.
+
+# Client settings (env overridable)
+LLM_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", 120))  # Seconds per request
+LLM_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", 3))  # SDK retries 429/5xx/timeouts with exponential backoff
+LLM_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", 32))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 16))  # In-flight requests across all analyses
+
+
+class LLMPool:
+    """
+    One AsyncOpenAI client per process, shared by every request.
+    Keeps pooled keep-alive connections (no TLS setup per analysis) and caps
+    the number of in-flight completions with a semaphore. The client is built
+    on first use. Rate limits, lanes and the spend ceiling are on `governor`.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        governor: Optional[LLMGovernor] = None
+    ):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._client: Optional["AsyncOpenAI"] = None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.governor = governor if governor is not None else LLMGovernor()
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                    timeout=self.timeout
+                )
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+
+@lru_cache(maxsize=4)
+def get_sync_client(api_key: str) -> "OpenAI":
+    """Shared blocking client for the sync code paths (thread-safe, pooled connections)."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+
+
+@lru_cache(maxsize=None)
+def response_format_for(model_cls) -> dict:
+    """
+    Strict JSON-schema response_format for a pydantic model, built once.
+    (beta...parse() rebuilds the schema on every call, ~10ms of event-loop CPU per request.)
+    """
+    from openai.lib._pydantic import to_strict_json_schema
+
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model_cls.__name__, "schema": to_strict_json_schema(model_cls), "strict": True},
+    }
+
+
+def parse_completion(completion, model_cls):
+    message = completion.choices[0].message
+    if message.refusal:
+        raise ValueError(f"Model refused the request: {message.refusal}")
+    return model_cls.model_validate_json(message.content)
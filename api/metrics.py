@@ -0,0 +1,201 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# --- METRICS ---
+# Small in-process registry rendered in the Prometheus text format on /metrics
+# (no client library needed). Stage timings are also collected per request and sent
+# back in a Server-Timing header.
+
+# Pipeline stages timed with `stage(...)`
+SEGMENTATION = "segmentation"
+RULES = "rules"
+LLM_REQUEST = "llm_request"
+PARSE = "parse"
+AGGREGATION = "aggregation"
+SERIALIZATION = "serialization"
+
+# Seconds; spans a cached response (~1ms) up to a multi-chunk LLM analysis
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts (+Inf last), sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            counts, total, count = self._series.get(labels) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((labels, (list(c), s, n)) for labels, (c, s, n) in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total:g}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+REQUEST_SECONDS = Histogram(
+    "continuityguard_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram(
+    "continuityguard_stage_duration_seconds", "Time spent per pipeline stage within one request.", ("stage",)
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "continuityguard_llm_request_duration_seconds", "Latency of a single chat completion call.", ("outcome",)
+)
+LLM_TOKENS = Counter("continuityguard_llm_tokens_total", "Tokens used by chat completions.", ("kind",))
+LLM_FALLBACKS = Counter(
+    "continuityguard_llm_fallbacks_total", "Analyses that fell back from the LLM to the local engine.", ("source",)
+)
+LLM_ADMISSIONS = Counter(
+    "continuityguard_llm_admissions_total", "Chat completions admitted or refused by the LLM governor.", ("lane", "outcome")
+)
+LLM_QUEUE_SECONDS = Histogram(
+    "continuityguard_llm_queue_seconds", "Time a chat completion waited for the governor's rate limits.", ("lane",)
+)
+LLM_LATE_RESULTS = Counter(
+    "continuityguard_llm_late_results_total", "LLM analyses that finished after the latency SLO was answered locally.", ("outcome",)
+)
+CACHE_LOOKUPS = Counter("continuityguard_cache_lookups_total", "Analysis cache lookups.", ("result",))
+PROMPT_TOKENS = Counter(
+    "continuityguard_prompt_script_tokens_total", "Script tokens before (raw) and after (sent) prompt compaction.", ("kind",)
+)
+
+REGISTRY = [
+    REQUEST_SECONDS, STAGE_SECONDS, LLM_REQUEST_SECONDS, LLM_TOKENS, LLM_FALLBACKS,
+    LLM_ADMISSIONS, LLM_QUEUE_SECONDS, LLM_LATE_RESULTS, CACHE_LOOKUPS, PROMPT_TOKENS
+]
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# --- PER-REQUEST STAGE TIMINGS ---
+# Seconds per stage for the current request. Shared (by reference) with tasks and threadpool
+# calls started from the request, so concurrent chunk calls all add to the same totals.
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. `segmentation;dur=1.2, rules;dur=3.4, total;dur=9.1` (ms)."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def track_request() -> Iterator[RequestTimings]:
+    timings = RequestTimings()
+    token = _request_stages.set(timings.stages)
+    try:
+        yield timings
+    finally:
+        _request_stages.reset(token)
+        for name, seconds in timings.stages.items():
+            STAGE_SECONDS.observe(seconds, name)
+
+
+def add_stage_time(name: str, seconds: float) -> None:
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Adds the block's wall time to `name` for the current request (no-op outside a request)."""
+    if _request_stages.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(name, time.perf_counter() - start)
+
+
+def timed_iter(iterable: Iterable, name: str) -> Iterator:
+    """Yields from `iterable`, counting only the time spent producing each item as stage `name`."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            add_stage_time(name, time.perf_counter() - start)
+            return
+        add_stage_time(name, time.perf_counter() - start)
+        yield item
+
+
+def record_llm_call(seconds: float, completion=None) -> None:
+    """Latency and token usage for one chat completion (`completion` is None when the call failed)."""
+    LLM_REQUEST_SECONDS.observe(seconds, "ok" if completion is not None else "error")
+    add_stage_time(LLM_REQUEST, seconds)
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc("prompt", amount=usage.prompt_tokens or 0)
+        LLM_TOKENS.inc("completion", amount=usage.completion_tokens or 0)
+        # Prompt tokens served from the provider's prompt cache (a subset of "prompt")
+        details = getattr(usage, "prompt_tokens_details", None)
+        LLM_TOKENS.inc("cached_prompt", amount=getattr(details, "cached_tokens", None) or 0)
@@ -0,0 +1,46 @@
+import re
+
+# All budget math is done in integer paise (₹1 = 100 paise): exact, and cheap to sum.
+# Rupee strings ("₹ 12 Lakhs", "₹ 70k", "₹ 1.25 Cr") are display only.
+PAISE_PER_RUPEE = 100
+THOUSAND = 1000 * PAISE_PER_RUPEE
+LAKH = 100000 * PAISE_PER_RUPEE
+CRORE = 10000000 * PAISE_PER_RUPEE
+
+_AMOUNT = re.compile(r"\d+(?:\.\d+)?")
+
+
+def thousands(n: float) -> int:
+    return round(n * THOUSAND)
+
+
+def lakhs(n: float) -> int:
+    return round(n * LAKH)
+
+
+def parse_paise(cost_str: str) -> int:
+    """
+    Parses a rupee display string into paise.
+    Handles "₹ 12 Lakhs", "₹ 1.5 Cr", "₹ 2 Crores", "₹ 70k" and plain "₹ 2,000". Unparseable -> 0.
+    """
+    c_str = (cost_str or "").replace(",", "")
+    match = _AMOUNT.search(c_str)
+    if match is None:
+        return 0
+    value = float(match.group(0))
+    if "Cr" in c_str: return round(value * CRORE)
+    if "Lakh" in c_str or re.search(r"\d\s*L\b", c_str): return round(value * LAKH)
+    if re.search(r"\d\s*k\b", c_str, re.IGNORECASE): return round(value * THOUSAND)
+    return round(value * PAISE_PER_RUPEE)
+
+
+def _trim(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def format_paise(paise: int) -> str:
+    """Display string for an amount in paise, e.g. "₹ 12 Lakhs", "₹ 1.25 Cr", "₹ 70k", "₹ 0"."""
+    if paise >= CRORE: return f"₹ {_trim(paise / CRORE)} Cr"
+    if paise >= LAKH: return f"₹ {_trim(paise / LAKH)} Lakhs"
+    if paise >= THOUSAND: return f"₹ {_trim(paise / THOUSAND)}k"
+    return f"₹ {_trim(paise / PAISE_PER_RUPEE)}"
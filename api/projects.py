@@ -0,0 +1,350 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from schemas import AnalysisResult
+from money import format_paise
+
+# --- PROJECT STORE ---
+# Every analysis saved per project and draft, normalized into scenes, expense lines, continuity
+# errors and compliance hits, so dashboards can ask cross-draft / cross-project questions
+# ("night exteriors over ₹50L", "draft 4 vs 5", "AWBI hits this month") straight from indexes.
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS drafts ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, project_id TEXT NOT NULL, draft INTEGER NOT NULL,"
+    " budget_mode TEXT, engine TEXT, script_hash TEXT, total_risk_score INTEGER NOT NULL,"
+    " total_paise INTEGER NOT NULL, scene_count INTEGER NOT NULL, created_at REAL NOT NULL, result TEXT NOT NULL,"
+    " UNIQUE (project_id, draft))",
+    "CREATE TABLE IF NOT EXISTS scenes ("
+    " draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE, scene_id TEXT NOT NULL, position INTEGER NOT NULL,"
+    " header TEXT NOT NULL, location TEXT, time TEXT, int_ext TEXT, total_paise INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS expenses ("
+    " draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE, scene_id TEXT NOT NULL,"
+    " category TEXT NOT NULL, amount_paise INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS errors ("
+    " draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE, error_type TEXT NOT NULL, severity TEXT NOT NULL,"
+    " from_scene_id TEXT, to_scene_id TEXT, description TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS compliance ("
+    " draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE, rule TEXT NOT NULL, category TEXT NOT NULL,"
+    " scene_id TEXT, trigger_text TEXT NOT NULL, created_at REAL NOT NULL)",
+    # Latest draft per project, and each project's drafts in order
+    "CREATE INDEX IF NOT EXISTS idx_drafts_project ON drafts (project_id, draft)",
+    # "Night exteriors over X": equality on time/int_ext, range on cost
+    "CREATE INDEX IF NOT EXISTS idx_scenes_slot_cost ON scenes (time, int_ext, total_paise)",
+    "CREATE INDEX IF NOT EXISTS idx_scenes_draft ON scenes (draft_id, position)",
+    "CREATE INDEX IF NOT EXISTS idx_expenses_draft ON expenses (draft_id, category)",
+    "CREATE INDEX IF NOT EXISTS idx_errors_draft ON errors (draft_id)",
+    "CREATE INDEX IF NOT EXISTS idx_errors_type ON errors (error_type, severity)",
+    # "Every AWBI hit this month": equality on rule, range on time
+    "CREATE INDEX IF NOT EXISTS idx_compliance_rule_time ON compliance (rule, created_at)",
+]
+
+# Compliance categories are free text (LLM or local engine); hits are indexed under a short rule code
+COMPLIANCE_RULES = [
+    ("AWBI", ("AWBI", "ANIMAL")),
+    ("COTPA", ("COTPA", "SMOKING", "ALCOHOL", "TOBACCO")),
+    ("POCSO", ("POCSO", "SERIOUS CRIME")),
+    ("RELIGION", ("RELIGIO", "295A")),
+]
+
+
+def compliance_rule(category: str) -> str:
+    upper = category.upper()
+    for rule, markers in COMPLIANCE_RULES:
+        if any(marker in upper for marker in markers):
+            return rule
+    return "OTHER"
+
+
+def _int_ext(header: str) -> Optional[str]:
+    upper = header.upper().lstrip()
+    if upper.startswith(("INT./EXT", "INT/EXT", "I/E")):
+        return "INT/EXT"
+    if upper.startswith("EXT"):
+        return "EXT"
+    if upper.startswith("INT"):
+        return "INT"
+    return None
+
+
+def _time(time_of_day: Optional[str], header: str) -> Optional[str]:
+    text = f"{time_of_day or ''} {header}".upper()
+    if "NIGHT" in text:
+        return "NIGHT"
+    if "DAY" in text:
+        return "DAY"
+    return None
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """ISO date/datetime ("2026-10-01") -> epoch seconds (local time)."""
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+class ProjectStore:
+    """Analyses per (project, draft) in a local SQLite file, normalized for indexed queries."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    # --- WRITES ---
+
+    def save(
+        self,
+        project_id: str,
+        result: AnalysisResult,
+        budget_mode: Optional[str] = None,
+        engine: Optional[str] = None,
+        script_hash: Optional[str] = None,
+        draft: Optional[int] = None
+    ) -> dict:
+        """
+        Stores a result as a draft of the project (next draft number unless `draft` is given;
+        an existing draft number is replaced). Re-saving the latest draft's script with the same
+        settings returns that draft instead of adding a copy.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            latest = self._conn.execute(
+                "SELECT id, draft, script_hash, budget_mode, engine FROM drafts WHERE project_id = ? ORDER BY draft DESC LIMIT 1",
+                (project_id,)
+            ).fetchone()
+            if (
+                draft is None and latest is not None and script_hash is not None
+                and (latest["script_hash"], latest["budget_mode"], latest["engine"]) == (script_hash, budget_mode, engine)
+            ):
+                return {"project_id": project_id, "draft": latest["draft"], "created": False}
+
+            if draft is None:
+                draft = (latest["draft"] if latest is not None else 0) + 1
+            self._conn.execute("DELETE FROM drafts WHERE project_id = ? AND draft = ?", (project_id, draft))
+
+            total_paise = sum(scene.total_paise for scene in result.scenes)
+            cursor = self._conn.execute(
+                "INSERT INTO drafts (project_id, draft, budget_mode, engine, script_hash, total_risk_score, total_paise,"
+                " scene_count, created_at, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (project_id, draft, budget_mode, engine, script_hash, result.total_risk_score, total_paise,
+                 len(result.scenes), now, result.model_dump_json())
+            )
+            draft_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO scenes (draft_id, scene_id, position, header, location, time, int_ext, total_paise)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (draft_id, scene.id, position, scene.header, scene.location,
+                     _time(scene.time, scene.header), _int_ext(scene.header), scene.total_paise)
+                    for position, scene in enumerate(result.scenes)
+                ]
+            )
+            self._conn.executemany(
+                "INSERT INTO expenses (draft_id, scene_id, category, amount_paise) VALUES (?, ?, ?, ?)",
+                [
+                    (draft_id, scene.id, expense.category, expense.amount_paise)
+                    for scene in result.scenes for expense in scene.expense_breakdown
+                ]
+            )
+            self._conn.executemany(
+                "INSERT INTO errors (draft_id, error_type, severity, from_scene_id, to_scene_id, description)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (draft_id, error.error_type.value, error.severity.value, error.from_scene_id, error.to_scene_id, error.description)
+                    for error in result.errors
+                ]
+            )
+            self._conn.executemany(
+                "INSERT INTO compliance (draft_id, rule, category, scene_id, trigger_text, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (draft_id, compliance_rule(risk.category), risk.category, risk.scene_id, risk.trigger_text, now)
+                    for risk in result.compliance_risks
+                ]
+            )
+        return {"project_id": project_id, "draft": draft, "created": True}
+
+    # --- READS ---
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def projects(self) -> List[dict]:
+        rows = self._query(
+            "SELECT d.project_id, d.draft, d.total_paise, d.total_risk_score, d.scene_count, d.created_at, counts.drafts"
+            " FROM drafts d JOIN (SELECT project_id, MAX(draft) AS latest, COUNT(*) AS drafts FROM drafts GROUP BY project_id) counts"
+            " ON d.project_id = counts.project_id AND d.draft = counts.latest ORDER BY d.created_at DESC"
+        )
+        return [
+            {
+                "project_id": row["project_id"],
+                "drafts": row["drafts"],
+                "latest_draft": row["draft"],
+                "total_budget": format_paise(row["total_paise"]),
+                "total_paise": row["total_paise"],
+                "total_risk_score": row["total_risk_score"],
+                "scene_count": row["scene_count"],
+                "updated_at": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    def drafts(self, project_id: str) -> List[dict]:
+        rows = self._query(
+            "SELECT draft, budget_mode, engine, total_paise, total_risk_score, scene_count, created_at"
+            " FROM drafts WHERE project_id = ? ORDER BY draft",
+            (project_id,)
+        )
+        return [{**dict(row), "total_budget": format_paise(row["total_paise"])} for row in rows]
+
+    def result(self, project_id: str, draft: Optional[int] = None) -> Optional[AnalysisResult]:
+        """A stored analysis (latest draft by default)."""
+        rows = self._query(
+            "SELECT result FROM drafts WHERE project_id = ? AND (? IS NULL OR draft = ?) ORDER BY draft DESC LIMIT 1",
+            (project_id, draft, draft)
+        )
+        return AnalysisResult.model_validate_json(rows[0]["result"]) if rows else None
+
+    def latest_results(self) -> List[Tuple[str, AnalysisResult]]:
+        """(project_id, latest draft's analysis) for every project on the slate."""
+        rows = self._query(
+            "SELECT d.project_id, d.result FROM drafts d"
+            " WHERE d.draft = (SELECT MAX(draft) FROM drafts latest WHERE latest.project_id = d.project_id)"
+            " ORDER BY d.project_id"
+        )
+        return [(row["project_id"], AnalysisResult.model_validate_json(row["result"])) for row in rows]
+
+    def find_scenes(
+        self,
+        time_of_day: Optional[str] = None,
+        int_ext: Optional[str] = None,
+        min_paise: int = 0,
+        project_id: Optional[str] = None,
+        latest_only: bool = True,
+        limit: int = 500
+    ) -> List[dict]:
+        """Scenes by time of day / INT-EXT / minimum cost, across the slate (latest draft of each project by default)."""
+        conditions = ["s.total_paise >= ?"]
+        params: list = [min_paise]
+        if time_of_day:
+            conditions.append("s.time = ?")
+            params.append(time_of_day.upper())
+        if int_ext:
+            conditions.append("s.int_ext = ?")
+            params.append(int_ext.upper())
+        if project_id:
+            conditions.append("d.project_id = ?")
+            params.append(project_id)
+        if latest_only:
+            conditions.append("d.draft = (SELECT MAX(draft) FROM drafts latest WHERE latest.project_id = d.project_id)")
+        rows = self._query(
+            "SELECT d.project_id, d.draft, s.scene_id, s.header, s.location, s.time, s.int_ext, s.total_paise"
+            " FROM scenes s JOIN drafts d ON d.id = s.draft_id"
+            f" WHERE {' AND '.join(conditions)} ORDER BY s.total_paise DESC LIMIT ?",
+            (*params, limit)
+        )
+        return [{**dict(row), "estimated_cost": format_paise(row["total_paise"])} for row in rows]
+
+    def draft_delta(self, project_id: str, from_draft: int, to_draft: int) -> Optional[dict]:
+        """Budget, risk and error-count changes between two drafts, per expense category and per scene."""
+        drafts = {
+            row["draft"]: row for row in self._query(
+                "SELECT id, draft, total_paise, total_risk_score, scene_count FROM drafts WHERE project_id = ? AND draft IN (?, ?)",
+                (project_id, from_draft, to_draft)
+            )
+        }
+        if from_draft not in drafts or to_draft not in drafts:
+            return None
+        old, new = drafts[from_draft], drafts[to_draft]
+
+        categories: Dict[str, List[int]] = {}
+        for row in self._query(
+            "SELECT draft_id, category, SUM(amount_paise) AS paise FROM expenses WHERE draft_id IN (?, ?) GROUP BY draft_id, category",
+            (old["id"], new["id"])
+        ):
+            categories.setdefault(row["category"], [0, 0])[0 if row["draft_id"] == old["id"] else 1] = row["paise"]
+
+        # Scenes matched by id; a header change on the same id is reported with the new header
+        scenes: Dict[str, dict] = {}
+        for row in self._query(
+            "SELECT draft_id, scene_id, header, total_paise FROM scenes WHERE draft_id IN (?, ?) ORDER BY draft_id, position",
+            (old["id"], new["id"])
+        ):
+            entry = scenes.setdefault(row["scene_id"], {"scene_id": row["scene_id"], "old_paise": None, "new_paise": None})
+            entry["header"] = row["header"]
+            entry["old_paise" if row["draft_id"] == old["id"] else "new_paise"] = row["total_paise"]
+        changed_scenes = [
+            {**entry, "delta_paise": (entry["new_paise"] or 0) - (entry["old_paise"] or 0),
+             "status": "added" if entry["old_paise"] is None else "removed" if entry["new_paise"] is None else "changed"}
+            for entry in scenes.values() if entry["old_paise"] != entry["new_paise"]
+        ]
+        changed_scenes.sort(key=lambda entry: -abs(entry["delta_paise"]))
+
+        error_counts = {
+            row["draft_id"]: row["n"] for row in self._query(
+                "SELECT draft_id, COUNT(*) AS n FROM errors WHERE draft_id IN (?, ?) GROUP BY draft_id", (old["id"], new["id"])
+            )
+        }
+        delta_paise = new["total_paise"] - old["total_paise"]
+        return {
+            "project_id": project_id,
+            "from_draft": from_draft,
+            "to_draft": to_draft,
+            "from_total": format_paise(old["total_paise"]),
+            "to_total": format_paise(new["total_paise"]),
+            "delta_paise": delta_paise,
+            "delta": ("+ " if delta_paise >= 0 else "- ") + format_paise(abs(delta_paise)),
+            "risk_score_delta": new["total_risk_score"] - old["total_risk_score"],
+            "scene_count_delta": new["scene_count"] - old["scene_count"],
+            "error_count_delta": error_counts.get(new["id"], 0) - error_counts.get(old["id"], 0),
+            "categories": [
+                {"category": category, "old_paise": amounts[0], "new_paise": amounts[1], "delta_paise": amounts[1] - amounts[0]}
+                for category, amounts in sorted(categories.items())
+            ],
+            "scenes": changed_scenes,
+        }
+
+    def find_compliance(
+        self,
+        rule: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        project_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[dict]:
+        """Compliance hits by rule code (AWBI, COTPA, POCSO, RELIGION, OTHER) and ISO date range."""
+        conditions = ["1 = 1"]
+        params: list = []
+        if rule:
+            conditions.append("c.rule = ?")
+            params.append(rule.upper())
+        if since:
+            conditions.append("c.created_at >= ?")
+            params.append(_timestamp(since))
+        if until:
+            conditions.append("c.created_at < ?")
+            params.append(_timestamp(until))
+        if project_id:
+            conditions.append("d.project_id = ?")
+            params.append(project_id)
+        rows = self._query(
+            "SELECT d.project_id, d.draft, c.rule, c.category, c.scene_id, c.trigger_text, c.created_at"
+            " FROM compliance c JOIN drafts d ON d.id = c.draft_id"
+            f" WHERE {' AND '.join(conditions)} ORDER BY c.created_at DESC LIMIT ?",
+            (*params, limit)
+        )
+        return [dict(row) for row in rows]
+
+
+def project_store_from_env() -> ProjectStore:
+    """PROJECTS_DB_PATH: SQLite file for saved analyses (default: temp dir)."""
+    return ProjectStore(os.environ.get("PROJECTS_DB_PATH", os.path.join(tempfile.gettempdir(), "continuityguard_projects.db")))
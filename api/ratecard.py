@@ -0,0 +1,184 @@
+import json
+import os
+import random
+import zlib
+from typing import Dict, List, Optional
+
+from cache import sha256
+from money import PAISE_PER_RUPEE, THOUSAND
+
+# --- RATE CARD ---
+# What the local engine charges for a scene. All amounts are in RUPEES here (easy to edit);
+# they are converted to paise once, when the card is loaded.
+#   tiers:      base cost + cost per script line, per expense category, for each scene intensity
+#   triggers:   extra cost per distinct trigger keyword found in the scene (keys are rule keywords)
+#   time_of_day: multipliers per category for the scene's time ("NIGHT" = lights, gensets, overtime)
+#   max_lines:  scene length is capped here so one giant scene can't dominate the budget
+#   demo_variance: +/- fraction applied per line item when a seed is given
+# Override with RATE_CARD_PATH=/path/to/card.json (any subset of the keys below).
+CATEGORIES = [
+    "Location & Permits",
+    "Crowd & Artists",
+    "Action & Stunts",
+    "Vehicles & Logistics",
+    "Unit Food (Catering)",
+    "Hidden Costs",
+]
+
+DEFAULT_RATE_CARD = {
+    "tiers": {
+        "HIGH": {
+            "Location & Permits": {"base": 200000, "per_line": 10000, "reason": "Highway Closure / Airport Permits"},
+            "Crowd & Artists": {"base": 1000000, "per_line": 50000, "reason": "1000+ Junior Artists & Dancers"},
+            "Action & Stunts": {"base": 1500000, "per_line": 80000, "reason": "Harness Team, Crash Mats, Pyro Tech"},
+            "Vehicles & Logistics": {"base": 500000, "per_line": 20000, "reason": "Multiple Camera Cranes, Russian Arm"},
+            "Unit Food (Catering)": {"base": 300000, "per_line": 10000, "reason": "Full Unit Catering (Heavy Scale)"},
+            "Hidden Costs": {"base": 200000, "per_line": 5000, "reason": "Hazard Pay, Breakages, Misc"},
+        },
+        "MEDIUM": {
+            "Location & Permits": {"base": 100000, "per_line": 5000, "reasons": ["GHMC Road Permission", "Private Farmhouse Rent", "Ramoji Film City Floor Charge", "Forest Dept Clearance"]},
+            "Crowd & Artists": {"base": 200000, "per_line": 10000, "reasons": ["300+ Junior Artists + Batta", "Background Dancers Union Rates", "Village Crowd + Transport", "Corporate Office Extras"]},
+            "Action & Stunts": {"base": 0, "per_line": 0, "reason": "N/A"},
+            "Vehicles & Logistics": {"base": 100000, "per_line": 5000, "reasons": ["Vanity Vans x4", "Generator Van (Silenced)", "Crane & Jimmy Jib", "Action Vehicles + Towing"]},
+            "Unit Food (Catering)": {"base": 100000, "per_line": 2500, "reason": "Standard Unit Food"},
+            "Hidden Costs": {"base": 50000, "per_line": 1000, "reason": "Overtime & Batta"},
+        },
+        "LOW": {
+            "Location & Permits": {"base": 10000, "per_line": 1000, "reason": "House/Office Rent"},
+            "Crowd & Artists": {"base": 10000, "per_line": 500, "reason": "few extras"},
+            "Action & Stunts": {"base": 0, "per_line": 0, "reason": "N/A"},
+            "Vehicles & Logistics": {"base": 10000, "per_line": 500, "reason": "Transport"},
+            "Unit Food (Catering)": {"base": 20000, "per_line": 500, "reason": "Tea/Coffee/Lunch"},
+            "Hidden Costs": {"base": 5000, "per_line": 250, "reason": "Misc"},
+        },
+    },
+    "triggers": {
+        "HELICOPTER": {"Vehicles & Logistics": 1000000, "Location & Permits": 300000},
+        "TRAIN": {"Location & Permits": 500000, "Vehicles & Logistics": 300000},
+        "BLAST": {"Action & Stunts": 1000000, "Hidden Costs": 200000},
+        "EXPLOSION": {"Action & Stunts": 1000000, "Hidden Costs": 200000},
+        "FIRE": {"Action & Stunts": 500000, "Hidden Costs": 100000},
+        "CHASE": {"Action & Stunts": 500000, "Vehicles & Logistics": 500000},
+        "HIGHWAY": {"Location & Permits": 500000},
+        "CROWD": {"Crowd & Artists": 1000000, "Unit Food (Catering)": 200000},
+        "SONG": {"Crowd & Artists": 800000, "Location & Permits": 200000},
+        "FIGHT": {"Action & Stunts": 500000},
+        "STUNT": {"Action & Stunts": 500000},
+        "VFX": {"Hidden Costs": 500000},
+        "RAIN": {"Hidden Costs": 100000},
+        "WEDDING": {"Crowd & Artists": 200000, "Unit Food (Catering)": 100000},
+        "PARTY": {"Crowd & Artists": 200000},
+        "CLUB": {"Crowd & Artists": 200000, "Location & Permits": 100000},
+        "FOREST": {"Location & Permits": 100000},
+        "HORSE": {"Vehicles & Logistics": 100000, "Hidden Costs": 50000},
+        "TIGER": {"Hidden Costs": 300000},
+    },
+    "time_of_day": {
+        "NIGHT": {"Vehicles & Logistics": 1.25, "Unit Food (Catering)": 1.2, "Hidden Costs": 1.5},
+    },
+    "max_lines": 60,
+    "demo_variance": 0.25,
+}
+
+
+class RateCard:
+    """A loaded rate card, amounts in paise. Turns scene features into line items."""
+
+    def __init__(self, card: dict):
+        self.tiers = {
+            tier: {
+                category: {
+                    "base": round(item.get("base", 0) * PAISE_PER_RUPEE),
+                    "per_line": round(item.get("per_line", 0) * PAISE_PER_RUPEE),
+                    "reasons": item.get("reasons") or [item.get("reason", "Misc")],
+                }
+                for category, item in rates.items()
+            }
+            for tier, rates in card["tiers"].items()
+        }
+        self.triggers = {
+            keyword.upper(): {category: round(amount * PAISE_PER_RUPEE) for category, amount in costs.items()}
+            for keyword, costs in card["triggers"].items()
+        }
+        self.time_of_day = card["time_of_day"]
+        self.max_lines = card["max_lines"]
+        self.demo_variance = card["demo_variance"]
+        # Identifies the card in cache keys: a changed card never serves stale budgets
+        self.fingerprint = sha256(json.dumps(card, sort_keys=True))
+
+    def line_items(
+        self,
+        tier: str,
+        scene_id: str,
+        header: str,
+        line_count: int,
+        time: str,
+        keywords: List[str],
+        seed: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Expense line items for one scene. Pure function of its inputs:
+        same scene in -> same amounts out. `seed` adds reproducible demo variance.
+        """
+        lines = min(line_count, self.max_lines)
+        night = self.time_of_day.get(time, {})
+        # Distinct triggers in script order
+        triggers = [k for k in dict.fromkeys(keywords) if k in self.triggers]
+        items = []
+        for category in CATEGORIES:
+            rate = self.tiers[tier][category]
+            amount = rate["base"] + rate["per_line"] * lines
+            extras = []
+            for keyword in triggers:
+                if category in self.triggers[keyword]:
+                    amount += self.triggers[keyword][category]
+                    extras.append(keyword.title())
+            if amount and category in night:
+                amount = amount * night[category]
+                extras.append("Night Shoot")
+            if amount and seed is not None:
+                jitter = random.Random(f"{seed}:{scene_id}:{category}")
+                amount = amount * jitter.uniform(1 - self.demo_variance, 1 + self.demo_variance)
+            # Stable pick among the reason variants, so scenes differ but never flip between runs
+            reasons = rate["reasons"]
+            reason = reasons[zlib.crc32(header.encode("utf-8")) % len(reasons)]
+            if extras:
+                reason = f"{reason} (+ {', '.join(extras)})"
+            items.append({
+                "category": category,
+                # Whole thousands of rupees, like a real rate sheet
+                "amount_paise": round(amount / THOUSAND) * THOUSAND,
+                "reason": reason
+            })
+        return items
+
+
+def _merge(base: dict, override: dict) -> dict:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = _merge(base[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_rate_card(path: Optional[str] = None) -> RateCard:
+    """Default card, overlaid with the JSON file at `path` (or RATE_CARD_PATH) if given."""
+    path = path or os.environ.get("RATE_CARD_PATH")
+    card = DEFAULT_RATE_CARD
+    if path:
+        with open(path, encoding="utf-8") as f:
+            card = _merge(DEFAULT_RATE_CARD, json.load(f))
+    return RateCard(card)
+
+
+def seed_from_env() -> Optional[int]:
+    """LOCAL_ENGINE_SEED: optional integer seed for demo variance (unset = no variance)."""
+    value = os.environ.get("LOCAL_ENGINE_SEED")
+    return int(value) if value not in (None, "") else None
+
+
+# Loaded once per process (each batch worker process loads its own copy at import)
+RATE_CARD = load_rate_card()
+LOCAL_ENGINE_SEED = seed_from_env()
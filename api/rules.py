@@ -0,0 +1,82 @@
+import hashlib
+import json
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+# --- RULE REGISTRY ---
+# Every keyword rule the local engine knows about, by rule id.
+# Compiled once at import into a single matcher (see KEYWORD_PATTERN below).
+BUDGET_HIGH = "budget.high"
+BUDGET_MEDIUM = "budget.medium"
+COMPLIANCE_POCSO = "compliance.pocso"
+COMPLIANCE_COTPA = "compliance.cotpa"
+COMPLIANCE_RELIGION = "compliance.religion"
+COMPLIANCE_AWBI = "compliance.awbi"
+ASSET_VEHICLE = "asset.vehicle"
+ASSET_MUSIC = "asset.music"
+
+RULES: Dict[str, List[str]] = {
+    # Keywords indicating HIGH budget
+    BUDGET_HIGH: ["CHASE", "BLAST", "EXPLOSION", "CROWD", "VFX", "SONG", "FIGHT", "STUNT", "HELICOPTER", "TRAIN", "FIRE", "HIGHWAY"],
+    # Keywords indicating MEDIUM budget
+    BUDGET_MEDIUM: ["EXT", "STREET", "CLUB", "PARTY", "WEDDING", "FOREST", "RAIN", "NIGHT"],
+    # Censor / Legal
+    COMPLIANCE_POCSO: ["MINOR", "CHILD", "MOLEST", "RAPE", "ABUSE", "GIRL"],
+    COMPLIANCE_COTPA: ["SMOKE", "CIGARETTE", "ALCOHOL", "DRINK", "SCOTCH", "WHISKY"],
+    COMPLIANCE_RELIGION: ["TEMPLE", "GOD", "PRAY", "RELIGION", "HINDU", "MUSLIM", "CHRISTIAN"],
+    COMPLIANCE_AWBI: ["HORSE", "DOG", "TIGER", "ANIMAL", "BIRD"],
+    # Production Assets
+    ASSET_VEHICLE: ["CHASE", "CAR", "JEEP"],
+    ASSET_MUSIC: ["SONG", "DANCE"],
+}
+
+
+class RuleHit(NamedTuple):
+    rule: str
+    keyword: str
+    scene_id: Optional[str]
+    offset: int  # Character offset into the full script
+    line: str  # The script line containing the match
+
+
+def _compile(rules: Dict[str, List[str]]):
+    # Keywords match at the start of a word ("GOD" hits "GODDESS", not "SCARF" for "CAR").
+    # A keyword can belong to several rules ("SONG" is both a budget trigger and a music asset),
+    # and a longer keyword also counts for every shorter keyword it starts with.
+    rules_by_keyword: Dict[str, List[str]] = {}
+    for rule, keywords in rules.items():
+        for keyword in keywords:
+            rules_by_keyword.setdefault(keyword.upper(), []).append(rule)
+
+    expanded: Dict[str, List[str]] = {}
+    for keyword in rules_by_keyword:
+        matched_rules = []
+        for prefix, prefix_rules in rules_by_keyword.items():
+            if keyword.startswith(prefix):
+                matched_rules.extend(r for r in prefix_rules if r not in matched_rules)
+        expanded[keyword] = matched_rules
+
+    # Longest first, so the alternation prefers "EXPLOSION" over a shorter prefix
+    alternation = "|".join(re.escape(k) for k in sorted(expanded, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})", re.IGNORECASE), expanded
+
+
+KEYWORD_PATTERN, RULES_BY_KEYWORD = _compile(RULES)
+# Part of the local engine's cache key: editing a keyword list invalidates its cached results
+RULES_FINGERPRINT = hashlib.sha256(json.dumps(RULES, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def scan(text: str, scene_id: Optional[str] = None, base_offset: int = 0) -> List[RuleHit]:
+    """
+    One pass over `text` (usually a scene body) for every registered rule.
+    `base_offset` is where `text` starts in the full script, so hit offsets are script-absolute.
+    """
+    hits = []
+    for match in KEYWORD_PATTERN.finditer(text):
+        keyword = match.group(0).upper()
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end())
+        line = text[line_start:line_end if line_end != -1 else len(text)].strip()
+        for rule in RULES_BY_KEYWORD[keyword]:
+            hits.append(RuleHit(rule, keyword, scene_id, base_offset + match.start(), line))
+    return hits
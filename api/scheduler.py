@@ -0,0 +1,412 @@
+import math
+import random
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from money import CRORE, LAKH
+from schemas import Scene, ScheduleRisk, ScheduledScene, SchedulePlan, Severity, ShootDay
+
+# --- SHOOTING SCHEDULE OPTIMIZER ---
+# Orders scenes into shoot days: scenes are grouped by (location, DAY/NIGHT unit), the groups are
+# ordered greedily (DAY unit first, neighbours sharing cast), packed into days under the unit's
+# hours budget, and the group order is then improved by local search (swap / relocate / reverse).
+# The search is seeded and has a fixed work budget, so the same scenes always give the same plan.
+DAY_UNIT = "DAY"
+NIGHT_UNIT = "NIGHT"
+CALL_TIMES = {DAY_UNIT: 7.0, NIGHT_UNIT: 18.0}  # Hours after midnight
+COMPANY_MOVE_HOURS = 1.0  # Wrap, travel and re-light at the next location
+SUNSET_MARGIN = 1.0  # Exterior DAY work ending within this many hours of last light is flagged
+CAST_HOLD_DAYS = 3  # Idle days between two of an actor's shoot days before it is flagged
+MAX_SHOOT_DAYS = 500  # /api/schedule refuses longer plans (a feature shoots in ~40-150 days)
+
+# Search cost weights, roughly in "hours lost"
+WEIGHT_DAY = 10.0
+WEIGHT_MOVE = 1.0
+WEIGHT_OVERNIGHT_MOVE = 0.25
+WEIGHT_FLIP = 4.0
+WEIGHT_TURNAROUND = 50.0
+WEIGHT_CAST_HOLD = 2.0
+
+# Search budget in scene placements (iterations x scene count): 300 scenes finish well under
+# a second. A fixed budget rather than a time limit keeps the plan identical from run to run.
+SEARCH_WORK = 300000
+# Upper bound on iterations per possible move, for scripts with only a few location groups
+SEARCH_MOVE_SAMPLES = 50
+
+DAY_WORDS = ("DAY", "MORNING", "DAWN", "AFTERNOON", "DUSK", "SUNSET", "SUNRISE")
+NIGHT_WORDS = ("NIGHT", "EVENING", "MIDNIGHT")
+
+
+class ScheduleTooLong(ValueError):
+    def __init__(self, days: int, limit: int = MAX_SHOOT_DAYS):
+        super().__init__(f"The plan needs {days} shoot days, more than the {limit}-day limit; raise the unit hours.")
+
+
+class Shot(NamedTuple):
+    order: int  # Position in the script
+    scene: Scene
+    location: str
+    unit: str
+    hours: float
+    cast: frozenset
+    exterior: bool
+
+
+class Day:
+    __slots__ = ("unit", "entries", "hours", "locations", "cast")
+
+    def __init__(self, unit: str):
+        self.unit = unit
+        self.entries: List[Tuple[Shot, float]] = []
+        self.hours = 0.0
+        self.locations: List[str] = []
+        self.cast = set()
+
+
+def estimate_shoot_hours(scene: Scene) -> float:
+    """Shooting hours from cost intensity: talkies go fast, action/song scenes can take days."""
+    total = scene.total_paise or 0
+    if total < 2 * LAKH:
+        return 1.0
+    if total < 20 * LAKH:
+        return 2.0
+    if total < CRORE:
+        return 4.0
+    # Big set pieces: 6h for the first crore, +2h per crore beyond
+    return min(30.0, round(6.0 + 2.0 * (total - CRORE) / CRORE, 1))
+
+
+def unit_of(scene: Scene, previous: str) -> str:
+    time_text = f"{scene.time or ''} {scene.header}".upper()
+    if any(word in time_text for word in NIGHT_WORDS):
+        return NIGHT_UNIT
+    if any(word in time_text for word in DAY_WORDS):
+        return DAY_UNIT
+    # CONTINUOUS / LATER / unknown: same unit as the scene before it
+    return previous
+
+
+def location_of(scene: Scene) -> str:
+    location = scene.location or scene.header.upper().replace("INT", "").replace("EXT", "").replace(".", "").split("-")[0]
+    return " ".join(location.upper().split()) or "UNKNOWN"
+
+
+def _shots(scenes: Sequence[Scene], cast: Dict[str, List[str]]) -> List[Shot]:
+    shots = []
+    unit = DAY_UNIT
+    for order, scene in enumerate(scenes):
+        unit = unit_of(scene, unit)
+        shots.append(Shot(
+            order=order,
+            scene=scene,
+            location=location_of(scene),
+            unit=unit,
+            hours=estimate_shoot_hours(scene),
+            cast=frozenset(cast.get(scene.id, ())),
+            exterior="EXT" in scene.header.upper().split(".")[0]
+        ))
+    return shots
+
+
+class Optimizer:
+    def __init__(self, shots: List[Shot], budgets: Dict[str, float], turnaround_hours: float):
+        self.shots = shots
+        self.budgets = budgets
+        self.turnaround_hours = turnaround_hours
+        self.has_cast = any(shot.cast for shot in shots)
+
+        groups: Dict[Tuple[str, str], List[Shot]] = {}
+        for shot in shots:
+            groups.setdefault((shot.location, shot.unit), []).append(shot)
+        self.groups = list(groups.values())
+
+    def pack(self, sequence) -> List[Day]:
+        """Next-fit packing of shots (in shooting order) into days of one unit each."""
+        days: List[Day] = []
+        current: Optional[Day] = None
+        for shot in sequence:
+            budget = self.budgets[shot.unit]
+            if shot.hours > budget:
+                # Longer than a day: the scene gets consecutive days of its own (split in whole minutes)
+                minutes, per_day = round(shot.hours * 60), max(1, round(budget * 60))
+                for index in range(math.ceil(minutes / per_day)):
+                    day = Day(shot.unit)
+                    take = min(per_day, minutes - index * per_day) / 60
+                    day.entries.append((shot, take))
+                    day.hours = take
+                    day.locations.append(shot.location)
+                    day.cast |= shot.cast
+                    days.append(day)
+                current = None
+                continue
+            move = COMPANY_MOVE_HOURS if current is not None and current.locations[-1] != shot.location else 0.0
+            if current is None or current.unit != shot.unit or current.hours + move + shot.hours > budget:
+                current = Day(shot.unit)
+                days.append(current)
+                move = 0.0
+            if move or not current.locations:
+                current.locations.append(shot.location)
+            current.entries.append((shot, shot.hours))
+            current.cast |= shot.cast
+            current.hours += move + shot.hours
+        return days
+
+    def rest_hours(self, before: Day, after: Day) -> float:
+        return 24.0 + CALL_TIMES[after.unit] - (CALL_TIMES[before.unit] + before.hours)
+
+    def turnaround_clash(self, before: Day, after: Day) -> bool:
+        if self.rest_hours(before, after) >= self.turnaround_hours:
+            return False
+        if not self.has_cast:
+            return True  # No cast info: the whole unit needs its rest
+        return not before.cast.isdisjoint(after.cast)
+
+    def cost(self, days: List[Day]) -> float:
+        total = WEIGHT_DAY * len(days)
+        first_day: Dict[str, int] = {}
+        last_day: Dict[str, int] = {}
+        worked: Dict[str, int] = {}
+        previous = None
+        for index, day in enumerate(days):
+            total += WEIGHT_MOVE * (len(day.locations) - 1)
+            if previous is not None:
+                if previous.locations[-1] != day.locations[0]:
+                    total += WEIGHT_OVERNIGHT_MOVE
+                if previous.unit != day.unit:
+                    total += WEIGHT_FLIP
+                    if self.turnaround_clash(previous, day):
+                        total += WEIGHT_TURNAROUND
+            if self.has_cast:
+                for actor in day.cast:
+                    first_day.setdefault(actor, index)
+                    last_day[actor] = index
+                    worked[actor] = worked.get(actor, 0) + 1
+            previous = day
+        for actor, count in worked.items():
+            total += WEIGHT_CAST_HOLD * (last_day[actor] - first_day[actor] + 1 - count)
+        return total
+
+    def sequence(self, order: List[int]):
+        return [shot for g in order for shot in self.groups[g]]
+
+    def initial_order(self) -> List[int]:
+        """DAY unit first, then NIGHT (one flip, no turnaround); each next group shares the most cast."""
+        order = []
+        for unit in (DAY_UNIT, NIGHT_UNIT):
+            remaining = [g for g, group in enumerate(self.groups) if group[0].unit == unit]
+            casts = {g: frozenset().union(*(shot.cast for shot in self.groups[g])) for g in remaining}
+            while remaining:
+                if order and self.groups[order[-1]][0].unit == unit:
+                    last = casts[order[-1]]
+                    pick = max(remaining, key=lambda g: (len(casts[g] & last), -remaining.index(g)))
+                else:
+                    pick = remaining[0]
+                order.append(pick)
+                remaining.remove(pick)
+        return order
+
+    def search(self, seed: int = 0, work: int = SEARCH_WORK) -> List[Day]:
+        order = self.initial_order()
+        best = self.cost(self.pack(self.sequence(order)))
+        if len(order) < 2:
+            return self.pack(self.sequence(order))
+
+        rng = random.Random(seed)
+        # Few groups have few distinct moves (~1.5 x groups^2): cap there too, so a short
+        # script doesn't spend the full iteration count re-trying the same handful of orders
+        iterations = max(10, min(5000, work // max(1, len(self.shots)), SEARCH_MOVE_SAMPLES * len(order) ** 2))
+        for _ in range(iterations):
+            i, j = sorted(rng.sample(range(len(order)), 2))
+            move = rng.random()
+            candidate = list(order)
+            if move < 0.4:
+                candidate[i], candidate[j] = candidate[j], candidate[i]
+            elif move < 0.8:
+                candidate.insert(j, candidate.pop(i))
+            else:
+                candidate[i:j + 1] = reversed(candidate[i:j + 1])
+            cost = self.cost(self.pack(self.sequence(candidate)))
+            if cost < best:
+                order, best = candidate, cost
+        return self.pack(self.sequence(order))
+
+
+def _clock(hours: float) -> str:
+    minutes = int(round(hours * 60)) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _count_moves_and_flips(days: List[Day]) -> Tuple[int, int]:
+    moves = flips = 0
+    for index, day in enumerate(days):
+        moves += len(day.locations) - 1
+        if index:
+            moves += days[index - 1].locations[-1] != day.locations[0]
+            flips += days[index - 1].unit != day.unit
+    return moves, flips
+
+
+def _shoot_day(number: int, day: Day) -> ShootDay:
+    # Exterior locations first on a DAY unit, to keep them inside daylight
+    runs: Dict[str, List[Tuple[Shot, float]]] = {}
+    for shot, hours in day.entries:
+        runs.setdefault(shot.location, []).append((shot, hours))
+    ordered = list(runs.items())
+    if day.unit == DAY_UNIT:
+        ordered.sort(key=lambda run: not any(shot.exterior for shot, _ in run[1]))
+
+    clock = CALL_TIMES[day.unit]
+    scenes = []
+    for run_index, (location, entries) in enumerate(ordered):
+        if run_index:
+            clock += COMPANY_MOVE_HOURS
+        for shot, hours in entries:
+            scenes.append(ScheduledScene(
+                scene_id=shot.scene.id,
+                header=shot.scene.header,
+                location=location,
+                start_time=_clock(clock),
+                hours=hours
+            ))
+            clock += hours
+    return ShootDay(
+        day=number,
+        unit=day.unit,
+        call_time=_clock(CALL_TIMES[day.unit]),
+        wrap_time=_clock(clock),
+        hours=round(clock - CALL_TIMES[day.unit], 2),
+        locations=[location for location, _ in ordered],
+        cast=sorted(day.cast),
+        scenes=scenes
+    )
+
+
+def _risks(optimizer: Optimizer, days: List[Day], plan_days: List[ShootDay]) -> List[ScheduleRisk]:
+    risks = []
+    shots = {shot.scene.id: shot for shot in optimizer.shots}
+
+    # Daylight: scenes that need more than one day, and exterior work ending near last light
+    flagged = set()
+    for day, plan_day in zip(days, plan_days):
+        budget = optimizer.budgets[day.unit]
+        for entry in plan_day.scenes:
+            shot = shots[entry.scene_id]
+            if shot.hours > budget and entry.scene_id not in flagged:
+                flagged.add(entry.scene_id)
+                risks.append(ScheduleRisk(
+                    scene_id=entry.scene_id,
+                    risk_type="Daylight",
+                    message=(
+                        f"**MULTI-DAY SCENE:** {entry.header} needs ~{shot.hours:g} hours, more than one "
+                        f"{day.unit} unit day ({budget:g}h). Plan {-(-shot.hours // budget):.0f} consecutive days and "
+                        f"lock continuity (costume, weather, light) across them."
+                    ),
+                    severity=Severity.HIGH
+                ))
+        if day.unit == DAY_UNIT:
+            last_light = CALL_TIMES[DAY_UNIT] + budget
+            for entry in plan_day.scenes:
+                start = int(entry.start_time[:2]) + int(entry.start_time[3:]) / 60
+                end = start + entry.hours
+                if shots[entry.scene_id].exterior and shots[entry.scene_id].hours <= budget and end > last_light - SUNSET_MARGIN:
+                    risks.append(ScheduleRisk(
+                        scene_id=entry.scene_id,
+                        risk_type="Daylight",
+                        message=(
+                            f"**SUNSET RISK:** Day {plan_day.day}: {entry.header} wraps at {_clock(end)}, "
+                            f"within {SUNSET_MARGIN:g}h of last light ({_clock(last_light)}). Any slip forces a Day 2."
+                        ),
+                        severity=Severity.MEDIUM
+                    ))
+
+    # Turnaround: too little rest between a wrap and the next call for the same people
+    for index in range(1, len(days)):
+        before, after = days[index - 1], days[index]
+        if optimizer.turnaround_clash(before, after):
+            shared = sorted(before.cast & after.cast)
+            who = ", ".join(shared) if shared else "the whole unit"
+            risks.append(ScheduleRisk(
+                scene_id=plan_days[index].scenes[0].scene_id,
+                risk_type="Turnaround",
+                message=(
+                    f"**TURNAROUND:** Day {index} wraps at {plan_days[index - 1].wrap_time} and Day {index + 1} calls at "
+                    f"{plan_days[index].call_time}: only {optimizer.rest_hours(before, after):g}h rest for {who} "
+                    f"(minimum {optimizer.turnaround_hours:g}h)."
+                ),
+                severity=Severity.HIGH
+            ))
+
+    # Company moves: days split across three or more locations
+    for plan_day in plan_days:
+        if len(plan_day.locations) >= 3:
+            risks.append(ScheduleRisk(
+                scene_id=plan_day.scenes[0].scene_id,
+                risk_type="Company Move",
+                message=(
+                    f"**COMPANY MOVES:** Day {plan_day.day} moves the unit {len(plan_day.locations) - 1} times "
+                    f"({' -> '.join(plan_day.locations)}), ~{COMPANY_MOVE_HOURS:g}h lost per move."
+                ),
+                severity=Severity.MEDIUM
+            ))
+
+    # Cast hold: actors paid to wait between their shoot days (one entry per actor)
+    called: Dict[str, List[ShootDay]] = {}
+    for plan_day in plan_days:
+        for actor in plan_day.cast:
+            called.setdefault(actor, []).append(plan_day)
+    for actor, actor_days in sorted(called.items()):
+        idle = actor_days[-1].day - actor_days[0].day + 1 - len(actor_days)
+        if idle < CAST_HOLD_DAYS:
+            continue
+        gap, returning = max(((b.day - a.day - 1, b) for a, b in zip(actor_days, actor_days[1:])), key=lambda pair: pair[0])
+        risks.append(ScheduleRisk(
+            scene_id=returning.scenes[0].scene_id,
+            risk_type="Cast Hold",
+            message=(
+                f"**CAST HOLD:** {actor} works {len(actor_days)} days but is held for {idle} idle days between "
+                f"Day {actor_days[0].day} and Day {actor_days[-1].day} (longest gap {gap} days, before Day {returning.day})."
+            ),
+            severity=Severity.LOW
+        ))
+    return risks
+
+
+def optimize_schedule(
+    scenes: Sequence[Scene],
+    cast: Optional[Dict[str, List[str]]] = None,
+    daylight_hours: float = 10.0,
+    night_hours: float = 10.0,
+    turnaround_hours: float = 12.0,
+    seed: int = 0,
+    search_work: int = SEARCH_WORK,
+    max_days: Optional[int] = None
+) -> SchedulePlan:
+    """
+    Optimized shoot order for the analyzed scenes, packed into DAY/NIGHT unit days.
+    Minimizes shoot days, company moves, day/night flips, turnaround clashes and cast hold days.
+    `cast` maps scene id -> speaking characters (see segmenter.character_cues).
+    Raises ScheduleTooLong when script-order packing needs more than `max_days` days.
+    """
+    shots = _shots(scenes, cast or {})
+    if not shots:
+        return SchedulePlan()
+    optimizer = Optimizer(shots, {DAY_UNIT: daylight_hours, NIGHT_UNIT: night_hours}, turnaround_hours)
+
+    baseline = optimizer.pack(shots)
+    if max_days is not None and len(baseline) > max_days:
+        # The search re-packs every candidate: refuse before it multiplies the work
+        raise ScheduleTooLong(len(baseline), max_days)
+    baseline_moves, baseline_flips = _count_moves_and_flips(baseline)
+    days = optimizer.search(seed, search_work)
+    moves, flips = _count_moves_and_flips(days)
+
+    plan_days = [_shoot_day(number, day) for number, day in enumerate(days, start=1)]
+
+    return SchedulePlan(
+        days=plan_days,
+        schedule_risks=_risks(optimizer, days, plan_days),
+        total_days=len(plan_days),
+        company_moves=moves,
+        day_night_flips=flips,
+        baseline_company_moves=baseline_moves,
+        baseline_day_night_flips=baseline_flips
+    )
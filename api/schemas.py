@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_serializer, model_validator
+from typing import Dict, List, Optional
 from enum import Enum
+from money import PAISE_PER_RUPEE, format_paise, parse_paise
 
 class Severity(str, Enum):
     LOW = "Low"
@@ -38,6 +39,7 @@ class ComplianceRisk(BaseModel):
     trigger_text: str = Field(..., description="The specific text in script that triggered this.")
     legal_requirement: str = Field(..., description="Legal requirement e.g., 'Static Warning', 'NOC Required'.")
     estimated_fine: str = Field(..., description="Potential fine or delay cost.")
+    scene_id: Optional[str] = Field(None, description="ID of the scene containing the trigger text, if scene-specific.")
 
 class AssetStatus(str, Enum):
     CLEARED = "Cleared"
@@ -51,8 +53,21 @@ class ProductionAsset(BaseModel):
 
 class ExpenseCategory(BaseModel):
     category: str = Field(..., description="Category Name e.g. 'Location & Permits'")
-    cost: str = Field(..., description="Estimated cost string e.g. '₹ 50,000'")
+    cost: Optional[str] = Field(None, description="Estimated cost string e.g. '₹ 50,000'")
     reason: str = Field(..., description="Reasoning or specific line items.")
+    amount_paise: Optional[int] = Field(None, description="Estimated cost in paise (₹1 = 100 paise). Leave null to derive it from 'cost'.")
+
+    # amount_paise is the source of truth; `cost` is parsed only when no amount is given
+    # and is always re-rendered from amount_paise on output.
+    @model_validator(mode="after")
+    def _fill_amount(self):
+        if self.amount_paise is None:
+            self.amount_paise = parse_paise(self.cost)
+        return self
+
+    @field_serializer("cost")
+    def _render_cost(self, cost: Optional[str]) -> str:
+        return format_paise(self.amount_paise)
 
 class Scene(BaseModel):
     id: str = Field(..., description="Unique identifier for the scene (e.g., '1', '2A').")
@@ -61,10 +76,43 @@ class Scene(BaseModel):
     location: Optional[str] = Field(None, description="Extracted Location (e.g., 'TEMPLE', 'BAR').")
     time: Optional[str] = Field(None, description="Time of day (e.g., 'DAY', 'NIGHT').")
     estimated_cost: Optional[str] = Field("₹ 0", description="Total estimated cost for this scene.")
-    budget_code: Optional[int] = Field(0, description="Raw integer cost for calculation.")
+    budget_code: Optional[int] = Field(0, description="Raw integer cost (rupees) for calculation.")
     expense_breakdown: List[ExpenseCategory] = Field(default_factory=list, description="Detailed line-item breakdown.")
+    total_paise: Optional[int] = Field(None, description="Total scene cost in paise. Leave null to derive it from expense_breakdown.")
+
+    # total_paise is the source of truth (sum of the breakdown when present);
+    # budget_code and estimated_cost are derived from it.
+    @model_validator(mode="after")
+    def _fill_total(self):
+        if self.total_paise is None:
+            if self.expense_breakdown:
+                self.total_paise = sum(e.amount_paise for e in self.expense_breakdown)
+            else:
+                self.total_paise = parse_paise(self.estimated_cost)
+        self.budget_code = self.total_paise // PAISE_PER_RUPEE
+        return self
+
+    @field_serializer("estimated_cost")
+    def _render_estimated_cost(self, estimated_cost: Optional[str]) -> str:
+        return format_paise(self.total_paise)
+
+class ReusedScene(BaseModel):
+    scene_id: str = Field(..., description="Scene in this result whose analysis was reused.")
+    source_project_id: Optional[str] = Field(None, description="Project the near-identical scene was analyzed in.")
+    source_scene_id: str = Field(..., description="Its scene id there.")
+    similarity: float = Field(..., description="Estimated text similarity (0-1) to that scene.")
 
-class AnalysisResult(BaseModel):
+class PromptCompaction(BaseModel):
+    tokenizer: str = Field(..., description="How tokens were counted (e.g. 'tiktoken:o200k_base').")
+    raw_tokens: int = Field(..., description="Script tokens as written.")
+    prompt_tokens: int = Field(..., description="Script tokens as sent, after compaction and trimming.")
+    saved_tokens: int = Field(..., description="raw_tokens - prompt_tokens.")
+    saved_pct: float = Field(..., description="Share of raw tokens saved (%).")
+    chunks: int = Field(..., description="Requests the script was sent in.")
+    budget: Optional[int] = Field(None, description="Per-request token budget, if enforced.")
+
+class LLMAnalysisResult(BaseModel):
+    """The part of an AnalysisResult the LLM writes: its strict response schema (see llm.response_format_for)."""
     total_risk_score: int = Field(..., description="A calculated risk score (0-100) based on error severity.")
     potential_savings: str = Field(..., description="Total estimated savings if these errors are caught early (e.g., '$25,000').")
     scenes: List[Scene] = Field(..., description="List of recognized scenes in the script.")
@@ -74,9 +122,90 @@ class AnalysisResult(BaseModel):
     assets: List[ProductionAsset] = Field(default_factory=list, description="List of extracted assets checking for clearance.")
     overall_budget_breakdown: List[ExpenseCategory] = Field(default_factory=list, description="Server-side aggregated budget report.")
 
+class AnalysisResult(LLMAnalysisResult):
+    recomputed_scene_ids: Optional[List[str]] = Field(None, description="Server-side: scenes re-analyzed in an incremental run (others reused from the previous draft).")
+    reused_scenes: Optional[List[ReusedScene]] = Field(None, description="Server-side: scenes whose expense breakdown and compliance findings were reused from a near-identical scene analyzed before.")
+    prompt_compaction: Optional[PromptCompaction] = Field(None, description="Server-side: script tokens before and after prompt compaction for the LLM requests this analysis sent.")
+
 class StoryboardRequest(BaseModel):
     scene_desc: str = Field(..., description="Description of the scene or fix to visualize.")
     style: str = Field("Film Noir", description="Style of the storyboard (e.g., 'Film Noir', 'Sketch').")
+    use_mock: bool = Field(False, description="Use a demo image instead of the image model.")
 
 class StoryboardResponse(BaseModel):
     image_url: str = Field(..., description="URL of the generated storyboard image.")
+    key: Optional[str] = Field(None, description="Content address of the stored board (prompt + style).")
+    source: Optional[str] = Field(None, description="'generated', 'cache', 'coalesced', 'mock' or 'fallback'.")
+
+class StoryboardBatchRequest(BaseModel):
+    boards: List[StoryboardRequest] = Field(..., description="Boards to generate, e.g. one per scene card.")
+    use_mock: bool = Field(False, description="Use demo images instead of the image model.")
+
+class StoryboardBatchResponse(BaseModel):
+    results: List[StoryboardResponse] = Field(..., description="Boards, in request order.")
+    elapsed_ms: float = Field(..., description="Wall-clock time for the whole batch.")
+
+class BatchScript(BaseModel):
+    script_id: str = Field(..., description="Caller's id for this script/draft (e.g. project + draft number).")
+    script_text: str = Field(..., description="Full script text.")
+    budget_mode: str = Field("Medium", description="Budget mode: 'Low', 'Medium' or 'High'.")
+
+class BatchRequest(BaseModel):
+    scripts: List[BatchScript] = Field(..., description="Scripts to analyze.")
+    use_mock: bool = Field(False, description="Force the local engine for every script.")
+
+class BatchItemResult(BaseModel):
+    script_id: str = Field(..., description="Id from the request.")
+    status: str = Field(..., description="'ok' or 'error'.")
+    engine: Optional[str] = Field(None, description="Engine that produced the result: 'llm', 'local', 'local-fallback' or 'cache'.")
+    elapsed_ms: float = Field(..., description="Wall-clock time spent on this script.")
+    result: Optional[AnalysisResult] = Field(None, description="Analysis, when status is 'ok'.")
+    error: Optional[str] = Field(None, description="Failure reason, when status is 'error'.")
+
+class SlateSummary(BaseModel):
+    scripts_ok: int = Field(..., description="Scripts analyzed successfully.")
+    scripts_failed: int = Field(..., description="Scripts that failed.")
+    total_scenes: int = Field(..., description="Scenes across all analyzed scripts.")
+    total_budget: ExpenseCategory = Field(..., description="Slate-wide total budget.")
+    budget_breakdown: List[ExpenseCategory] = Field(default_factory=list, description="Slate-wide budget per expense category.")
+    average_risk_score: float = Field(..., description="Mean total_risk_score over analyzed scripts.")
+    max_risk_score: int = Field(..., description="Highest total_risk_score in the slate.")
+    highest_risk_script_id: Optional[str] = Field(None, description="Script with the highest risk score.")
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult] = Field(..., description="Per-script results, in request order.")
+    summary: SlateSummary = Field(..., description="Slate-level budget and risk rollup.")
+    elapsed_ms: float = Field(..., description="Wall-clock time for the whole batch.")
+
+class ScheduledScene(BaseModel):
+    scene_id: str = Field(..., description="Scene id from the analysis.")
+    header: str = Field(..., description="Scene header.")
+    location: str = Field(..., description="Normalized shooting location.")
+    start_time: str = Field(..., description="Planned start time (HH:MM, 24h).")
+    hours: float = Field(..., description="Estimated shooting hours for this scene on this day.")
+
+class ShootDay(BaseModel):
+    day: int = Field(..., description="Shoot day number, starting at 1.")
+    unit: str = Field(..., description="'DAY' or 'NIGHT' unit.")
+    call_time: str = Field(..., description="Unit call time (HH:MM).")
+    wrap_time: str = Field(..., description="Planned wrap time (HH:MM).")
+    hours: float = Field(..., description="Shooting hours planned, including company moves.")
+    locations: List[str] = Field(default_factory=list, description="Locations in shooting order.")
+    cast: List[str] = Field(default_factory=list, description="Speaking cast called for the day.")
+    scenes: List[ScheduledScene] = Field(default_factory=list, description="Scenes in shooting order.")
+
+class ScheduleRequest(BaseModel):
+    scenes: List[Scene] = Field(..., description="Scenes from an AnalysisResult.")
+    cast: Optional[Dict[str, List[str]]] = Field(None, description="Speaking cast per scene id, if known.")
+    daylight_hours: float = Field(10.0, ge=1, le=24, description="Usable shooting hours for a DAY unit.")
+    night_hours: float = Field(10.0, ge=1, le=24, description="Usable shooting hours for a NIGHT unit.")
+    turnaround_hours: float = Field(12.0, ge=1, le=24, description="Minimum rest between wrap and the next call.")
+
+class SchedulePlan(BaseModel):
+    days: List[ShootDay] = Field(default_factory=list, description="Optimized per-day shooting plan.")
+    schedule_risks: List[ScheduleRisk] = Field(default_factory=list, description="Risks found in the optimized plan.")
+    total_days: int = Field(0, description="Number of shoot days.")
+    company_moves: int = Field(0, description="Location changes in the optimized plan.")
+    day_night_flips: int = Field(0, description="Switches between DAY and NIGHT units in the optimized plan.")
+    baseline_company_moves: int = Field(0, description="Location changes when shooting in script order.")
+    baseline_day_night_flips: int = Field(0, description="DAY/NIGHT switches when shooting in script order.")
@@ -0,0 +1,55 @@
+import re
+from typing import Iterator, List, NamedTuple
+
+# Scene Headers (Sluglines)
+# Matches:
+# 1. Lines starting with INT or EXT (case insensitive), optionally indented
+# 2. Followed by a dot or space
+# 3. Typical sluglines like "INT. OFFICE" or "EXT FOREST - DAY"
+# Horizontal whitespace only, so a match never swallows blank lines or runs into the next line.
+SCENE_HEADER_PATTERN = re.compile(r"^[ \t]*(?:INT|EXT)[. \t][^\n]*", re.MULTILINE | re.IGNORECASE)
+
+# Character cues: an all-caps name alone on a line after a blank line, optionally with an
+# extension like "(V.O.)" or "(CONT'D)", directly followed by dialogue.
+CHARACTER_CUE_PATTERN = re.compile(
+    r"\n[ \t]*\n[ \t]*(?!(?:INT|EXT)[. \t])([A-Z][A-Z0-9 .'\-]{0,29}?)[ \t]*(?:\([^)\n]*\))?[ \t]*\n(?=[ \t]*\S)"
+)
+NOT_CHARACTERS = {"FADE IN", "FADE OUT", "CONTINUED", "THE END", "INTERCUT"}
+
+
+class SceneSpan(NamedTuple):
+    """
+    One scene of a script.
+    `body` is always script_text[start:end] and includes the header line itself.
+    """
+    header: str
+    start: int
+    end: int
+    body: str
+
+
+def iter_scenes(script_text: str) -> Iterator[SceneSpan]:
+    """
+    Single-pass scene segmenter.
+    Yields every scene span in script order, in linear time.
+    Repeated sluglines ("INT. HOUSE - NIGHT" twice) each get their own body.
+    Text before the first slugline (title page etc.) is not part of any scene.
+    """
+    previous = None
+    for match in SCENE_HEADER_PATTERN.finditer(script_text):
+        if previous is not None:
+            yield _span(script_text, previous, match.start())
+        previous = match
+    if previous is not None:
+        yield _span(script_text, previous, len(script_text))
+
+
+def _span(script_text: str, match: "re.Match[str]", end: int) -> SceneSpan:
+    start = match.start()
+    return SceneSpan(header=match.group(0).strip(), start=start, end=end, body=script_text[start:end])
+
+
+def character_cues(body: str) -> List[str]:
+    """Speaking characters in a scene body, in order of first cue."""
+    names = dict.fromkeys(match.group(1).strip() for match in CHARACTER_CUE_PATTERN.finditer(body))
+    return [name for name in names if name not in NOT_CHARACTERS]
@@ -0,0 +1,240 @@
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from schemas import ComplianceRisk, Scene
+from segmenter import character_cues
+from cache import ENGINE_VERSION, normalize_script, sha256
+
+# --- NEAR-DUPLICATE SCENE INDEX ---
+# Drafts and sister projects share many scenes that differ only in a reworded line or a renamed
+# character, so their exact hashes differ and the cache misses them. Each analyzed scene is
+# indexed by a MinHash signature of its text (word 3-gram shingles, speaking characters masked),
+# bucketed by LSH bands in SQLite. A lookup only compares against scenes that share a band
+# bucket, then keeps those whose estimated similarity clears the threshold; their expense
+# breakdown and compliance findings can be reused instead of asking the LLM again.
+
+NUM_PERMUTATIONS = 64
+BANDS = 16  # x 4 rows: pairs at ~0.5 similarity start to collide, ~0.8+ almost always do
+ROWS = NUM_PERMUTATIONS // BANDS
+SHINGLE_WORDS = 3
+SCENE_SIMILARITY = float(os.environ.get("SCENE_SIMILARITY", 0.85))
+# Scenes shorter than this many words are too generic to reuse ("HERO nods.")
+MIN_SCENE_WORDS = 12
+SCENE_INDEX_MAX_ENTRIES = int(os.environ.get("SCENE_INDEX_MAX_ENTRIES", 50000))  # Least recently used go first
+
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)  # Fixed: signatures must stay comparable across processes and restarts
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}Q"
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS scenes ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, content_hash TEXT NOT NULL, engine TEXT NOT NULL, budget_mode TEXT NOT NULL,"
+    " project_id TEXT, scene_id TEXT NOT NULL, signature BLOB NOT NULL, scene TEXT NOT NULL, compliance TEXT NOT NULL,"
+    " created_at REAL NOT NULL, used_at REAL NOT NULL, UNIQUE (content_hash, engine, budget_mode))",
+    "CREATE INDEX IF NOT EXISTS idx_scenes_used ON scenes (used_at)",
+    # band bucket -> scenes; (band << 32 | hash of the band's rows) in one integer key
+    "CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, scene INTEGER NOT NULL, PRIMARY KEY (bucket, scene)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_buckets_scene ON buckets (scene)",
+]
+
+
+class NearDuplicate(NamedTuple):
+    scene: Scene  # The earlier scene's analysis (its id, not the new one)
+    compliance_risks: List[ComplianceRisk]
+    similarity: float
+    project_id: Optional[str]
+
+
+def shingles(body: str) -> List[int]:
+    """Word 3-grams of a scene (header included), speaking characters replaced by one token."""
+    text = body.lower()
+    names = {name.lower() for name in character_cues(body)}
+    words = ["@" if word in names else word for word in WORD_PATTERN.findall(text)]
+    if len(words) < SHINGLE_WORDS:
+        return [zlib.crc32(" ".join(words).encode())] if words else []
+    return list({zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode()) for i in range(len(words) - SHINGLE_WORDS + 1)})
+
+
+def signature(body: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature, or None for scenes too short to compare."""
+    if len(WORD_PATTERN.findall(body.lower())) < MIN_SCENE_WORDS:
+        return None
+    values = shingles(body)
+    return tuple(min((a * x + b) % MERSENNE_PRIME for x in values) for a, b in PERMUTATIONS)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity: share of matching signature positions."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERMUTATIONS
+
+
+def band_buckets(sig: Sequence[int]) -> List[int]:
+    return [
+        (band << 32) | zlib.crc32(struct.pack(f"<{ROWS}Q", *sig[band * ROWS:(band + 1) * ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+def _engine_key(engine: str) -> str:
+    # Scenes analyzed by an older engine version are never reused
+    return f"{engine}:{ENGINE_VERSION}"
+
+
+class SceneIndex:
+    """
+    Analyzed scenes by MinHash/LSH in a local SQLite file; inserts as drafts are analyzed.
+    Holds up to `max_entries` scenes, dropping the least recently added or reused.
+    """
+
+    def __init__(self, path: str, threshold: float = SCENE_SIMILARITY, max_entries: int = SCENE_INDEX_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(scenes)")}
+        if columns and "used_at" not in columns:
+            # Index files from before the size cap: start them over
+            self._conn.execute("DROP TABLE scenes")
+            self._conn.execute("DROP TABLE IF EXISTS buckets")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self.lookups = 0
+        self.hits = 0
+
+    def add(
+        self,
+        scenes: Iterable[Tuple[str, Scene]],
+        compliance_risks: List[ComplianceRisk],
+        engine: str,
+        budget_mode: str,
+        project_id: Optional[str] = None
+    ) -> int:
+        """
+        Indexes (scene body, analyzed Scene) pairs with the compliance findings of those scenes.
+        Bodies already indexed for this engine and budget mode are skipped. Returns how many were added.
+        """
+        engine = _engine_key(engine)
+        risks_by_scene: Dict[str, List[dict]] = {}
+        for risk in compliance_risks:
+            if risk.scene_id is not None:
+                risks_by_scene.setdefault(risk.scene_id, []).append(risk.model_dump(mode="json"))
+
+        candidates = {sha256(normalize_script(body)): (body, scene) for body, scene in scenes}
+        if not candidates:
+            return 0
+        with self._lock:
+            known = {
+                row[0] for row in self._conn.execute(
+                    f"SELECT content_hash FROM scenes WHERE engine = ? AND budget_mode = ? AND content_hash IN ({','.join('?' * len(candidates))})",
+                    (engine, budget_mode, *candidates)
+                )
+            }
+        rows = []
+        for content_hash, (body, scene) in candidates.items():
+            if content_hash in known:
+                continue
+            sig = signature(body)
+            if sig is not None:
+                rows.append((content_hash, scene, sig))
+        if not rows:
+            return 0
+
+        now = time.time()
+        with self._lock, self._conn:
+            for content_hash, scene, sig in rows:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO scenes (content_hash, engine, budget_mode, project_id, scene_id, signature, scene, compliance, created_at, used_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        content_hash, engine, budget_mode, project_id, scene.id, struct.pack(SIGNATURE_FORMAT, *sig),
+                        scene.model_dump_json(), json.dumps(risks_by_scene.get(scene.id, [])), now, now
+                    )
+                )
+                if cursor.rowcount:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO buckets (bucket, scene) VALUES (?, ?)",
+                        [(bucket, cursor.lastrowid) for bucket in band_buckets(sig)]
+                    )
+            self._prune()
+        return len(rows)
+
+    def _prune(self) -> None:
+        # Called with the lock held, inside the insert transaction
+        over = self._conn.execute("SELECT COUNT(*) FROM scenes").fetchone()[0] - self.max_entries
+        if over <= 0:
+            return
+        stale = [(row[0],) for row in self._conn.execute("SELECT id FROM scenes ORDER BY used_at LIMIT ?", (over,))]
+        self._conn.executemany("DELETE FROM buckets WHERE scene = ?", stale)
+        self._conn.executemany("DELETE FROM scenes WHERE id = ?", stale)
+
+    def find(self, body: str, engine: str, budget_mode: str) -> Optional[NearDuplicate]:
+        """Most similar indexed scene at or above the threshold (same engine and budget mode), if any."""
+        sig = signature(body)
+        if sig is None:
+            return None
+        engine = _engine_key(engine)
+        buckets = band_buckets(sig)
+        with self._lock:
+            self.lookups += 1
+            rows = self._conn.execute(
+                "SELECT s.id, s.signature, s.scene, s.compliance, s.project_id FROM scenes s"
+                f" WHERE s.id IN (SELECT scene FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}))"
+                " AND s.engine = ? AND s.budget_mode = ?",
+                (*buckets, engine, budget_mode)
+            ).fetchall()
+        best = None
+        for row_id, packed, scene, compliance, project_id in rows:
+            score = similarity(sig, struct.unpack(SIGNATURE_FORMAT, packed))
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, row_id, scene, compliance, project_id)
+        if best is None:
+            return None
+        score, row_id, scene, compliance, project_id = best
+        with self._lock, self._conn:
+            self.hits += 1
+            self._conn.execute("UPDATE scenes SET used_at = ? WHERE id = ?", (time.time(), row_id))
+        return NearDuplicate(
+            scene=Scene.model_validate_json(scene),
+            compliance_risks=[ComplianceRisk.model_validate(risk) for risk in json.loads(compliance)],
+            similarity=score,
+            project_id=project_id
+        )
+
+    def find_all(self, scenes: Iterable[Tuple[str, str]], engine: str, budget_mode: str) -> Dict[str, NearDuplicate]:
+        """{scene id: near duplicate} for (scene id, body) pairs; scenes without one are left out."""
+        found = {}
+        for scene_id, body in scenes:
+            duplicate = self.find(body, engine, budget_mode)
+            if duplicate is not None:
+                found[scene_id] = duplicate
+        return found
+
+    def stats(self) -> dict:
+        with self._lock:
+            scenes = self._conn.execute("SELECT COUNT(*) FROM scenes").fetchone()[0]
+        return {"scenes": scenes, "max_entries": self.max_entries, "threshold": self.threshold, "lookups": self.lookups, "hits": self.hits}
+
+
+def scene_index_from_env() -> Optional[SceneIndex]:
+    """
+    SCENE_INDEX=off disables near-duplicate reuse. SCENE_INDEX_PATH: SQLite file (default: temp dir).
+    SCENE_SIMILARITY: minimum estimated similarity to reuse a scene (default 0.85).
+    SCENE_INDEX_MAX_ENTRIES: scenes kept (default 50000).
+    """
+    if os.environ.get("SCENE_INDEX", "on").lower() in ("off", "0", "false", "no"):
+        return None
+    return SceneIndex(os.environ.get("SCENE_INDEX_PATH", os.path.join(tempfile.gettempdir(), "continuityguard_scenes.db")))
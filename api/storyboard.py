@@ -0,0 +1,200 @@
+import asyncio
+import base64
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from analyzer import mock_generate_storyboard, storyboard_prompt
+from cache import sha256
+from llm import LLMPool
+from metrics import LLM_FALLBACKS
+from schemas import StoryboardRequest, StoryboardResponse
+
+# --- STORYBOARDS ---
+# Scene cards ask for a board every time they are expanded. Boards are stored on local disk,
+# addressed by prompt + style, so a board is generated once and then served from disk. Identical
+# requests that arrive while a board is still generating share that one image call, and image
+# calls are capped (concurrency and requests per minute) to stay inside the provider's limits.
+
+IMAGE_MODEL = "dall-e-3"
+# Bump when the prompt template changes in a way old boards should not survive
+STORYBOARD_VERSION = "1"
+STORYBOARD_MAX_CONCURRENCY = int(os.environ.get("STORYBOARD_MAX_CONCURRENCY", 3))
+STORYBOARD_RATE_PER_MINUTE = float(os.environ.get("STORYBOARD_RATE_PER_MINUTE", 7))  # DALL-E 3 tier-1 limit
+STORYBOARD_IMAGE_ROUTE = "/api/storyboard/images"
+
+STORYBOARD_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def storyboard_key(scene_desc: str, style: str) -> str:
+    """Content address of a board: same description and style (ignoring case/spacing) -> same image."""
+    return sha256(json.dumps([STORYBOARD_VERSION, IMAGE_MODEL, _normalize(style), _normalize(scene_desc)]))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+class StoryboardStore:
+    """
+    Content-addressed boards on disk: <root>/<key[:2]>/<key>.png plus <key>.json metadata.
+    Writes go to a temp file first and are renamed into place, so readers never see half an image.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{ext}")
+
+    def image_path(self, key: str) -> Optional[str]:
+        if not STORYBOARD_KEY_PATTERN.match(key):
+            return None
+        path = self._path(key, "png")
+        return path if os.path.exists(path) else None
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, image: bytes, meta: dict) -> dict:
+        os.makedirs(os.path.dirname(self._path(key, "png")), exist_ok=True)
+        meta = {**meta, "key": key, "bytes": len(image), "stored_at": time.time()}
+        # Image first: metadata present means the image is complete
+        self._write(self._path(key, "png"), image)
+        self._write(self._path(key, "json"), json.dumps(meta).encode("utf-8"))
+        return meta
+
+    def _write(self, path: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def stats(self) -> dict:
+        boards = 0
+        size = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".png"):
+                    boards += 1
+                    size += os.path.getsize(os.path.join(directory, name))
+        return {"path": self.root, "boards": boards, "bytes": size}
+
+
+class RateLimiter:
+    """Spaces call starts at least 60 / per_minute seconds apart (0 disables)."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class StoryboardService:
+    def __init__(
+        self,
+        store: StoryboardStore,
+        llm: Optional[LLMPool],
+        max_concurrency: int = STORYBOARD_MAX_CONCURRENCY,
+        rate_per_minute: float = STORYBOARD_RATE_PER_MINUTE
+    ):
+        self.store = store
+        self.llm = llm
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = RateLimiter(rate_per_minute)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.generated = 0
+        self.served_from_store = 0
+        self.coalesced = 0
+
+    async def get(self, request: StoryboardRequest, use_mock: bool = False) -> StoryboardResponse:
+        if use_mock or request.use_mock or self.llm is None:
+            # Demo mode: prompt-based image URL, nothing to generate or store
+            return StoryboardResponse(image_url=mock_generate_storyboard(request.scene_desc), source="mock")
+
+        key = storyboard_key(request.scene_desc, request.style)
+        if self.store.get(key) is not None:
+            self.served_from_store += 1
+            return StoryboardResponse(image_url=f"{STORYBOARD_IMAGE_ROUTE}/{key}.png", key=key, source="cache")
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            # Same board already being generated: wait for that call instead of paying twice
+            self.coalesced += 1
+            response = await asyncio.shield(task)
+            return response.model_copy(update={"source": "coalesced"})
+
+        # A task of its own, so the first caller disconnecting neither cancels the image call
+        # for the requests coalesced into it nor loses the board
+        task = asyncio.create_task(self._generate(key, request))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _generate(self, key: str, request: StoryboardRequest) -> StoryboardResponse:
+        prompt = storyboard_prompt(request.scene_desc, request.style)
+        try:
+            async with self.semaphore:
+                await self.rate_limiter.wait()
+                response = await self.llm.client.images.generate(
+                    model=IMAGE_MODEL,
+                    prompt=prompt,
+                    size="1024x1024",
+                    quality="standard",
+                    n=1,
+                    response_format="b64_json",
+                )
+            image = base64.b64decode(response.data[0].b64_json)
+        except Exception as e:
+            # Not stored: the next view retries the image call
+            print(f"Storyboard Generation Failed: {e}. Falling back to demo image.")
+            LLM_FALLBACKS.inc("storyboard")
+            return StoryboardResponse(image_url=mock_generate_storyboard(request.scene_desc), source="fallback")
+
+        await asyncio.to_thread(self.store.put, key, image, {
+            "scene_desc": request.scene_desc, "style": request.style, "model": IMAGE_MODEL, "prompt": prompt
+        })
+        self.generated += 1
+        return StoryboardResponse(image_url=f"{STORYBOARD_IMAGE_ROUTE}/{key}.png", key=key, source="generated")
+
+    async def get_many(self, requests: List[StoryboardRequest], use_mock: bool = False) -> List[StoryboardResponse]:
+        """Boards for many scenes at once; duplicates coalesce and the limits above still apply."""
+        return list(await asyncio.gather(*(self.get(request, use_mock) for request in requests)))
+
+    def stats(self) -> dict:
+        return {
+            "generated": self.generated,
+            "served_from_store": self.served_from_store,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            **self.store.stats(),
+        }
+
+
+def storyboard_store_from_env() -> StoryboardStore:
+    """STORYBOARD_DIR: where boards are kept (default: temp dir, the only writable dir on serverless)."""
+    return StoryboardStore(os.environ.get("STORYBOARD_DIR", os.path.join(tempfile.gettempdir(), "continuityguard_storyboards")))
+
@@ -0,0 +1,167 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from schemas import AnalysisResult
+from analyzer import add_rule_hits, build_local_result, iter_chunk_results_async, iter_local_scenes, merge_results
+from llm import LLMPool
+from metrics import LLM_FALLBACKS
+
+# NDJSON event stream for /api/analyze/stream. One JSON object per line:
+#   {"event": "scene" | "error" | "compliance_risk" | "schedule_risk" | "asset" | "fallback" | "summary",
+#    "source": "local" | "llm" | "cache", "data": {...}}
+# In LLM mode the local engine's scenes are streamed first as a quick preview; LLM scenes with
+# the same id arrive later and supersede them. "summary" is always the last event.
+# The local pass runs on a worker thread, and the LLM chunk requests go out as the stream starts.
+
+
+def event(kind: str, source: str, data) -> dict:
+    if hasattr(data, "model_dump"):
+        data = data.model_dump(mode="json")
+    return {"event": kind, "source": source, "data": data}
+
+
+def to_ndjson(item: dict) -> str:
+    return json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def summary_event(result: AnalysisResult, source: str) -> dict:
+    return event("summary", source, {
+        "total_risk_score": result.total_risk_score,
+        "potential_savings": result.potential_savings,
+        "overall_budget_breakdown": [e.model_dump(mode="json") for e in result.overall_budget_breakdown],
+        "scene_count": len(result.scenes),
+    })
+
+
+def result_events(result: AnalysisResult, source: str, include_scenes: bool = True) -> Iterator[dict]:
+    """Replays a finished AnalysisResult as stream events."""
+    if include_scenes:
+        for scene in result.scenes:
+            yield event("scene", source, scene)
+    for error in result.errors:
+        yield event("error", source, error)
+    for risk in result.compliance_risks:
+        yield event("compliance_risk", source, risk)
+    for risk in result.schedule_risks:
+        yield event("schedule_risk", source, risk)
+    for asset in result.assets:
+        yield event("asset", source, asset)
+    yield summary_event(result, source)
+
+
+def _local_analysis(script_text: str, budget_mode: str):
+    """Runs the local engine scene by scene. Yields scene events, then returns the finished result."""
+    parsed_scenes = []
+    hits = {}
+    for scene, scene_hits in iter_local_scenes(script_text):
+        parsed_scenes.append(scene)
+        add_rule_hits(hits, scene_hits)
+        yield event("scene", "local", scene)
+    return build_local_result(script_text, budget_mode, parsed_scenes, hits)
+
+
+async def _run_local(script_text: str, budget_mode: str, events: asyncio.Queue) -> AnalysisResult:
+    """_local_analysis on a worker thread (it is CPU-bound); scene events are handed to `events` as they come."""
+    loop = asyncio.get_running_loop()
+
+    def run():
+        local = _local_analysis(script_text, budget_mode)
+        try:
+            while True:
+                loop.call_soon_threadsafe(events.put_nowait, next(local))
+        except StopIteration as done:
+            return done.value
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    return await asyncio.to_thread(run)
+
+
+async def _collect_chunks(script_text: str, llm: LLMPool, budget_mode: str, parts: asyncio.Queue) -> None:
+    """Puts each chunk result on `parts` as it lands, then None (or the exception that ended the analysis)."""
+    try:
+        async for part in iter_chunk_results_async(script_text, llm, budget_mode):
+            parts.put_nowait(part)
+    except Exception as e:
+        parts.put_nowait(e)
+        return
+    parts.put_nowait(None)
+
+
+async def stream_analysis(
+    script_text: str,
+    budget_mode: str,
+    llm: Optional[LLMPool],
+    on_complete: Optional[Callable[[AnalysisResult], None]] = None
+) -> AsyncIterator[dict]:
+    """
+    Emits each Scene / finding as soon as it is available.
+    `on_complete` receives the final AnalysisResult (e.g. to fill the cache); it is not called
+    when the LLM failed and the stream fell back to the local engine.
+    """
+    # LLM chunks go out right away; their results wait until the local preview has been sent
+    parts: asyncio.Queue = asyncio.Queue()
+    collector = asyncio.ensure_future(_collect_chunks(script_text, llm, budget_mode, parts)) if llm is not None else None
+    try:
+        # Fast local pass first, off the event loop: scenes are on the wire within milliseconds
+        events: asyncio.Queue = asyncio.Queue()
+        local = asyncio.ensure_future(_run_local(script_text, budget_mode, events))
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield item
+        local_result = await local
+
+        if llm is None:
+            for item in result_events(local_result, "local", include_scenes=False):
+                yield item
+            if on_complete is not None:
+                on_complete(local_result)
+            return
+
+        partials = {}
+        seen = set()
+        while True:
+            part = await parts.get()
+            if part is None:
+                break
+            if isinstance(part, Exception):
+                print(f"OpenAI Streaming Analysis Failed: {part}. Falling back to internal engine.")
+                LLM_FALLBACKS.inc("stream")
+                yield event("fallback", "local", {"reason": str(part)})
+                for item in result_events(local_result, "local", include_scenes=False):
+                    yield item
+                return
+            chunk_index, chunk_count, chunk, partial = part
+            partials[chunk_index] = (chunk, partial)
+            context_ids = set(chunk.context_ids) if chunk_count > 1 else set()
+            for scene in partial.scenes:
+                if scene.id not in context_ids:
+                    yield event("scene", "llm", scene)
+            # Same de-duplication keys as merge_results
+            for kind, items, key in (
+                ("error", partial.errors, lambda e: (e.error_type, e.from_scene_id, e.to_scene_id)),
+                ("compliance_risk", partial.compliance_risks, lambda r: (r.category, r.trigger_text)),
+                ("schedule_risk", partial.schedule_risks, lambda r: (r.scene_id, r.risk_type)),
+            ):
+                for item in items:
+                    if (kind, key(item)) not in seen:
+                        seen.add((kind, key(item)))
+                        yield event(kind, "llm", item)
+    finally:
+        # Client gone (or the local pass failed): stop the chunk calls still in flight
+        if collector is not None and not collector.done():
+            collector.cancel()
+
+    ordered = [partials[i] for i in sorted(partials)]
+    if len(ordered) == 1:
+        result = ordered[0][1]
+    else:
+        result = merge_results([p for _, p in ordered], [c for c, _ in ordered])
+    for asset in result.assets:
+        yield event("asset", "llm", asset)
+    yield summary_event(result, "llm")
+    if on_complete is not None:
+        on_complete(result)
@@ -0,0 +1,188 @@
+"""
+Benchmarks for the analysis pipeline. Prints one JSON report (or writes it with --output),
+so runs can be diffed between releases.
+
+Usage:
+    python benchmark.py                          # 10, 100, 500 and 2000 scene scripts
+    python benchmark.py --sizes 100 500 --repeat 20 --output bench.json
+    python benchmark.py --no-http                # in-process stages only
+
+Stages, per script size:
+    segmentation     segmenter.iter_scenes over the whole script
+    compliance_scan  rules.scan over every scene body
+    aggregation      analyzer.aggregate_budget over the estimated scenes
+    local_engine     analyzer.mock_analyze_script end to end
+    http_local       POST /api/analyze with use_mock=true
+    http_llm         POST /api/analyze through fake_openai.py (chunking, pooled client, merge)
+
+Each stage reports latency percentiles (ms), throughput (scenes/s) and peak traced memory.
+The HTTP stages run the real app under uvicorn on a background thread, with the analysis cache off.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+from synthetic_script import generate_screenplay  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 500, 2000]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def measure(fn, repeat, scene_count):
+    """Runs fn `repeat` times for timing, then once more under tracemalloc for peak memory."""
+    fn()  # Warm-up (imports, regex caches, connection pool)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    mean_ms = sum(timings) / len(timings)
+    return {
+        "runs": repeat,
+        "mean_ms": round(mean_ms, 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "min_ms": round(timings[0], 3),
+        "max_ms": round(timings[-1], 3),
+        "scenes_per_sec": round(scene_count / (mean_ms / 1000), 1) if mean_ms else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(fake_base_url):
+    """Starts api/index.py under uvicorn on a background thread, talking to the fake OpenAI server."""
+    import uvicorn
+
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["OPENAI_BASE_URL"] = fake_base_url
+    os.environ["ANALYSIS_CACHE"] = "off"  # Every request must do the work
+    os.environ.setdefault("JOBS_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench_jobs.db"))
+    from index import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(sizes, repeat, http_repeat, with_http, seed):
+    from analyzer import aggregate_budget, mock_analyze_script
+    from rules import scan
+    from segmenter import iter_scenes
+
+    backend = client = fake = None
+    if with_http:
+        import httpx
+        from fake_openai import start_fake_openai
+
+        fake = start_fake_openai()
+        backend, base_url = start_backend(f"http://127.0.0.1:{fake.server_port}/v1")
+        client = httpx.Client(base_url=base_url, timeout=300)
+
+    results = []
+    try:
+        for size in sizes:
+            script = generate_screenplay(size, seed)
+            spans = list(iter_scenes(script))
+            scenes = mock_analyze_script(script).scenes
+            stages = {
+                "segmentation": measure(lambda: list(iter_scenes(script)), repeat, len(spans)),
+                "compliance_scan": measure(
+                    lambda: [scan(span.body, None, span.start) for span in spans], repeat, len(spans)
+                ),
+                "aggregation": measure(lambda: aggregate_budget(scenes), repeat, len(scenes)),
+                "local_engine": measure(lambda: mock_analyze_script(script), repeat, len(spans)),
+            }
+            if client is not None:
+                def post(use_mock):
+                    resp = client.post("/api/analyze", json={"script_text": script, "use_mock": use_mock})
+                    resp.raise_for_status()
+                stages["http_local"] = measure(lambda: post(True), http_repeat, len(spans))
+                stages["http_llm"] = measure(lambda: post(False), http_repeat, len(spans))
+
+            results.append({"scenes": len(spans), "script_chars": len(script), "stages": stages})
+            print(f"{len(spans)} scenes: " + ", ".join(
+                f"{name} p50={stats['p50_ms']}ms" for name, stats in stages.items()
+            ), file=sys.stderr)
+    finally:
+        if client is not None:
+            client.close()
+            backend.should_exit = True
+            fake.shutdown()
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+        "http_repeat": http_repeat if with_http else 0,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ContinuityGuard analysis pipeline benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Scene counts to generate")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per in-process stage")
+    parser.add_argument("--http-repeat", type=int, default=5, help="Timed runs per HTTP stage")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic script seed")
+    parser.add_argument("--no-http", action="store_true", help="Skip the /api/analyze round trips")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.http_repeat, not args.no_http, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
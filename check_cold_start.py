@@ -0,0 +1,85 @@
+"""
+Cold-start check for the serverless entry point (api/index.py). Exits 1 when a budget is broken;
+CI runs it on every push and pull request (.github/workflows/backend-checks.yml).
+
+Usage:
+    python check_cold_start.py                   # 5 fresh interpreters, p95 against the budgets
+    python check_cold_start.py --runs 20 --import-budget-ms 600
+
+Each run starts a new Python process (like a cold instance), then measures:
+    import        `import index` (FastAPI app, routes, stores)
+    health        first GET /api/health handler call
+    mock_analyze  first local-engine analysis of a short script
+and fails if the openai SDK was imported along the way: only the LLM path (or /api/warmup) may load it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import index
+imported = time.perf_counter()
+index.health_check()
+healthy = time.perf_counter()
+from analyzer import WARMUP_SCRIPT
+index.mock_analyze_script(WARMUP_SCRIPT)
+analyzed = time.perf_counter()
+print(json.dumps({
+    "import": (imported - start) * 1000,
+    "health": (healthy - imported) * 1000,
+    "mock_analyze": (analyzed - healthy) * 1000,
+    "sdk_loaded": "openai" in sys.modules,
+}))
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def probe(env):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=os.path.join(ROOT, "api"), env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=float(os.environ.get("COLD_START_IMPORT_BUDGET_MS", 1000)))
+    parser.add_argument("--analyze-budget-ms", type=float, default=float(os.environ.get("COLD_START_ANALYZE_BUDGET_MS", 250)))
+    args = parser.parse_args()
+
+    # Same as a serverless instance with a key configured: the SDK must still stay unloaded
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-cold-start-check")}
+    runs = [probe(env) for _ in range(args.runs)]
+
+    report = {
+        stage: {"p50_ms": round(percentile([r[stage] for r in runs], 50), 1), "p95_ms": round(percentile([r[stage] for r in runs], 95), 1)}
+        for stage in ("import", "health", "mock_analyze")
+    }
+    failures = []
+    if report["import"]["p95_ms"] > args.import_budget_ms:
+        failures.append(f"import p95 {report['import']['p95_ms']}ms > {args.import_budget_ms}ms")
+    if report["mock_analyze"]["p95_ms"] > args.analyze_budget_ms:
+        failures.append(f"mock_analyze p95 {report['mock_analyze']['p95_ms']}ms > {args.analyze_budget_ms}ms")
+    if any(r["sdk_loaded"] for r in runs):
+        failures.append("openai SDK imported on the health / local-engine path")
+
+    print(json.dumps({"runs": args.runs, "stages": report, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
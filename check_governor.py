@@ -0,0 +1,155 @@
+"""
+End-to-end check of the LLM governor (api/governor.py) against fake_openai.py. Exits 1 when
+a check fails; CI runs it with check_cold_start.py (.github/workflows/backend-checks.yml).
+
+Usage:
+    python check_governor.py
+    python check_governor.py --slo 0.3 --delay 1.5
+
+Runs the app in-process (lifespan included) on a fake OpenAI server started on a free port:
+    slo       completions slower than the SLO: /api/analyze answers from the local engine within
+              the deadline, the LLM result lands in the cache later, and the next identical
+              request is served from it
+    lanes     with the request bucket empty, an interactive analysis sent after a batch sweep
+              is admitted before the sweep's queued calls
+    budget    over the daily spend ceiling: the local engine answers and no completion is sent
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+async def check_slo(client, index, server, slo, delay):
+    from fake_openai import set_delay
+    from governor import LLMGovernor
+    from synthetic_script import generate_screenplay
+
+    index.app.state.llm.governor = LLMGovernor(slo_seconds=slo)
+    set_delay(server, delay)
+    script = generate_screenplay(4, seed=11)
+
+    start = time.perf_counter()
+    first = (await client.post("/api/analyze", json={"script_text": script})).json()
+    first_ms = (time.perf_counter() - start) * 1000
+
+    deadline = time.monotonic() + delay + 5
+    while index.app.state.llm.governor.late_filled == 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    set_delay(server, 0.0)
+
+    start = time.perf_counter()
+    second = (await client.post("/api/analyze", json={"script_text": script})).json()
+    second_ms = (time.perf_counter() - start) * 1000
+
+    failures = []
+    if first_ms > (slo + min(delay - slo, 0.5)) * 1000:
+        failures.append(f"slo: first answer took {first_ms:.0f}ms (SLO {slo * 1000:.0f}ms)")
+    if any(scene["summary"].startswith("Fake analysis") for scene in first["scenes"]):
+        failures.append("slo: first answer came from the LLM, not the local engine")
+    if index.app.state.llm.governor.late_filled != 1:
+        failures.append("slo: late LLM result never completed")
+    if not second["scenes"] or not all(scene["summary"].startswith("Fake analysis") for scene in second["scenes"]):
+        failures.append("slo: late LLM result was not served from the cache")
+    return {"first_ms": round(first_ms, 1), "cached_ms": round(second_ms, 1)}, failures
+
+
+async def check_lanes(client, index):
+    from governor import LLMGovernor
+    from synthetic_script import generate_screenplay
+
+    governor = LLMGovernor(requests_per_minute=240, slo_seconds=0)  # One request per 0.25s once drained
+    governor.requests.take(governor.requests.capacity)
+    index.app.state.llm.governor = governor
+    finished = {}
+
+    async def timed(name, coro):
+        await coro
+        finished[name] = time.perf_counter()
+
+    batch = client.post("/api/analyze/batch", json={"scripts": [
+        {"script_id": f"sweep-{i}", "script_text": generate_screenplay(3, seed=100 + i)} for i in range(4)
+    ]})
+    interactive = client.post("/api/analyze", json={"script_text": generate_screenplay(3, seed=200)})
+    start = time.perf_counter()
+    sweep = asyncio.ensure_future(timed("batch", batch))
+    await asyncio.sleep(0.1)  # The sweep's calls are queued first
+    await asyncio.gather(timed("interactive", interactive), sweep)
+
+    failures = []
+    if finished["interactive"] >= finished["batch"]:
+        failures.append("lanes: interactive analysis finished after the batch sweep")
+    if governor.admitted["batch"] != 4 or governor.admitted["interactive"] != 1:
+        failures.append(f"lanes: unexpected admissions {governor.admitted}")
+    return {
+        "interactive_ms": round((finished["interactive"] - start) * 1000, 1),
+        "batch_ms": round((finished["batch"] - start) * 1000, 1),
+    }, failures
+
+
+async def check_budget(client, index, server):
+    from governor import LLMGovernor
+    from synthetic_script import generate_screenplay
+
+    governor = LLMGovernor(daily_budget_usd=0.000001)
+    index.app.state.llm.governor = governor
+    sent = server.RequestHandlerClass.request_count
+    result = (await client.post("/api/analyze", json={"script_text": generate_screenplay(3, seed=300)})).json()
+
+    failures = []
+    if server.RequestHandlerClass.request_count != sent:
+        failures.append("budget: a completion was sent over the daily ceiling")
+    if governor.rejected["interactive"] != 1 or not result["scenes"]:
+        failures.append("budget: the call was not refused with a local answer")
+    return {"rejected": governor.rejected}, failures
+
+
+async def run(args):
+    import httpx
+
+    from fake_openai import start_fake_openai
+
+    server = start_fake_openai()
+    os.environ.update({
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1",
+        "ANALYSIS_CACHE": "memory",
+        "SCENE_INDEX": "off",
+    })
+    import index
+
+    report, failures = {}, []
+    async with index.lifespan(index.app):
+        transport = httpx.ASGITransport(app=index.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://governor-check", timeout=60) as client:
+            # SDK import and first local analysis block the loop once; keep them out of the timings
+            await client.post("/api/warmup")
+            for name, check in (
+                ("slo", lambda: check_slo(client, index, server, args.slo, args.delay)),
+                ("lanes", lambda: check_lanes(client, index)),
+                ("budget", lambda: check_budget(client, index, server)),
+            ):
+                report[name], found = await check()
+                failures.extend(found)
+    server.shutdown()
+    return report, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slo", type=float, default=0.3, help="Governor SLO for the slo check (seconds)")
+    parser.add_argument("--delay", type=float, default=1.5, help="Injected completion delay for the slo check (seconds)")
+    args = parser.parse_args()
+
+    sys.path[:0] = [os.path.join(ROOT, "api"), ROOT]
+    report, failures = asyncio.run(run(args))
+    print(json.dumps({"checks": report, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
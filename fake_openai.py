@@ -0,0 +1,178 @@
+"""
+Local fake of the OpenAI Chat Completions API, for testing the LLM path offline.
+
+Usage:
+    python fake_openai.py --port 8765 --delay 2.0
+    set OPENAI_BASE_URL=http://127.0.0.1:8765/v1 and OPENAI_API_KEY=fake before starting the backend
+
+It answers POST /v1/chat/completions with a valid AnalysisResult built from the
+[SCENE n] blocks in the user message (CONTEXT ONLY scenes are skipped, like the real prompt asks).
+POST /v1/images/generations returns a tiny PNG (b64_json).
+Repeated system messages are reported as cached prompt tokens, like provider-side prompt caching.
+POST /fake/delay {"delay": seconds} changes the injected delay while running (e.g. to push
+completions past the backend's LLM_SLO_SECONDS mid-test); set_delay() does the same in-process.
+"""
+import argparse
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 1x1 grey PNG
+FAKE_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA6fptVAAAACklEQVR4nGNgYAAAAAMAASsJTYQAAAAASUVORK5CYII="
+)
+
+SCENE_LABEL = re.compile(r"^\[SCENE (\S+?)( - CONTEXT ONLY)?\]\n([^\n]*)", re.MULTILINE)
+
+
+def build_analysis(user_content):
+    scenes = []
+    for match in SCENE_LABEL.finditer(user_content):
+        if match.group(2):
+            continue
+        header = match.group(3).strip()
+        header_upper = header.upper()
+        scenes.append({
+            "id": match.group(1),
+            "header": header,
+            "summary": f"Fake analysis of {header}",
+            "location": header_upper.replace("INT", "").replace("EXT", "").replace(".", "").split("-")[0].strip(),
+            "time": "NIGHT" if "NIGHT" in header_upper else "DAY",
+            "estimated_cost": "₹ 2.00 Lakhs",
+            "budget_code": 200000,
+            "expense_breakdown": [
+                {"category": "Location & Permits", "cost": "₹ 2 Lakhs", "reason": "Fake line item"}
+            ],
+        })
+
+    errors = []
+    if len(scenes) > 1:
+        errors.append({
+            "error_type": "Prop Inconsistency",
+            "description": f"Fake prop mismatch between scene {scenes[0]['id']} and {scenes[1]['id']}.",
+            "severity": "Medium",
+            "estimated_cost": "₹ 1 Lakhs",
+            "estimated_delay": "1 hour",
+            "suggested_fix": "Add an insert shot.",
+            "reasoning": "Fake reasoning.",
+            "from_scene_id": scenes[0]["id"],
+            "to_scene_id": scenes[1]["id"],
+        })
+
+    return {
+        "total_risk_score": 40,
+        "potential_savings": "₹ 5 Lakhs",
+        "scenes": scenes,
+        "errors": errors,
+        "compliance_risks": [],
+        "schedule_risks": [],
+        "assets": [],
+        "overall_budget_breakdown": [],
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    request_count = 0
+    lock = threading.Lock()
+    seen_prefixes = set()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path == "/fake/delay":
+            type(self).delay = float(payload.get("delay", 0.0))
+            self._send(200, {"delay": type(self).delay})
+            return
+
+        if not self.path.endswith(("/chat/completions", "/images/generations")):
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        with FakeOpenAIHandler.lock:
+            FakeOpenAIHandler.request_count += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+        if self.path.endswith("/images/generations"):
+            self._send(200, {
+                "created": int(time.time()),
+                "data": [{"b64_json": base64.b64encode(FAKE_PNG).decode("ascii"), "revised_prompt": payload.get("prompt")}],
+            })
+            return
+
+        user_content = "".join(m["content"] for m in payload.get("messages", []) if m.get("role") == "user")
+        prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        system_content = "".join(m["content"] for m in payload.get("messages", []) if m.get("role") == "system")
+        with FakeOpenAIHandler.lock:
+            cached = system_content in FakeOpenAIHandler.seen_prefixes
+            FakeOpenAIHandler.seen_prefixes.add(system_content)
+        content = json.dumps(build_analysis(user_content))
+        self._send(200, {
+            "id": f"chatcmpl-fake-{FakeOpenAIHandler.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_chars // 4 + len(content) // 4,
+                "prompt_tokens_details": {"cached_tokens": len(system_content) // 4 if cached else 0},
+            },
+        })
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    # The default listen backlog (5) drops connections under concurrent load tests
+    request_queue_size = 256
+
+
+def start_fake_openai(port=0, delay=0.0):
+    """
+    Starts the fake server on a background thread and returns it.
+    The base URL for the OpenAI client is f"http://127.0.0.1:{server.server_port}/v1".
+    """
+    handler = type("Handler", (FakeOpenAIHandler,), {"delay": delay})
+    server = FakeOpenAIServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def set_delay(server, delay):
+    """Seconds every later completion sleeps before answering."""
+    server.RequestHandlerClass.delay = delay
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI server for ContinuityGuard")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to sleep before each completion")
+    args = parser.parse_args()
+
+    server = start_fake_openai(args.port, args.delay)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{server.server_port}/v1 (delay {args.delay}s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
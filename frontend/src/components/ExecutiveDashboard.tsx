@@ -5,6 +5,7 @@ interface ExpenseCategory {
     category: string;
     cost: string;
     reason: string;
+    amount_paise?: number; // Exact amount (₹1 = 100 paise)
 }
 
 interface Scene {
@@ -39,6 +40,7 @@ export default function ExecutiveDashboard({ analysisData }: ExecutiveDashboardP
         // Priority 1: Use the robust server-side aggregated breakdown if available
         if (analysisData.overall_budget_breakdown) {
             const totalRaw = analysisData.overall_budget_breakdown.reduce((acc, item) => {
+                if (typeof item.amount_paise === "number") return acc + item.amount_paise / 100;
                 let val = 0;
                 const c_str = item.cost;
                 if (c_str.includes("Cr")) val = parseFloat(c_str.replace(/[^\d.]/g, '')) * 10000000;
@@ -51,28 +51,26 @@ export default function ProductionHub() {
         // Reset previous script to ensure change detection
         setIngestedScript(null);
 
+        const name = file.name.toLowerCase();
+        if (file.type === "application/pdf" || name.endsWith(".pdf") || name.endsWith(".fdx")) {
+            ingestOnServer(file);
+            return;
+        }
+
         const reader = new FileReader();
 
         reader.onload = (event) => {
             const text = event.target?.result as string;
 
-            // 1. PDF Gate
-            if (file.type === "application/pdf" || file.name.toLowerCase().endsWith(".pdf")) {
-                if (text.substring(0, 10).includes("PDF")) {
-                    setIngestedScript(`[PDF DETECTED: ${file.name}]\n\n⚠️ PARTIAL DATA WARNING ⚠️\n\nBrowsers cannot natively read PDF text perfectly. We have extracted what we can, but formatting may be lost.\n\nFOR BEST RESULTS:\nSave your script as .TXT or .FOUNTAIN and upload again.`);
-                } else {
-                    setIngestedScript(text); // Try as text anyway
-                }
-            }
-            // 2. Word Doc Gate (CRITICAL FIX)
-            else if (file.name.toLowerCase().endsWith(".docx") || file.name.toLowerCase().endsWith(".doc")) {
+            // 1. Word Doc Gate (CRITICAL FIX) - PDF / FDX go to the backend (ingestOnServer)
+            if (file.name.toLowerCase().endsWith(".docx") || file.name.toLowerCase().endsWith(".doc")) {
                 setIngestedScript(`[WORD DOCUMENT DETECTED: ${file.name}]\n\n❌ UNREADABLE FORMAT ❌\n\nMicrosoft Word files (.docx) are binary encrypted files. This system reads RAW TEXT.\n\nPLEASE ACTION:\n1. Open ${file.name} in Word.\n2. Click 'File' > 'Save As'.\n3. Select 'Plain Text (*.txt)'.\n4. Upload the new .txt file here.\n\n(Alternatively: Copy/Paste the text directly)`);
             }
-            // 3. Binary Garbage Gate (Fallback)
+            // 2. Binary Garbage Gate (Fallback)
             else if (text.startsWith("PK") || text.includes("\0")) {
                 setIngestedScript(`[BINARY FILE DETECTED: ${file.name}]\n\nThis file appears to be a binary image or archive.\nPlease upload a TEXT based script (.txt, .md, .fountain).`);
             }
-            // 4. Success
+            // 3. Success
             else {
                 setIngestedScript(text);
             }
@@ -88,6 +86,25 @@ export default function ProductionHub() {
         reader.readAsText(file);
     };
 
+    // PDF / Final Draft: the backend extracts the script text (streamed upload, no JSON blob)
+    const ingestOnServer = async (file: File) => {
+        try {
+            const response = await fetch(`/api/ingest?filename=${encodeURIComponent(file.name)}`, {
+                method: 'POST',
+                headers: { 'Content-Type': file.type || 'application/octet-stream' },
+                body: file,
+            });
+            if (!response.ok) {
+                const errText = await response.text();
+                throw new Error(`${response.status} ${errText}`);
+            }
+            setIngestedScript(await response.text());
+        } catch (err) {
+            setIngestedScript(`[ERROR READING FILE: ${file.name}]\n${err}\n\nSave your script as .TXT or .FOUNTAIN and upload again.`);
+        }
+        simulateIngest(file.name);
+    };
+
     const handleDrop = (e: React.DragEvent) => {
         e.preventDefault();
         e.stopPropagation();
@@ -4,12 +4,69 @@ interface ShootingCommanderProps {
     scriptData?: any | null;
 }
 
+interface ScheduledScene {
+    scene_id: string;
+    header: string;
+    location: string;
+    start_time: string;
+    hours: number;
+}
+
+interface ShootDay {
+    day: number;
+    unit: string;
+    call_time: string;
+    wrap_time: string;
+    hours: number;
+    locations: string[];
+    cast: string[];
+    scenes: ScheduledScene[];
+}
+
+interface SchedulePlan {
+    days: ShootDay[];
+    schedule_risks: { scene_id: string; risk_type: string; message: string; severity: string }[];
+    total_days: number;
+    company_moves: number;
+    day_night_flips: number;
+    baseline_company_moves: number;
+    baseline_day_night_flips: number;
+}
+
 export default function ShootingCommander({ scriptData }: ShootingCommanderProps) {
     // Generate Call Sheet from Real Data
     const scenes = scriptData?.scenes || [];
     const hasData = scenes.length > 0;
 
-    const callSheetItems = hasData ? scenes.map((scene: any, index: number) => ({
+    // Optimized shoot order from the backend scheduler
+    const [plan, setPlan] = useState<SchedulePlan | null>(null);
+    const [activeDay, setActiveDay] = useState(0);
+
+    useEffect(() => {
+        setPlan(null);
+        setActiveDay(0);
+        if (!hasData) return;
+        fetch('/api/schedule', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ scenes })
+        })
+            .then(res => res.ok ? res.json() : null)
+            .then(data => setPlan(data))
+            .catch(err => console.error("Schedule optimization failed", err));
+    }, [scriptData]);
+
+    const planDay = plan?.days[activeDay];
+
+    const callSheetItems = planDay ? planDay.scenes.map((item, index) => ({
+        id: `${planDay.day}-${index}`,
+        time: item.start_time,
+        scene: item.header,
+        cast: planDay.cast.join(', ') || 'TBD',
+        page: `${item.hours}h`,
+        loc: item.location,
+        day: planDay
+    })) : hasData ? scenes.map((scene: any, index: number) => ({
         id: (index + 1).toString(),
         time: scene.time?.includes('NIGHT') ? '22:00' : '09:00',
         scene: scene.header,
@@ -28,7 +85,7 @@ export default function ShootingCommander({ scriptData }: ShootingCommanderProps
         if (callSheetItems.length > 0) {
             setSelectedScene(callSheetItems[0]);
         }
-    }, [scriptData]);
+    }, [scriptData, plan, activeDay]);
 
     // Dynamic Prediction Logic based on Scene content
     const getPredictions = (scene: any) => {
@@ -41,6 +98,19 @@ export default function ShootingCommander({ scriptData }: ShootingCommanderProps
 
         const isComplex = scene.scene.includes("ACTION") || scene.scene.includes("CHASE");
 
+        if (plan && scene.day) {
+            // From the optimized plan: turnaround risks on this day, and moves saved vs. script order
+            const dayRisks = plan.schedule_risks.filter(r => scene.day.scenes.some((s: ScheduledScene) => s.scene_id === r.scene_id));
+            const saved = plan.baseline_company_moves > 0
+                ? Math.round(100 * (1 - plan.company_moves / plan.baseline_company_moves))
+                : 100;
+            return {
+                rain: isOutdoor ? 25 : 0,
+                turnaround: dayRisks.some(r => r.risk_type === 'Turnaround') || isNightTime ? 'HIGH' : 'LOW',
+                move: Math.max(0, Math.min(100, saved))
+            };
+        }
+
         return {
             rain: isOutdoor ? Math.floor(Math.random() * 30) + 10 : 0, // Higher risk for EXT
             turnaround: isNightTime ? 'HIGH' : 'LOW',
@@ -69,12 +139,33 @@ export default function ShootingCommander({ scriptData }: ShootingCommanderProps
                 <div className="lg:col-span-2 space-y-6">
                     <div className="bg-zinc-900 border border-zinc-800 rounded-xl p-6">
                         <div className="flex justify-between items-center mb-6">
-                            <h3 className="font-bold text-zinc-200">Day 1 Call Sheet</h3>
+                            <h3 className="font-bold text-zinc-200">
+                                Day {planDay ? planDay.day : 1} Call Sheet
+                                {planDay && (
+                                    <span className="ml-3 text-xs font-mono text-zinc-500">
+                                        {planDay.unit} UNIT · CALL {planDay.call_time} · WRAP {planDay.wrap_time}
+                                    </span>
+                                )}
+                            </h3>
                             <button className="text-xs bg-zinc-800 hover:bg-zinc-700 px-3 py-1.5 rounded transition-colors">
                                 ⬇ Export PDF
                             </button>
                         </div>
 
+                        {plan && plan.days.length > 1 && (
+                            <div className="flex flex-wrap gap-2 mb-4">
+                                {plan.days.map((day, index) => (
+                                    <button
+                                        key={day.day}
+                                        onClick={() => setActiveDay(index)}
+                                        className={`text-xs font-mono px-2 py-1 rounded border transition-colors ${index === activeDay ? 'bg-blue-900/40 border-blue-500 text-blue-300' : 'border-zinc-800 text-zinc-500 hover:bg-zinc-800'}`}
+                                    >
+                                        D{day.day} {day.unit === 'NIGHT' ? '🌙' : '☀'}
+                                    </button>
+                                ))}
+                            </div>
+                        )}
+
                         <div className="overflow-x-auto">
                             <table className="w-full text-left text-sm">
                                 <thead className="text-zinc-500 font-mono text-xs uppercase border-b border-zinc-800">
@@ -102,6 +193,34 @@ export default function ShootingCommander({ scriptData }: ShootingCommanderProps
                             </table>
                         </div>
 
+                        {plan && (
+                            <div className="mt-4 grid grid-cols-3 gap-3 text-xs font-mono">
+                                <div className="p-3 bg-zinc-950/50 border border-zinc-800 rounded">
+                                    <div className="text-zinc-500 uppercase">Shoot Days</div>
+                                    <div className="text-white font-bold text-lg">{plan.total_days}</div>
+                                </div>
+                                <div className="p-3 bg-zinc-950/50 border border-zinc-800 rounded">
+                                    <div className="text-zinc-500 uppercase">Company Moves</div>
+                                    <div className="text-white font-bold text-lg">{plan.company_moves} <span className="text-zinc-500 text-xs line-through">{plan.baseline_company_moves}</span></div>
+                                </div>
+                                <div className="p-3 bg-zinc-950/50 border border-zinc-800 rounded">
+                                    <div className="text-zinc-500 uppercase">Day/Night Flips</div>
+                                    <div className="text-white font-bold text-lg">{plan.day_night_flips} <span className="text-zinc-500 text-xs line-through">{plan.baseline_day_night_flips}</span></div>
+                                </div>
+                            </div>
+                        )}
+
+                        {plan && plan.schedule_risks.length > 0 && (
+                            <div className="mt-4 space-y-2">
+                                {plan.schedule_risks.map((risk, idx) => (
+                                    <div key={idx} className="p-3 bg-zinc-950/50 border border-amber-900/50 rounded text-xs">
+                                        <span className="text-amber-500 font-bold uppercase mr-2">{risk.risk_type}</span>
+                                        <span className="text-zinc-400">{risk.message.replace(/\*\*/g, '')}</span>
+                                    </div>
+                                ))}
+                            </div>
+                        )}
+
                         {!hasData && (
                             <div className="mt-4 text-center p-4 bg-zinc-950/50 border border-zinc-800 border-dashed rounded text-zinc-500 text-xs italic">
                                 Ingest a script to auto-fill this schedule.
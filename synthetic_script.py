@@ -0,0 +1,91 @@
+"""
+Synthetic screenplay generator, for benchmarks and load tests.
+
+Usage:
+    python synthetic_script.py --scenes 500 --seed 7 > big_script.txt
+
+Scenes reuse a small pool of sluglines (like a real shooting script), and a share of
+them are trigger-dense action/song scenes or carry compliance keywords, so every
+branch of the local engine gets exercised. Same arguments -> same script.
+"""
+import argparse
+import random
+
+LOCATIONS = [
+    "OLD TEMPLE", "TEMPLE STEPS", "DANCE BAR", "VILLAIN'S FARMHOUSE", "HERO'S HOUSE",
+    "HIGHWAY", "RAMOJI FILM CITY SET", "POLICE STATION", "VILLAGE SQUARE", "RAILWAY STATION",
+    "CORPORATE OFFICE", "FOREST CLEARING", "MARKET STREET", "WEDDING HALL", "BEACH ROAD",
+]
+TIMES = ["DAY", "NIGHT", "CONTINUOUS", "LATER", "DAY", "NIGHT"]
+CHARACTERS = ["HERO", "HEROINE", "VILLAIN", "MOTHER", "INSPECTOR", "COMEDIAN", "HENCHMAN"]
+
+DIALOGUE = [
+    "I will destroy you.",
+    "This village is my family.",
+    "You have no idea who I am.",
+    "Mother, bless me before I go.",
+    "Sir, the file is missing.",
+    "Nobody leaves this room tonight.",
+    "Some promises cost a lifetime.",
+]
+QUIET_ACTION = [
+    "{c} sits by the window, lost in thought.",
+    "{c} pours tea and slides a cup across the table.",
+    "{c} reads a letter, then folds it carefully.",
+    "{c} paces the room. A clock ticks.",
+]
+ACTION = [
+    "A CHASE erupts. Jeeps tear through the dust.",
+    "A BLAST rips through the gate. FIRE everywhere.",
+    "A HELICOPTER swoops low over the CROWD.",
+    "{c} leaps off the TRAIN roof into a FIGHT with twenty henchmen.",
+    "STUNT: {c} is flung through a glass wall in slow motion.",
+    "An EXPLOSION flips a car. VFX debris rains down.",
+]
+SONG = [
+    "SONG: 200 dancers fill the frame. The HERO dances in the rain.",
+    "The CROWD claps along as the item SONG builds.",
+]
+COMPLIANCE = [
+    "{c} lights a CIGARETTE and blows smoke at the camera.",
+    "{c} drinks a bottle of SCOTCH in one go.",
+    "{c} rides in on a white HORSE. A DOG barks.",
+    "{c} kneels to PRAY before the deity.",
+    "A CHILD watches from behind the pillar.",
+]
+
+
+def generate_screenplay(scenes: int = 100, seed: int = 0, action_ratio: float = 0.3, compliance_ratio: float = 0.2) -> str:
+    """Returns a screenplay with exactly `scenes` sluglines."""
+    rng = random.Random(seed)
+    blocks = []
+    for _ in range(scenes):
+        location = rng.choice(LOCATIONS)
+        slug = f"{rng.choice(['INT.', 'EXT.'])} {location} - {rng.choice(TIMES)}"
+        cast = rng.sample(CHARACTERS, 2)
+
+        lines = [slug]
+        roll = rng.random()
+        if roll < action_ratio:
+            lines += [rng.choice(ACTION).format(c=cast[0]) for _ in range(rng.randint(3, 8))]
+            if rng.random() < 0.3:
+                lines.append(rng.choice(SONG))
+        else:
+            lines += [rng.choice(QUIET_ACTION).format(c=cast[0]) for _ in range(rng.randint(1, 3))]
+        if rng.random() < compliance_ratio:
+            lines.append(rng.choice(COMPLIANCE).format(c=cast[1]))
+        for _ in range(rng.randint(2, 10)):
+            speaker = rng.choice(cast)
+            lines += ["", f"                    {speaker}", f"          {rng.choice(DIALOGUE)}"]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic screenplay generator for ContinuityGuard")
+    parser.add_argument("--scenes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--action-ratio", type=float, default=0.3, help="Share of trigger-dense action scenes")
+    parser.add_argument("--compliance-ratio", type=float, default=0.2, help="Share of scenes with a compliance keyword")
+    args = parser.parse_args()
+    print(generate_screenplay(args.scenes, args.seed, args.action_ratio, args.compliance_ratio), end="")